@@ -1,35 +1,315 @@
 from datetime import date
+from typing import Literal
 
-from fastapi import APIRouter, Depends
-from supabase import Client
+from fastapi import APIRouter, Depends, Query, Request, Response
+from postgrest import AsyncPostgrestClient
 
-from app.core import get_current_user, get_user_supabase
-from app.models import AnalyticsSummary, ChartDataPoint
-from app.services import AnalyticsService
+from app.core import (
+    conditional_response,
+    get_activity_store,
+    get_analytics_cache,
+    get_async_user_supabase,
+    get_current_user,
+    get_settings,
+)
+from app.models import (
+    AnalyticsDashboard,
+    AnalyticsSummary,
+    CalendarHeatmap,
+    ChartDataPoint,
+    ChartSeries,
+    CorrelationMatrix,
+    LaggedCorrelations,
+    StreakStats,
+    TrendReport,
+)
+from app.services import AsyncAnalyticsService, AsyncStreakService, AsyncVersionService
+from app.services.analytics_service import resolve_date_range
+from app.services.correlations import MAX_LAG
+from app.services.downsampling import DEFAULT_MAX_POINTS
+from app.services.heatmap import year_bounds
+from app.services.metric_index import index_window
+
+
+ChartResolution = Literal["day", "week", "month", "lttb"]
+ChartFormat = Literal["points", "columnar"]
 
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
+async def _check_not_modified(
+    request: Request,
+    response: Response,
+    *,
+    supabase: AsyncPostgrestClient,
+    user_id: str,
+    date_range: tuple[date | None, date | None] = (None, None),
+    extra: tuple = (),
+) -> tuple[Response | None, str]:
+    """Probe both entry tables over ``date_range`` and answer a conditional GET.
+
+    Returns the 304 response, if any, and the probed version, which the
+    response's ETag is built from. The route passes the version to its
+    cache, so the body it builds is never older than that ETag.
+    """
+    version = await AsyncVersionService(supabase, user_id).get_version(
+        start_date=date_range[0], end_date=date_range[1]
+    )
+    return conditional_response(request, response, user_id, version, *extra), version
+
+
 @router.get("/summary", response_model=AnalyticsSummary)
 async def get_summary(
     start_date: date | None = None,
     end_date: date | None = None,
+    *,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Get analytics summary for the current user."""
-    service = AnalyticsService(supabase, current_user["id"])
-    return service.get_summary(start_date, end_date)
+    not_modified, version = await _check_not_modified(
+        request,
+        response,
+        supabase=supabase,
+        user_id=current_user["id"],
+        date_range=resolve_date_range(start_date, end_date),
+    )
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncAnalyticsService(
+        supabase,
+        current_user["id"],
+        summary_source=get_settings().analytics_summary_source,
+        cache=get_analytics_cache(),
+        data_version=version,
+    )
+    return await service.get_summary(start_date, end_date)
 
 
-@router.get("/charts", response_model=list[ChartDataPoint])
+@router.get("/charts", response_model=list[ChartDataPoint] | ChartSeries)
 async def get_chart_data(
     start_date: date | None = None,
     end_date: date | None = None,
+    *,
+    resolution: ChartResolution = "day",
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=2000),
+    chart_format: ChartFormat = Query("points", alias="format"),
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
+):
+    """Get chart data for the current user.
+
+    ``week`` and ``month`` average each metric per bucket; ``lttb`` keeps at
+    most ``max_points`` days while preserving productivity peaks.
+    ``format=columnar`` returns one array per field instead of one object
+    per date.
+    """
+    not_modified, version = await _check_not_modified(
+        request,
+        response,
+        supabase=supabase,
+        user_id=current_user["id"],
+        date_range=resolve_date_range(start_date, end_date),
+    )
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncAnalyticsService(
+        supabase,
+        current_user["id"],
+        chart_source=get_settings().analytics_chart_source,
+        cache=get_analytics_cache(),
+        data_version=version,
+    )
+    if chart_format == "columnar":
+        return await service.get_chart_series(
+            start_date, end_date, resolution=resolution, max_points=max_points
+        )
+    return await service.get_chart_data(
+        start_date, end_date, resolution=resolution, max_points=max_points
+    )
+
+
+@router.get("/trends", response_model=TrendReport)
+async def get_trends(
+    as_of: date | None = None,
+    *,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
-    """Get chart data for the current user."""
-    service = AnalyticsService(supabase, current_user["id"])
-    return service.get_chart_data(start_date, end_date)
+    """Get 7/30/90/365-day trends for the current user, ending on ``as_of``."""
+    not_modified, version = await _check_not_modified(
+        request,
+        response,
+        supabase=supabase,
+        user_id=current_user["id"],
+        date_range=index_window(as_of or date.today()),
+    )
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncAnalyticsService(
+        supabase,
+        current_user["id"],
+        chart_source=get_settings().analytics_chart_source,
+        cache=get_analytics_cache(),
+        data_version=version,
+    )
+    return await service.get_trends(as_of)
+
+
+@router.get("/heatmap", response_model=CalendarHeatmap)
+async def get_heatmap(
+    year: int | None = Query(None, ge=1, le=9999),
+    *,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
+):
+    """Get a calendar heatmap of ``year`` (default this year) for the current user."""
+    not_modified, version = await _check_not_modified(
+        request,
+        response,
+        supabase=supabase,
+        user_id=current_user["id"],
+        date_range=year_bounds(year or date.today().year),
+    )
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncAnalyticsService(
+        supabase,
+        current_user["id"],
+        chart_source=get_settings().analytics_chart_source,
+        cache=get_analytics_cache(),
+        data_version=version,
+    )
+    return await service.get_heatmap(year)
+
+
+@router.get("/streaks", response_model=StreakStats)
+async def get_streaks(
+    *,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
+):
+    """Get current and longest logging streaks for the current user."""
+    # The current streak depends on today's date as well as the data.
+    not_modified, version = await _check_not_modified(
+        request, response, supabase=supabase, user_id=current_user["id"], extra=(date.today(),)
+    )
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncStreakService(
+        supabase, current_user["id"], get_activity_store(), data_version=version
+    )
+    return await service.get_streaks()
+
+
+@router.get("/correlations", response_model=CorrelationMatrix)
+async def get_correlations(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    *,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
+):
+    """Get routine-vs-productivity correlations for the current user."""
+    not_modified, version = await _check_not_modified(
+        request,
+        response,
+        supabase=supabase,
+        user_id=current_user["id"],
+        date_range=resolve_date_range(start_date, end_date),
+    )
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncAnalyticsService(
+        supabase, current_user["id"], cache=get_analytics_cache(), data_version=version
+    )
+    return await service.get_correlations(start_date, end_date)
+
+
+@router.get("/correlations/lagged", response_model=LaggedCorrelations)
+async def get_lagged_correlations(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    max_lag: int = Query(MAX_LAG, ge=0, le=MAX_LAG),
+    *,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
+):
+    """Get correlations of routine metrics with productivity 0..max_lag days later."""
+    not_modified, version = await _check_not_modified(
+        request,
+        response,
+        supabase=supabase,
+        user_id=current_user["id"],
+        date_range=resolve_date_range(start_date, end_date),
+    )
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncAnalyticsService(
+        supabase, current_user["id"], cache=get_analytics_cache(), data_version=version
+    )
+    return await service.get_lagged_correlations(start_date, end_date, max_lag)
+
+
+@router.get("/dashboard", response_model=AnalyticsDashboard)
+async def get_dashboard(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    include: list[Literal["summary", "charts"]] = Query(default=["summary", "charts"]),
+    *,
+    resolution: ChartResolution = "day",
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=2000),
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
+):
+    """Get summary and chart data for the dashboard in one request.
+
+    Both sections are derived from a single pair of range queries; use
+    ``include`` to request only some of them.
+    """
+    not_modified, version = await _check_not_modified(
+        request,
+        response,
+        supabase=supabase,
+        user_id=current_user["id"],
+        date_range=resolve_date_range(start_date, end_date),
+    )
+    if not_modified is not None:
+        return not_modified
+
+    settings = get_settings()
+    service = AsyncAnalyticsService(
+        supabase,
+        current_user["id"],
+        summary_source=settings.analytics_summary_source,
+        chart_source=settings.analytics_chart_source,
+        cache=get_analytics_cache(),
+        data_version=version,
+    )
+    return await service.get_dashboard(
+        start_date, end_date, include, resolution=resolution, max_points=max_points
+    )
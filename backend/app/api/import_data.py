@@ -1,21 +1,61 @@
-import io
+import asyncio
+import shutil
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from postgrest import SyncPostgrestClient
+
+from app.core import (
+    ImportJobStore,
+    get_activity_store,
+    get_analytics_cache,
+    get_current_user,
+    get_import_job_runner,
+    get_import_job_store,
+    get_settings,
+    get_user_supabase,
+)
+from app.models import CSVImportResult, ImportJob
+from app.services import StreakService
+from app.services.csv_import import CSVImporter, OnConflict, run_import_job
 
-import pandas as pd
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from supabase import Client
 
-from app.core import get_current_user, get_user_supabase
-from app.models import CSVImportResult
+router = APIRouter(prefix="/import", tags=["import"])
 
 
-router = APIRouter(prefix="/import", tags=["import"])
+def _refresh_derived_data(importer: CSVImporter) -> None:
+    """Drop cached analytics for the imported days and rebuild the streak bitmap."""
+    if importer.touched_dates:
+        get_analytics_cache().invalidate(importer.user_id, importer.touched_dates)
+        # One bulk rebuild instead of patching the streak bitmap per row.
+        StreakService(importer.supabase, importer.user_id, get_activity_store()).rebuild()
+
+
+def _store_upload(
+    store: ImportJobStore, user_id: str, file: UploadFile, on_conflict: OnConflict
+) -> ImportJob:
+    """Create a queued job and copy the upload next to it."""
+    job = store.create(user_id, file.filename, on_conflict)
+    with store.upload_path(job.id).open("wb") as upload:
+        shutil.copyfileobj(file.file, upload)
+    return job
 
 
-@router.post("/csv", response_model=CSVImportResult)
+def _import_inline(importer: CSVImporter, file: UploadFile, chunk_rows: int) -> None:
+    """Import the upload and refresh what was derived from the imported days."""
+    # The upload is spooled to disk past 1 MB; read it in chunks from there.
+    importer.import_csv(file.file, chunk_rows=chunk_rows)
+    _refresh_derived_data(importer)
+
+
+@router.post("/csv", response_model=CSVImportResult | ImportJob)
 async def import_csv(
     file: UploadFile = File(...),
+    on_conflict: OnConflict = Query("error"),
+    background: bool = Query(False),
+    *,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: SyncPostgrestClient = Depends(get_user_supabase),
 ):
     """
     Import data from a CSV file.
@@ -28,6 +68,20 @@ async def import_csv(
     Expected columns for productivity:
     - date, productivity_score, tasks_completed, tasks_planned,
       focus_hours, distractions_count, energy_level, stress_level, notes
+
+    The file is parsed ``IMPORT_CHUNK_ROWS`` rows at a time, and each chunk
+    is validated and written before the next is read. Rows are sent in bulk inserts of
+    ``IMPORT_BATCH_SIZE`` records; a failing batch is retried in halves so
+    errors still name the bad rows.
+
+    ``on_conflict`` handles days that already have an entry: ``error``
+    (default) fails those rows, ``update`` overwrites them and ``skip``
+    leaves them as they are.
+
+    With ``background=true`` the upload is stored, a job is queued, and the
+    job is returned with status 202. Poll ``GET /import/jobs/{id}`` for its
+    progress and result. The job runs in this process, so background imports
+    are rejected where ``IMPORT_BACKGROUND_JOBS`` is off (Lambda).
     """
     if not file.filename.endswith(".csv"):
         raise HTTPException(
@@ -35,99 +89,57 @@ async def import_csv(
             detail="File must be a CSV",
         )
 
-    try:
-        content = await file.read()
-        df = pd.read_csv(io.BytesIO(content))
-    except Exception as e:
+    user_id = current_user["id"]
+    settings = get_settings()
+    if background and not settings.import_background_jobs:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to parse CSV: {e!s}",
-        ) from e
+            detail="Background imports are not available on this deployment",
+        )
 
-    imported_count = 0
-    failed_count = 0
-    errors = []
+    def new_importer() -> CSVImporter:
+        return CSVImporter(
+            supabase, user_id, batch_size=settings.import_batch_size, on_conflict=on_conflict
+        )
 
-    # Determine which type of data based on columns
-    routine_columns = {"wake_time", "sleep_duration_hours", "morning_mood"}
-    productivity_columns = {"productivity_score", "energy_level"}
+    if background:
+        store = get_import_job_store()
+        job = await asyncio.to_thread(_store_upload, store, user_id, file, on_conflict)
+        queued = job.model_copy()
+        get_import_job_runner().submit(
+            lambda: run_import_job(
+                store,
+                job,
+                new_importer(),
+                chunk_rows=settings.import_chunk_rows,
+                on_success=_refresh_derived_data,
+            )
+        )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return queued
 
-    csv_columns = set(df.columns)
+    importer = new_importer()
+    try:
+        # Parsing and the bulk inserts block, so they run in a worker thread.
+        await asyncio.to_thread(_import_inline, importer, file, settings.import_chunk_rows)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to parse CSV: {e!s}",
+        ) from e
+    return importer.result()
 
-    user_id = current_user["id"]
 
-    for idx, row in df.iterrows():
-        try:
-            row_dict = row.to_dict()
-            row_dict["user_id"] = user_id
-
-            # Remove NaN values
-            row_dict = {k: v for k, v in row_dict.items() if pd.notna(v)}
-
-            # Determine table and insert
-            if routine_columns.issubset(csv_columns):
-                # Import as morning routine
-                supabase.table("morning_routines").insert(row_dict).execute()
-            elif productivity_columns.issubset(csv_columns):
-                # Import as productivity
-                supabase.table("productivity_entries").insert(row_dict).execute()
-            else:
-                # Try to insert into both tables based on available columns
-                routine_data = {
-                    k: v
-                    for k, v in row_dict.items()
-                    if k
-                    in [
-                        "date",
-                        "user_id",
-                        "wake_time",
-                        "sleep_duration_hours",
-                        "exercise_minutes",
-                        "meditation_minutes",
-                        "breakfast_quality",
-                        "morning_mood",
-                        "screen_time_before_bed",
-                        "caffeine_intake",
-                        "water_intake_ml",
-                    ]
-                }
-
-                productivity_data = {
-                    k: v
-                    for k, v in row_dict.items()
-                    if k
-                    in [
-                        "date",
-                        "user_id",
-                        "productivity_score",
-                        "tasks_completed",
-                        "tasks_planned",
-                        "focus_hours",
-                        "distractions_count",
-                        "energy_level",
-                        "stress_level",
-                        "notes",
-                    ]
-                }
-
-                if len(routine_data) > 2:
-                    supabase.table("morning_routines").insert(routine_data).execute()
-
-                if len(productivity_data) > 2:
-                    supabase.table("productivity_entries").insert(productivity_data).execute()
-
-            imported_count += 1
-
-        except Exception as e:
-            failed_count += 1
-            errors.append(f"Row {idx + 1}: {e!s}")
-            if len(errors) > 10:
-                errors.append("... (more errors truncated)")
-                break
-
-    return CSVImportResult(
-        success=failed_count == 0,
-        imported_count=imported_count,
-        failed_count=failed_count,
-        errors=errors[:10],
-    )
+@router.get("/jobs/{job_id}", response_model=ImportJob)
+async def get_import_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """Get the status and progress of one of the user's background imports."""
+    job = get_import_job_store().get(current_user["id"], job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found",
+        )
+    return job
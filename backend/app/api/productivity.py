@@ -1,15 +1,21 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
-
-from app.core import get_current_user, get_user_supabase
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from postgrest import AsyncPostgrestClient
+
+from app.core import (
+    conditional_response,
+    get_activity_store,
+    get_analytics_cache,
+    get_async_user_supabase,
+    get_current_user,
+)
 from app.models import (
     PaginatedResponse,
     ProductivityCreate,
     ProductivityUpdate,
 )
-from app.services import ProductivityService
+from app.services import AsyncProductivityService, AsyncVersionService
 
 
 router = APIRouter(prefix="/productivity", tags=["productivity"])
@@ -21,23 +27,32 @@ async def list_productivity(
     page_size: int = 10,
     start_date: date | None = None,
     end_date: date | None = None,
+    *,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """List all productivity entries for the current user."""
-    service = ProductivityService(supabase, current_user["id"])
-    return service.list(page, page_size, start_date, end_date)
+    versions = AsyncVersionService(supabase, current_user["id"])
+    version = await versions.get_version(("productivity_entries",), start_date, end_date)
+    not_modified = conditional_response(request, response, current_user["id"], version)
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncProductivityService(supabase, current_user["id"])
+    return await service.list(page, page_size, start_date, end_date)
 
 
 @router.get("/{entry_id}")
 async def get_productivity(
     entry_id: str,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Get a specific productivity entry by ID."""
-    service = ProductivityService(supabase, current_user["id"])
-    entry = service.get(entry_id)
+    service = AsyncProductivityService(supabase, current_user["id"])
+    entry = await service.get(entry_id)
 
     if not entry:
         raise HTTPException(
@@ -52,11 +67,13 @@ async def get_productivity(
 async def create_productivity(
     data: ProductivityCreate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Create a new productivity entry."""
-    service = ProductivityService(supabase, current_user["id"])
-    return service.create(data)
+    service = AsyncProductivityService(
+        supabase, current_user["id"], get_analytics_cache(), get_activity_store()
+    )
+    return await service.create(data)
 
 
 @router.put("/{entry_id}")
@@ -64,11 +81,13 @@ async def update_productivity(
     entry_id: str,
     data: ProductivityUpdate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Update an existing productivity entry."""
-    service = ProductivityService(supabase, current_user["id"])
-    entry = service.update(entry_id, data)
+    service = AsyncProductivityService(
+        supabase, current_user["id"], get_analytics_cache(), get_activity_store()
+    )
+    entry = await service.update(entry_id, data)
 
     if not entry:
         raise HTTPException(
@@ -83,11 +102,13 @@ async def update_productivity(
 async def delete_productivity(
     entry_id: str,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Delete a productivity entry."""
-    service = ProductivityService(supabase, current_user["id"])
-    deleted = service.delete(entry_id)
+    service = AsyncProductivityService(
+        supabase, current_user["id"], get_analytics_cache(), get_activity_store()
+    )
+    deleted = await service.delete(entry_id)
 
     if not deleted:
         raise HTTPException(
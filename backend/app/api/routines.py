@@ -1,15 +1,21 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
-
-from app.core import get_current_user, get_user_supabase
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from postgrest import AsyncPostgrestClient
+
+from app.core import (
+    conditional_response,
+    get_activity_store,
+    get_analytics_cache,
+    get_async_user_supabase,
+    get_current_user,
+)
 from app.models import (
     MorningRoutineCreate,
     MorningRoutineUpdate,
     PaginatedResponse,
 )
-from app.services import RoutineService
+from app.services import AsyncRoutineService, AsyncVersionService
 
 
 router = APIRouter(prefix="/routines", tags=["routines"])
@@ -21,23 +27,32 @@ async def list_routines(
     page_size: int = 10,
     start_date: date | None = None,
     end_date: date | None = None,
+    *,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """List all morning routines for the current user."""
-    service = RoutineService(supabase, current_user["id"])
-    return service.list(page, page_size, start_date, end_date)
+    versions = AsyncVersionService(supabase, current_user["id"])
+    version = await versions.get_version(("morning_routines",), start_date, end_date)
+    not_modified = conditional_response(request, response, current_user["id"], version)
+    if not_modified is not None:
+        return not_modified
+
+    service = AsyncRoutineService(supabase, current_user["id"])
+    return await service.list(page, page_size, start_date, end_date)
 
 
 @router.get("/{routine_id}")
 async def get_routine(
     routine_id: str,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Get a specific morning routine by ID."""
-    service = RoutineService(supabase, current_user["id"])
-    routine = service.get(routine_id)
+    service = AsyncRoutineService(supabase, current_user["id"])
+    routine = await service.get(routine_id)
 
     if not routine:
         raise HTTPException(
@@ -52,11 +67,13 @@ async def get_routine(
 async def create_routine(
     data: MorningRoutineCreate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Create a new morning routine entry."""
-    service = RoutineService(supabase, current_user["id"])
-    return service.create(data)
+    service = AsyncRoutineService(
+        supabase, current_user["id"], get_analytics_cache(), get_activity_store()
+    )
+    return await service.create(data)
 
 
 @router.put("/{routine_id}")
@@ -64,11 +81,13 @@ async def update_routine(
     routine_id: str,
     data: MorningRoutineUpdate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Update an existing morning routine."""
-    service = RoutineService(supabase, current_user["id"])
-    routine = service.update(routine_id, data)
+    service = AsyncRoutineService(
+        supabase, current_user["id"], get_analytics_cache(), get_activity_store()
+    )
+    routine = await service.update(routine_id, data)
 
     if not routine:
         raise HTTPException(
@@ -83,11 +102,13 @@ async def update_routine(
 async def delete_routine(
     routine_id: str,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Delete a morning routine."""
-    service = RoutineService(supabase, current_user["id"])
-    deleted = service.delete(routine_id)
+    service = AsyncRoutineService(
+        supabase, current_user["id"], get_analytics_cache(), get_activity_store()
+    )
+    deleted = await service.delete(routine_id)
 
     if not deleted:
         raise HTTPException(
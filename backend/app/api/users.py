@@ -1,15 +1,18 @@
+from datetime import date
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
+from postgrest import AsyncPostgrestClient
 
-from app.core import get_current_user, get_user_supabase
+from app.core import get_async_user_supabase, get_current_user
 from app.models import (
     CurrentUser,
+    GoalProgressReport,
     UserGoalCreate,
     UserGoalUpdate,
     UserProfileUpdate,
     UserSettingsUpdate,
 )
-from app.services import UserService
+from app.services import AsyncUserService
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -23,14 +26,14 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.get("/me", response_model=CurrentUser)
 async def get_current_user_data(
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Get complete current user data including profile, settings, and goals."""
-    service = UserService(supabase, current_user["id"])
+    service = AsyncUserService(supabase, current_user["id"])
 
-    profile = service.get_profile()
-    settings = service.get_settings()
-    goals = service.list_goals(active_only=True)
+    profile = await service.get_profile()
+    settings = await service.get_settings()
+    goals = await service.list_goals(active_only=True)
 
     if not profile:
         raise HTTPException(
@@ -53,11 +56,11 @@ async def get_current_user_data(
 @router.get("/me/profile")
 async def get_profile(
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Get current user's profile."""
-    service = UserService(supabase, current_user["id"])
-    profile = service.get_profile()
+    service = AsyncUserService(supabase, current_user["id"])
+    profile = await service.get_profile()
 
     if not profile:
         raise HTTPException(
@@ -72,11 +75,11 @@ async def get_profile(
 async def update_profile(
     data: UserProfileUpdate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Update current user's profile."""
-    service = UserService(supabase, current_user["id"])
-    profile = service.update_profile(data)
+    service = AsyncUserService(supabase, current_user["id"])
+    profile = await service.update_profile(data)
 
     if not profile:
         raise HTTPException(
@@ -95,11 +98,11 @@ async def update_profile(
 @router.get("/me/settings")
 async def get_settings(
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Get current user's settings."""
-    service = UserService(supabase, current_user["id"])
-    settings = service.get_settings()
+    service = AsyncUserService(supabase, current_user["id"])
+    settings = await service.get_settings()
 
     if not settings:
         raise HTTPException(
@@ -114,11 +117,11 @@ async def get_settings(
 async def update_settings(
     data: UserSettingsUpdate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Update current user's settings."""
-    service = UserService(supabase, current_user["id"])
-    settings = service.update_settings(data)
+    service = AsyncUserService(supabase, current_user["id"])
+    settings = await service.update_settings(data)
 
     if not settings:
         raise HTTPException(
@@ -138,33 +141,45 @@ async def update_settings(
 async def list_goals(
     active_only: bool = False,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """List all goals for current user."""
-    service = UserService(supabase, current_user["id"])
-    return service.list_goals(active_only)
+    service = AsyncUserService(supabase, current_user["id"])
+    return await service.list_goals(active_only)
 
 
 @router.post("/me/goals", status_code=status.HTTP_201_CREATED)
 async def create_goal(
     data: UserGoalCreate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Create a new goal."""
-    service = UserService(supabase, current_user["id"])
-    return service.create_goal(data)
+    service = AsyncUserService(supabase, current_user["id"])
+    return await service.create_goal(data)
+
+
+@router.get("/me/goals/progress", response_model=GoalProgressReport)
+async def get_goal_progress(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    current_user: dict = Depends(get_current_user),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
+):
+    """Get daily hits, hit rate and runs for every active goal."""
+    service = AsyncUserService(supabase, current_user["id"])
+    return await service.get_goal_progress(start_date, end_date)
 
 
 @router.get("/me/goals/{goal_id}")
 async def get_goal(
     goal_id: str,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Get a specific goal by ID."""
-    service = UserService(supabase, current_user["id"])
-    goal = service.get_goal(goal_id)
+    service = AsyncUserService(supabase, current_user["id"])
+    goal = await service.get_goal(goal_id)
 
     if not goal:
         raise HTTPException(
@@ -180,11 +195,11 @@ async def update_goal(
     goal_id: str,
     data: UserGoalUpdate,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Update a goal."""
-    service = UserService(supabase, current_user["id"])
-    goal = service.update_goal(goal_id, data)
+    service = AsyncUserService(supabase, current_user["id"])
+    goal = await service.update_goal(goal_id, data)
 
     if not goal:
         raise HTTPException(
@@ -199,11 +214,11 @@ async def update_goal(
 async def delete_goal(
     goal_id: str,
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_user_supabase),
+    supabase: AsyncPostgrestClient = Depends(get_async_user_supabase),
 ):
     """Delete a goal."""
-    service = UserService(supabase, current_user["id"])
-    deleted = service.delete_goal(goal_id)
+    service = AsyncUserService(supabase, current_user["id"])
+    deleted = await service.delete_goal(goal_id)
 
     if not deleted:
         raise HTTPException(
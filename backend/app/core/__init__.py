@@ -1,12 +1,34 @@
-from .auth import get_current_user, get_user_supabase
+from .activity_store import ActivityStore, get_activity_store
+from .analytics_cache import AnalyticsCache, get_analytics_cache
+from .auth import get_async_user_supabase, get_current_user, get_user_supabase
 from .config import Settings, get_settings
-from .supabase import get_authenticated_supabase, get_supabase
+from .etag import conditional_response
+from .import_jobs import (
+    AsyncioImportJobRunner,
+    ImportJobRunner,
+    ImportJobStore,
+    get_import_job_runner,
+    get_import_job_store,
+)
+from .supabase import get_async_authenticated_supabase, get_authenticated_supabase, get_supabase
 
 
 __all__ = [
+    "ActivityStore",
+    "AnalyticsCache",
+    "AsyncioImportJobRunner",
+    "ImportJobRunner",
+    "ImportJobStore",
     "Settings",
+    "conditional_response",
+    "get_activity_store",
+    "get_analytics_cache",
+    "get_async_authenticated_supabase",
+    "get_async_user_supabase",
     "get_authenticated_supabase",
     "get_current_user",
+    "get_import_job_runner",
+    "get_import_job_store",
     "get_settings",
     "get_supabase",
     "get_user_supabase",
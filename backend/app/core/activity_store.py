@@ -0,0 +1,118 @@
+import threading
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from app.core.analytics_cache import (
+    AnalyticsCacheBackend,
+    InMemoryAnalyticsCacheBackend,
+    UserGenerations,
+)
+from app.core.config import get_settings
+
+
+class ActivityStore:
+    """Per-user activity bitmaps kept for the streak engine.
+
+    Unlike analytics results, a bitmap is patched in place on every write
+    rather than dropped, so it lives in its own backend where range
+    invalidation never reaches it. Values are JSON-compatible dicts, so any
+    ``AnalyticsCacheBackend`` works. With the in-process backend, a write
+    handled by another instance is not seen here, so the TTL bounds how long
+    a bitmap is trusted before it is rebuilt from the database. Patches do
+    not extend that lifetime.
+
+    Every patch bumps a per-user version (see ``UserGenerations``). A
+    rebuild records the version before reading the database and passes it to
+    ``set``; if a write landed in between, the rebuilt bitmap may miss it
+    and is not stored.
+
+    A rebuild can also record the ``data_version`` probed from the database.
+    A reader that passes a different one gets None and rebuilds, so a bitmap
+    that missed another instance's write is not trusted once the database
+    shows it. Patches drop the recorded data version.
+    """
+
+    KEY = "activity"
+
+    def __init__(self, backend: AnalyticsCacheBackend, ttl_seconds: float = 3600):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._versions = UserGenerations(backend)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, user_id: str, *, data_version: str | None = None) -> dict[str, Any] | None:
+        """Return the user's stored bitmap, or None (also when ``data_version`` differs)."""
+        if not self.enabled:
+            return None
+        entry = self.backend.get(user_id, self.KEY)
+        if entry is None:
+            return None
+        if data_version is not None and entry.get("data_version") != data_version:
+            return None
+        return entry["bitmap"]
+
+    def version(self, user_id: str) -> int:
+        """Return the user's write counter."""
+        return self._versions.current(user_id)
+
+    def set(
+        self,
+        user_id: str,
+        value: dict[str, Any],
+        *,
+        version: int | None = None,
+        data_version: str | None = None,
+    ) -> None:
+        """Store the user's bitmap unless it was written to since ``version``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if version is not None and version != self.version(user_id):
+                return
+            entry = {
+                "bitmap": value,
+                "expires_at": time.time() + self.ttl_seconds,
+                "data_version": data_version,
+            }
+            self.backend.set(user_id, self.KEY, entry, self.ttl_seconds)
+
+    def patch(self, user_id: str, update: Callable[[dict[str, Any]], dict[str, Any]]) -> None:
+        """Apply ``update`` to the stored bitmap, if there is one.
+
+        Without a stored bitmap there is nothing to patch; the next read
+        rebuilds it from the database, which already has the write.
+        """
+        with self._lock:
+            self._versions.bump(user_id)
+            entry = self.backend.get(user_id, self.KEY) if self.enabled else None
+            if entry is None:
+                return
+            remaining = entry["expires_at"] - time.time()
+            if remaining > 0:
+                entry = {"bitmap": update(entry["bitmap"]), "expires_at": entry["expires_at"]}
+                self.backend.set(user_id, self.KEY, entry, remaining)
+
+    def discard(self, user_id: str) -> None:
+        """Forget the user's bitmap so the next read rebuilds it."""
+        with self._lock:
+            self._versions.bump(user_id)
+            self.backend.delete(user_id, [self.KEY])
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+@lru_cache(1)
+def get_activity_store() -> ActivityStore:
+    """Get the process-wide activity bitmap store."""
+    settings = get_settings()
+    return ActivityStore(
+        InMemoryAnalyticsCacheBackend(max_entries=settings.activity_store_max_users),
+        ttl_seconds=settings.activity_store_ttl_seconds,
+    )
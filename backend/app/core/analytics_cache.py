@@ -0,0 +1,285 @@
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import date
+from functools import lru_cache
+from typing import Any
+
+from app.core.config import get_settings
+
+
+class AnalyticsCacheBackend(ABC):
+    """Storage interface for AnalyticsCache.
+
+    Entries are namespaced per user so invalidation only has to look at one
+    user's keys. Values are JSON-compatible (dicts, lists, numbers, strings),
+    so a shared store such as Redis can implement this by serializing them,
+    keeping a per-user key set, and using native expiry for the TTL.
+    """
+
+    @abstractmethod
+    def get(self, user_id: str, key: str) -> Any | None:
+        """Return the live value for ``key``, or None."""
+
+    @abstractmethod
+    def set(self, user_id: str, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store ``value`` for ``ttl_seconds``."""
+
+    @abstractmethod
+    def keys(self, user_id: str) -> list[str]:
+        """Return the keys currently stored for ``user_id``."""
+
+    @abstractmethod
+    def delete(self, user_id: str, keys: Iterable[str]) -> int:
+        """Remove ``keys`` for ``user_id`` and return how many existed."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+
+
+class InMemoryAnalyticsCacheBackend(AnalyticsCacheBackend):
+    """Process-local LRU backend bounded by ``max_entries``."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        # (user_id, key) -> (expires_at as monotonic seconds, value)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self._user_keys: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, user_id: str, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove((user_id, key))
+                return None
+            self._entries.move_to_end((user_id, key))
+            return value
+
+    def set(self, user_id: str, key: str, value: Any, ttl_seconds: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(user_id, key)] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end((user_id, key))
+            self._user_keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def keys(self, user_id: str) -> list[str]:
+        with self._lock:
+            return list(self._user_keys.get(user_id, ()))
+
+    def delete(self, user_id: str, keys: Iterable[str]) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if (user_id, key) in self._entries:
+                    self._remove((user_id, key))
+                    removed += 1
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, entry_key: tuple[str, str]) -> None:
+        # Caller holds the lock.
+        del self._entries[entry_key]
+        user_id, key = entry_key
+        user_keys = self._user_keys.get(user_id)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[user_id]
+
+
+class UserGenerations:
+    """Per-user write counters, kept only for users with stored entries.
+
+    A reader records ``current(user_id)`` before it reads the database and
+    only stores its result if the counter has not moved; every write calls
+    ``bump``. Stamps come from one process-wide clock. Each time the map has
+    doubled since the last sweep, users with nothing left in ``backend`` are
+    dropped and the counter of every untracked user is raised to the latest
+    stamp. A reader of a dropped user may then skip one store, but no reader
+    can miss a write, so the map stays bounded by the users with entries.
+    """
+
+    MIN_SWEEP = 64
+
+    def __init__(self, backend: AnalyticsCacheBackend):
+        self.backend = backend
+        self._stamps: dict[str, int] = {}
+        self._latest = 0
+        self._floor = 0
+        self._sweep_at = self.MIN_SWEEP
+        self._lock = threading.Lock()
+
+    def current(self, user_id: str) -> int:
+        """Return the user's counter."""
+        return self._stamps.get(user_id, self._floor)
+
+    def bump(self, user_id: str) -> None:
+        """Move the user's counter past every value handed out so far."""
+        with self._lock:
+            self._latest += 1
+            self._stamps[user_id] = self._latest
+            if len(self._stamps) >= self._sweep_at:
+                for stale in [u for u in self._stamps if not self.backend.keys(u)]:
+                    del self._stamps[stale]
+                self._floor = self._latest
+                self._sweep_at = max(2 * len(self._stamps), self.MIN_SWEEP)
+
+    def __len__(self) -> int:
+        return len(self._stamps)
+
+
+class AnalyticsCache:
+    """Cache of computed analytics results keyed by user, kind and date range.
+
+    Writes invalidate precisely: a routine or productivity row written on a
+    given day drops only the cached results whose range contains that day.
+    With the in-process backend, invalidation is local to the process, so the
+    TTL also bounds how stale another instance's copy can get.
+
+    Each invalidation bumps a per-user generation (see ``UserGenerations``).
+    A reader records the generation before computing and passes it to
+    ``set``; if a write landed in between, the possibly stale result is not
+    stored.
+
+    A reader that has probed the database for the data's version (see
+    ``AsyncVersionService``) passes it as ``version``. The version becomes part
+    of the key, so a result cached before a write on another instance is
+    not served under the newer version.
+    """
+
+    def __init__(self, backend: AnalyticsCacheBackend, ttl_seconds: float = 300):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._generations = UserGenerations(backend)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def key_for(kind: str, start_date: date, end_date: date, version: str | None = None) -> str:
+        if version is not None:
+            kind = f"{kind}@{hashlib.sha256(version.encode()).hexdigest()[:16]}"
+        return f"{kind}|{start_date.isoformat()}|{end_date.isoformat()}"
+
+    def get(
+        self,
+        user_id: str,
+        kind: str,
+        start_date: date,
+        end_date: date,
+        *,
+        version: str | None = None,
+    ) -> Any | None:
+        """Return the cached result, or None."""
+        if not self.enabled:
+            return None
+        value = self.backend.get(user_id, self.key_for(kind, start_date, end_date, version))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def generation(self, user_id: str) -> int:
+        """Return the user's invalidation counter."""
+        return self._generations.current(user_id)
+
+    def set(
+        self,
+        user_id: str,
+        kind: str,
+        start_date: date,
+        end_date: date,
+        value: Any,
+        *,
+        generation: int | None = None,
+        version: str | None = None,
+    ) -> None:
+        """Cache a JSON-compatible result unless the user was invalidated since ``generation``."""
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation(user_id):
+            return
+        key = self.key_for(kind, start_date, end_date, version)
+        self.backend.set(user_id, key, value, self.ttl_seconds)
+
+    def invalidate(self, user_id: str, days: Iterable[date | str]) -> int:
+        """Drop the user's results whose range contains any of ``days``."""
+        days = sorted({d.isoformat() if isinstance(d, date) else str(d)[:10] for d in days})
+        if not days:
+            return 0
+
+        self._generations.bump(user_id)
+        stale = []
+        for key in self.backend.keys(user_id):
+            _, start, end = key.rsplit("|", 2)
+            # ISO dates compare correctly as strings.
+            if any(start <= day <= end for day in days):
+                stale.append(key)
+        removed = self.backend.delete(user_id, stale)
+        self.invalidations += removed
+        return removed
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every cached result for the user."""
+        self._generations.bump(user_id)
+        removed = self.backend.delete(user_id, self.backend.keys(user_id))
+        self.invalidations += removed
+        return removed
+
+    def invalidate_rows(
+        self, user_id: str, rows: Iterable[dict], date_changed: bool = False
+    ) -> int:
+        """Invalidate after writing ``rows``.
+
+        When an update moved a row to another day, the previous day is not
+        known, so everything cached for the user is dropped.
+        """
+        if date_changed:
+            return self.invalidate_user(user_id)
+        return self.invalidate(user_id, [row["date"] for row in rows if row.get("date")])
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters for sizing the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+@lru_cache(1)
+def get_analytics_cache() -> AnalyticsCache:
+    """Get the process-wide analytics result cache."""
+    settings = get_settings()
+    return AnalyticsCache(
+        InMemoryAnalyticsCacheBackend(max_entries=settings.analytics_cache_max_entries),
+        ttl_seconds=settings.analytics_cache_ttl_seconds,
+    )
@@ -1,10 +1,18 @@
+import asyncio
 import logging
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
 from supabase import Client
 
-from app.core.supabase import get_authenticated_supabase, get_supabase
+from app.core.supabase import (
+    get_async_authenticated_supabase,
+    get_authenticated_supabase,
+    get_supabase,
+)
+from app.core.token_cache import get_token_cache
+from app.core.token_verifier import get_token_verifier
 
 
 logger = logging.getLogger("morning_routine")
@@ -12,6 +20,54 @@ logger = logging.getLogger("morning_routine")
 security = HTTPBearer()
 
 
+async def _verify_locally(token: str) -> dict | None:
+    """Verify the token in-process when local verification is enabled.
+
+    Returns the token claims, or None when the remote check should be used
+    instead (remote mode, or no key available for this token). Raises
+    ``jwt.InvalidTokenError`` for tokens that are definitely invalid.
+    """
+    verifier = get_token_verifier()
+    if verifier is None:
+        return None
+    if verifier.needs_network(token):
+        # Fetching the JWK Set is a blocking HTTP call; keep it off the event loop.
+        return await asyncio.to_thread(verifier.verify, token)
+    return verifier.verify(token)
+
+
+async def _validate_token(token: str, supabase: Client) -> dict:
+    """Validate a token locally if possible, otherwise with Supabase Auth."""
+    claims = await _verify_locally(token)
+    if claims is not None:
+        logger.info("AUTH success (local): user_id=%s", claims["sub"])
+        return {
+            "id": claims["sub"],
+            "email": claims.get("email"),
+            "user_metadata": claims.get("user_metadata", {}),
+            "access_token": token,
+        }
+
+    # Run the blocking HTTP call in a worker thread so concurrent requests
+    # waiting on the same token (see TokenCache.get_or_load) are not stalled.
+    user = await asyncio.to_thread(supabase.auth.get_user, token)
+
+    if not user or not user.user:
+        logger.warning("AUTH token valid but no user returned")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    logger.info("AUTH success: user_id=%s, email=%s", user.user.id, user.user.email)
+    return {
+        "id": user.user.id,
+        "email": user.user.email,
+        "user_metadata": user.user.user_metadata,
+        "access_token": token,  # Pass token for RLS
+    }
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     supabase: Client = Depends(get_supabase),
@@ -19,6 +75,9 @@ async def get_current_user(
     """
     Validate JWT token and return current user.
 
+    Validated tokens are cached (see ``TokenCache``), so repeated requests
+    with the same token within its lifetime skip verification entirely.
+
     Args:
         credentials: Bearer token from Authorization header
         supabase: Supabase client instance
@@ -30,29 +89,13 @@ async def get_current_user(
         HTTPException: If token is invalid or expired
     """
     try:
-        # Verify the JWT token with Supabase
         token = credentials.credentials
         logger.info(
             "AUTH validating token: length=%d, prefix=%s...",
             len(token),
             token[:20] if len(token) > 20 else token,
         )
-        user = supabase.auth.get_user(token)
-
-        if not user or not user.user:
-            logger.warning("AUTH token valid but no user returned")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-            )
-
-        logger.info("AUTH success: user_id=%s, email=%s", user.user.id, user.user.email)
-        return {
-            "id": user.user.id,
-            "email": user.user.email,
-            "user_metadata": user.user.user_metadata,
-            "access_token": token,  # Pass token for RLS
-        }
+        return await get_token_cache().get_or_load(token, lambda: _validate_token(token, supabase))
     except HTTPException:
         raise
     except Exception as e:
@@ -76,9 +119,19 @@ async def get_current_user(
 
 async def get_user_supabase(
     current_user: dict = Depends(get_current_user),
-) -> Client:
+) -> SyncPostgrestClient:
     """
-    Get a Supabase client authenticated with the current user's token.
+    Get a PostgREST client authenticated with the current user's token.
     This client respects RLS policies.
     """
     return get_authenticated_supabase(current_user["access_token"])
+
+
+async def get_async_user_supabase(
+    current_user: dict = Depends(get_current_user),
+) -> AsyncPostgrestClient:
+    """
+    Get an async PostgREST client authenticated with the current user's token.
+    This client respects RLS policies.
+    """
+    return get_async_authenticated_supabase(current_user["access_token"])
@@ -27,6 +27,73 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000"
     cors_origin_regex: str = r"https://.*\.vercel\.app"
 
+    # Auth - "remote" asks Supabase Auth to validate every token (one HTTP call
+    # per request); "local" checks signature, expiry and audience in-process
+    # using the JWT secret (HS256) or the project's JWKS (RS256/ES256), and
+    # only falls back to Supabase Auth when no key is available for a token.
+    auth_verification_mode: str = "remote"
+    supabase_jwt_secret: str = ""
+    supabase_jwt_audience: str = "authenticated"
+    jwks_cache_ttl_seconds: int = 600
+
+    # Validated-token cache - results are reused until this TTL or the
+    # token's own expiry, whichever is sooner. Set either to 0 to disable.
+    token_cache_max_entries: int = 1024
+    token_cache_ttl_seconds: int = 300
+    # How often the cache's hit/miss counters are logged (0 disables it).
+    token_cache_stats_interval_seconds: int = 300
+
+    # Connection pool shared by all user-scoped PostgREST requests.
+    http_pool_max_connections: int = 20
+    http_pool_max_keepalive: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+
+    # Analytics summary - "python" fetches the range and aggregates in the API;
+    # "database" calls the analytics_summary() Postgres function (requires
+    # database/migrations/003_analytics_summary_function.sql); "index" answers
+    # ranges within the last two years from the cached prefix-sum index.
+    analytics_summary_source: str = "python"
+    # Chart data - "tables" queries both source tables and merges by date;
+    # "rollup" reads the trigger-maintained user_daily_metrics table
+    # (requires database/migrations/004_user_daily_metrics_rollup.sql).
+    analytics_chart_source: str = "tables"
+
+    # Analytics result cache - summary and chart results per user and date
+    # range, dropped when a write touches a day in the range. Set either to 0
+    # to disable.
+    analytics_cache_max_entries: int = 512
+    analytics_cache_ttl_seconds: int = 300
+
+    # Streak engine - per-user activity bitmaps, patched on every write and
+    # rebuilt from the database after the TTL. Set either to 0 to disable.
+    activity_store_max_users: int = 10000
+    activity_store_ttl_seconds: int = 3600
+
+    # CSV import - rows per bulk insert request. A failing batch is retried in
+    # halves, so a bad row costs about log2(batch size) extra requests.
+    import_batch_size: int = 500
+    # Rows parsed per chunk; each chunk is written before the next is read, so
+    # this bounds import memory whatever the file size.
+    import_chunk_rows: int = 5000
+    # Background imports (?background=true) - job state and uploads are kept as
+    # files in this directory (default: <tmp>/morning-routine-import-jobs), and
+    # this many jobs run at once in the in-process worker. Jobs not updated for
+    # the TTL are deleted when a new job is created (0 keeps them forever).
+    # The worker and the files only outlive the request on a long-lived server;
+    # template.yaml turns background imports off on Lambda.
+    import_background_jobs: bool = True
+    import_job_dir: str = ""
+    import_job_workers: int = 1
+    import_job_ttl_seconds: int = 86400
+
+    # Weekly summary job - opted-in users per page. Their ids are sent in the
+    # URL of the row queries, so large pages can exceed proxy URL limits.
+    weekly_summary_user_page_size: int = 100
+
+    def get_jwks_url(self) -> str:
+        """Return the Supabase Auth JWKS endpoint for this project."""
+        return f"{self.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+
     def get_cors_origins_list(self) -> list[str]:
         """Parse CORS origins string into a list of origin URLs.
 
@@ -0,0 +1,39 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+# Responses are per user and must be revalidated before every reuse.
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: object) -> str:
+    """Build a weak ETag from the parts that identify a representation."""
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether ``If-None-Match`` matches ``etag`` under weak comparison (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_response(request: Request, response: Response, *parts: object) -> Response | None:
+    """Answer a conditional GET before the real work is done.
+
+    The ETag covers the path, the query parameters and ``parts`` (the user
+    and a data version). Returns a 304 response when the client's
+    ``If-None-Match`` already matches. Otherwise it sets the ETag on
+    ``response`` and returns None, and the route builds the body as usual.
+    """
+    etag = weak_etag(request.url.path, sorted(request.query_params.multi_items()), *parts)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
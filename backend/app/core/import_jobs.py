@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.models import ImportJob
+
+
+logger = logging.getLogger("morning_routine")
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class ImportJobStore:
+    """Background import jobs persisted as one JSON file each under ``directory``.
+
+    Each file holds the owning user id and the job. Writes go to a temporary
+    file that is then renamed over the old one, so a reader never sees a
+    half-written job. The uploaded CSV is copied next to the job file until
+    the job has run. The files live on local disk, so the job can only be
+    polled on the instance that accepted it; a shared store (a database
+    table, S3) can replace this class with the same methods.
+
+    Jobs whose file has not been written for ``ttl_seconds`` are deleted,
+    with their upload, whenever a job is created. A running job is saved
+    after every chunk, so this only removes finished jobs and ones that
+    were lost in a restart.
+    """
+
+    def __init__(self, directory: str | Path, *, ttl_seconds: int = 0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def create(self, user_id: str, filename: str, on_conflict: str) -> ImportJob:
+        """Record a new queued job, after pruning expired ones."""
+        self.prune()
+        job = ImportJob(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            on_conflict=on_conflict,
+            created_at=datetime.now(UTC),
+        )
+        self.save(user_id, job)
+        return job
+
+    def get(self, user_id: str, job_id: str) -> ImportJob | None:
+        """Return the job if it exists and belongs to ``user_id``."""
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            data = json.loads(self._job_path(job_id).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        if data["user_id"] != user_id:
+            return None
+        return ImportJob.model_validate(data["job"])
+
+    def save(self, user_id: str, job: ImportJob) -> None:
+        """Write the job's current state."""
+        path = self._job_path(job.id)
+        data = json.dumps({"user_id": user_id, "job": job.model_dump(mode="json")})
+        with self._lock:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, path)
+
+    def prune(self) -> int:
+        """Delete jobs not written for ``ttl_seconds``; returns how many."""
+        if self.ttl_seconds <= 0:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        with self._lock:
+            for path in self.directory.glob("*.json"):
+                try:
+                    if path.stat().st_mtime >= cutoff:
+                        continue
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                self.upload_path(path.stem).unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def upload_path(self, job_id: str) -> Path:
+        """Where the job's CSV is kept until it has been imported."""
+        return self.directory / f"{job_id}.csv"
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+
+class ImportJobRunner(ABC):
+    """Executes background import jobs.
+
+    A job is handed over as a blocking callable that does the whole import
+    and records its progress in the ``ImportJobStore``. A runner only
+    decides where and when it runs, so a thread pool or a queue consumer can
+    replace the in-process one.
+    """
+
+    @abstractmethod
+    def submit(self, task: Callable[[], None]) -> None:
+        """Schedule ``task`` and return without waiting for it."""
+
+
+class AsyncioImportJobRunner(ImportJobRunner):
+    """In-process runner: ``workers`` asyncio tasks drain a queue of jobs.
+
+    Each job runs in the default thread pool, so a long import does not
+    block the event loop that serves requests. The queue and workers are
+    created on the running loop at the first ``submit``, and again if that
+    loop has changed since. Jobs still queued when the process exits are
+    lost; their stored status stays ``queued``.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = max(workers, 1)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[Callable[[], None]] | None = None
+        # Keeps the worker tasks referenced so they are not garbage collected.
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, task: Callable[[], None]) -> None:
+        """Queue ``task``; must be called from a coroutine on the serving loop."""
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop, self._queue = loop, asyncio.Queue()
+            self._tasks = {loop.create_task(self._work(self._queue)) for _ in range(self.workers)}
+        self._queue.put_nowait(task)
+
+    async def join(self) -> None:
+        """Wait until every submitted job has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    @staticmethod
+    async def _work(queue: asyncio.Queue[Callable[[], None]]) -> None:
+        while True:
+            task = await queue.get()
+            try:
+                await asyncio.to_thread(task)
+            except Exception:
+                logger.exception("Import job crashed")
+            finally:
+                queue.task_done()
+
+
+@lru_cache(1)
+def get_import_job_store() -> ImportJobStore:
+    """Get the process-wide import job store."""
+    settings = get_settings()
+    return ImportJobStore(
+        settings.import_job_dir or Path(tempfile.gettempdir()) / "morning-routine-import-jobs",
+        ttl_seconds=settings.import_job_ttl_seconds,
+    )
+
+
+@lru_cache(1)
+def get_import_job_runner() -> ImportJobRunner:
+    """Get the process-wide import job runner."""
+    return AsyncioImportJobRunner(workers=get_settings().import_job_workers)
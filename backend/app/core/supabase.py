@@ -1,3 +1,10 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_TIMEOUT
 from supabase import Client, create_client
 
 from app.core.config import get_settings
@@ -8,17 +15,94 @@ settings = get_settings()
 # Service client (for admin operations that bypass RLS)
 supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
 
+# Shared HTTP transport for user-scoped PostgREST requests. Creating a full
+# Client per request meant a new connection pool (and TLS handshake) every
+# time; instead every user client reuses this pool and only carries its own
+# headers, which PostgREST sends with each request.
+_http_client: httpx.Client | None = None
+_http_client_lock = threading.Lock()
+
+# Async transports are bound to the event loop that created them, so keep one
+# per loop (uvicorn and Mangum each run a single long-lived loop).
+_async_http_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def get_supabase() -> Client:
     """Get Supabase client instance (service key - bypasses RLS)."""
     return supabase
 
 
-def get_authenticated_supabase(access_token: str) -> Client:
+def get_http_client() -> httpx.Client:
+    """Get the pooled keep-alive HTTP client shared by user-scoped clients."""
+    global _http_client  # noqa: PLW0603
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    http2=True,
+                    follow_redirects=True,
+                    timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+                    limits=_pool_limits(),
+                )
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the pooled keep-alive async HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+            limits=_pool_limits(),
+        )
+        _async_http_clients[loop] = client
+    return client
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_pool_max_connections,
+        max_keepalive_connections=settings.http_pool_max_keepalive,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+
+
+def _user_headers(access_token: str) -> dict[str, str]:
+    return {
+        "apikey": settings.supabase_key,
+        "Authorization": f"Bearer {access_token}",
+    }
+
+
+def get_authenticated_supabase(access_token: str) -> SyncPostgrestClient:
     """
-    Get a Supabase client authenticated with the user's JWT token.
+    Get a PostgREST client authenticated with the user's JWT token.
     This client respects RLS policies based on auth.uid().
+
+    The client is only a set of headers on top of the shared connection
+    pool, so building one per request is cheap.
     """
-    client = create_client(settings.supabase_url, settings.supabase_key)
-    client.postgrest.auth(access_token)
-    return client
+    return SyncPostgrestClient(
+        str(supabase.rest_url),
+        headers=_user_headers(access_token),
+        http_client=get_http_client(),
+    )
+
+
+def get_async_authenticated_supabase(access_token: str) -> AsyncPostgrestClient:
+    """
+    Get an async PostgREST client authenticated with the user's JWT token.
+
+    Queries are awaited rather than blocking, so one slow request does not
+    stall the event loop for every other in-flight request.
+    """
+    return AsyncPostgrestClient(
+        str(supabase.rest_url),
+        headers=_user_headers(access_token),
+        http_client=get_async_http_client(),
+    )
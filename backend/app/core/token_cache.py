@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import lru_cache, partial
+from typing import Any
+
+import jwt
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger("morning_routine")
+
+
+def _token_expiry(token: str) -> float | None:
+    """Read the ``exp`` claim without verifying the token.
+
+    Only used to bound how long an already-validated result may be reused,
+    so skipping signature verification here is safe.
+    """
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    exp = claims.get("exp")
+    return float(exp) if isinstance(exp, int | float) else None
+
+
+class TokenCache:
+    """Bounded LRU cache of validated tokens with singleflight loading.
+
+    Entries are keyed by a SHA-256 of the token (the raw token is never used
+    as a key) and expire after ``ttl_seconds`` or at the token's own ``exp``,
+    whichever comes first. Concurrent lookups of the same uncached token
+    share a single in-flight validation.
+
+    Every ``stats_interval_seconds`` (0 disables it), the next lookup logs
+    ``stats()``, hit rate included, so the cache can be sized from the logs
+    without a line per request.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300,
+        stats_interval_seconds: float = 0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats_interval_seconds = stats_interval_seconds
+        self._next_stats_at = time.monotonic() + stats_interval_seconds
+        # key -> (expires_at as wall-clock seconds, user dict)
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[dict]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        """Return the cached user for ``token``, or None."""
+        user = self._lookup(self.key_for(token))
+        self._maybe_log_stats()
+        return user
+
+    def _lookup(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def _maybe_log_stats(self) -> None:
+        if self.stats_interval_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_stats_at:
+                return
+            self._next_stats_at = now + self.stats_interval_seconds
+        logger.info("AUTH token cache: %s", self.stats())
+
+    def set(self, token: str, user: dict) -> None:
+        """Cache ``user`` for ``token`` until the TTL or token expiry."""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        token_exp = _token_expiry(token)
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+
+        key = self.key_for(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_load(self, token: str, load: Callable[[], Awaitable[dict]]) -> dict:
+        """Return the cached user, or run ``load`` once for all concurrent callers.
+
+        The load runs in its own task, so a caller that is cancelled does not
+        cancel the validation other callers are waiting on. Errors propagate
+        to every waiter and are never cached.
+        """
+        user = self.get(token)
+        if user is not None:
+            return user
+
+        key = self.key_for(token)
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._load(token, load))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._forget, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future[dict]) -> None:
+        # A caller on another event loop may have replaced this load; keep its task.
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _load(self, token: str, load: Callable[[], Awaitable[dict]]) -> dict:
+        user = await load()
+        self.set(token, user)
+        return user
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return counters for sizing the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "coalesced": self.coalesced,
+        }
+
+
+@lru_cache(1)
+def get_token_cache() -> TokenCache:
+    """Get the process-wide validated-token cache."""
+    settings = get_settings()
+    return TokenCache(
+        max_entries=settings.token_cache_max_entries,
+        ttl_seconds=settings.token_cache_ttl_seconds,
+        stats_interval_seconds=settings.token_cache_stats_interval_seconds,
+    )
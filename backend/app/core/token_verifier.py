@@ -0,0 +1,203 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+import httpx
+import jwt
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger("morning_routine")
+
+# Algorithms Supabase Auth signs access tokens with. HS256 uses the project's
+# shared JWT secret; the asymmetric ones are published in the JWKS endpoint.
+SYMMETRIC_ALGORITHMS = frozenset({"HS256"})
+ASYMMETRIC_ALGORITHMS = frozenset({"RS256", "ES256"})
+
+
+def _fetch_jwks(url: str) -> dict[str, Any]:
+    """Download a JWK Set document."""
+    response = httpx.get(url, timeout=5.0)
+    response.raise_for_status()
+    return response.json()
+
+
+class JWKSCache:
+    """Cached JWK Set with stale-while-revalidate refreshing.
+
+    ``prefetch`` starts loading the key set in the background. A lookup
+    before any key set has loaded fetches it synchronously. After that,
+    lookups never wait on the network while the cache is merely stale: a
+    daemon thread refreshes it and the current keys keep being served. An
+    unknown ``kid`` (key rotation) triggers one synchronous refresh, rate
+    limited by ``min_refresh_interval`` so forged tokens cannot hammer the
+    endpoint. ``needs_fetch`` tells async callers when a lookup would block,
+    so they can run it in a thread.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: float = 600,
+        min_refresh_interval: float = 30,
+        fetch: Callable[[str], dict[str, Any]] = _fetch_jwks,
+    ):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_interval = min_refresh_interval
+        self._fetch = fetch
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._fetched_at: float | None = None
+        self._last_attempt: float | None = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get_signing_key(self, kid: str | None) -> jwt.PyJWK | None:
+        """Return the key matching ``kid``, or None if it is not known."""
+        now = time.monotonic()
+        if self._fetched_at is None:
+            if self._can_attempt(now):
+                self.refresh()
+        elif now - self._fetched_at > self.ttl_seconds:
+            self._refresh_in_background()
+
+        key = self._lookup(kid)
+        if key is None and self._fetched_at is not None and self._can_attempt(now):
+            self.refresh()
+            key = self._lookup(kid)
+        return key
+
+    def needs_fetch(self, kid: str | None) -> bool:
+        """Whether ``get_signing_key(kid)`` would fetch the key set before returning."""
+        if not self._can_attempt(time.monotonic()):
+            return False
+        return self._fetched_at is None or self._lookup(kid) is None
+
+    def prefetch(self) -> None:
+        """Load the key set in the background so the first request need not wait."""
+        self._refresh_in_background()
+
+    def refresh(self) -> bool:
+        """Fetch the key set now. Returns False if the fetch failed."""
+        self._last_attempt = time.monotonic()
+        try:
+            document = self._fetch(self.url)
+            keys = {
+                k.key_id: k for k in jwt.PyJWKSet.from_dict(document).keys if k.key_id is not None
+            }
+        except jwt.PyJWKSetError:
+            # Projects that only use the shared secret publish an empty set.
+            keys = {}
+        except Exception as e:
+            logger.warning("JWKS refresh failed: %s: %s", type(e).__name__, e)
+            return False
+
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+        return True
+
+    def _lookup(self, kid: str | None) -> jwt.PyJWK | None:
+        with self._lock:
+            if kid is None:
+                # Tokens without a kid are only unambiguous for single-key sets.
+                return next(iter(self._keys.values())) if len(self._keys) == 1 else None
+            return self._keys.get(kid)
+
+    def _can_attempt(self, now: float) -> bool:
+        return self._last_attempt is None or now - self._last_attempt >= self.min_refresh_interval
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run() -> None:
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="jwks-refresh", daemon=True).start()
+
+
+class LocalTokenVerifier:
+    """Verify Supabase access tokens in-process.
+
+    ``verify`` returns the token claims when the signature, expiry and
+    audience check out, raises ``jwt.InvalidTokenError`` when the token is
+    definitely bad, and returns None when no key is available to decide —
+    callers then fall back to asking Supabase Auth.
+    """
+
+    def __init__(
+        self,
+        jwt_secret: str = "",
+        audience: str = "authenticated",
+        jwks: JWKSCache | None = None,
+        leeway_seconds: float = 0,
+    ):
+        self.jwt_secret = jwt_secret
+        self.audience = audience
+        self.jwks = jwks
+        self.leeway_seconds = leeway_seconds
+
+    def needs_network(self, token: str) -> bool:
+        """Whether ``verify(token)`` would block on fetching the JWK Set."""
+        header = jwt.get_unverified_header(token)
+        return (
+            header.get("alg") in ASYMMETRIC_ALGORITHMS
+            and self.jwks is not None
+            and self.jwks.needs_fetch(header.get("kid"))
+        )
+
+    def verify(self, token: str) -> dict[str, Any] | None:
+        """Verify a token locally, or return None if it cannot be decided."""
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+
+        key: Any
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            if not self.jwt_secret:
+                return None
+            key = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            if self.jwks is None:
+                return None
+            key = self.jwks.get_signing_key(header.get("kid"))
+            if key is None:
+                return None
+        else:
+            return None
+
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            leeway=self.leeway_seconds,
+            options={"require": ["exp", "sub"]},
+        )
+
+
+@lru_cache(1)
+def get_token_verifier() -> LocalTokenVerifier | None:
+    """Get the process-wide local verifier, or None in remote mode."""
+    settings = get_settings()
+    if settings.auth_verification_mode != "local":
+        return None
+    jwks = JWKSCache(settings.get_jwks_url(), ttl_seconds=settings.jwks_cache_ttl_seconds)
+    # Created on the first authenticated request; start loading the key set
+    # right away so later requests find it ready.
+    jwks.prefetch()
+    return LocalTokenVerifier(
+        jwt_secret=settings.supabase_jwt_secret,
+        audience=settings.supabase_jwt_audience,
+        jwks=jwks,
+    )
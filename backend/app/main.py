@@ -58,6 +58,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the ETag for If-None-Match revalidation.
+    expose_headers=["ETag"],
 )
 
 # Include API routes
@@ -1,8 +1,24 @@
-from .common import AnalyticsSummary, ChartDataPoint, CSVImportResult, PaginatedResponse
+from .common import (
+    AnalyticsDashboard,
+    AnalyticsSummary,
+    CalendarHeatmap,
+    ChartDataPoint,
+    ChartSeries,
+    CorrelationMatrix,
+    CSVImportResult,
+    ImportJob,
+    LaggedCorrelations,
+    MetricTrend,
+    PaginatedResponse,
+    StreakStats,
+    TrendReport,
+)
 from .productivity import Productivity, ProductivityCreate, ProductivityUpdate
 from .routine import MorningRoutine, MorningRoutineCreate, MorningRoutineUpdate
 from .user import (
     CurrentUser,
+    GoalProgress,
+    GoalProgressReport,
     UserGoal,
     UserGoalCreate,
     UserGoalUpdate,
@@ -15,10 +31,19 @@ from .user import (
 
 
 __all__ = [
+    "AnalyticsDashboard",
     "AnalyticsSummary",
     "CSVImportResult",
+    "CalendarHeatmap",
     "ChartDataPoint",
+    "ChartSeries",
+    "CorrelationMatrix",
     "CurrentUser",
+    "GoalProgress",
+    "GoalProgressReport",
+    "ImportJob",
+    "LaggedCorrelations",
+    "MetricTrend",
     "MorningRoutine",
     "MorningRoutineCreate",
     "MorningRoutineUpdate",
@@ -26,6 +51,8 @@ __all__ = [
     "Productivity",
     "ProductivityCreate",
     "ProductivityUpdate",
+    "StreakStats",
+    "TrendReport",
     "UserGoal",
     "UserGoalCreate",
     "UserGoalUpdate",
@@ -1,4 +1,5 @@
-from typing import Generic, TypeVar
+from datetime import datetime
+from typing import Generic, Literal, TypeVar
 
 from pydantic import BaseModel
 
@@ -42,10 +43,123 @@ class ChartDataPoint(BaseModel):
     meditation_minutes: int | None = None
 
 
+class ChartSeries(BaseModel):
+    """Columnar chart data: one array per field, aligned by index with ``dates``."""
+
+    dates: list[str]
+    productivity_score: list[float | None]
+    energy_level: list[float | None]
+    morning_mood: list[float | None]
+    sleep_duration_hours: list[float | None]
+    exercise_minutes: list[int | None]
+    meditation_minutes: list[int | None]
+
+
+class CorrelationMatrix(BaseModel):
+    """Pearson correlations of routine metrics (rows) with productivity metrics (columns)."""
+
+    routine_metrics: list[str]
+    productivity_metrics: list[str]
+    coefficients: list[list[float | None]]  # None when undefined or too few samples
+    sample_counts: list[list[int]]  # days on which both metrics were logged
+    total_days: int
+
+
+class LaggedCorrelations(BaseModel):
+    """Correlations of routine metrics on day t - lag with productivity on day t.
+
+    ``coefficients`` and ``sample_counts`` are indexed ``[lag][routine][productivity]``.
+    """
+
+    routine_metrics: list[str]
+    productivity_metrics: list[str]
+    lags: list[int]
+    coefficients: list[list[list[float | None]]]
+    sample_counts: list[list[list[int]]]
+    total_days: int
+
+
+class MetricTrend(BaseModel):
+    """Average of one metric over the last ``window_days`` days vs the window before."""
+
+    metric: str
+    window_days: int
+    current_avg: float | None
+    previous_avg: float | None
+    current_count: int
+    previous_count: int
+    direction: str  # "up", "down", "stable"
+
+
+class TrendReport(BaseModel):
+    """Multi-window trends ending on ``as_of``."""
+
+    as_of: str
+    trends: list[MetricTrend]
+
+
+class StreakStats(BaseModel):
+    """Consecutive-day logging streaks; a day counts if it has a routine or productivity entry."""
+
+    current_streak: int
+    longest_streak: int
+    longest_streak_start: str | None = None
+    longest_streak_end: str | None = None
+    days_logged: int
+    first_logged: str | None = None
+    last_logged: str | None = None
+    gap_count: int = 0  # runs of unlogged days between the first and last logged day
+    longest_gap: int = 0
+
+
+class CalendarHeatmap(BaseModel):
+    """One calendar year as arrays indexed by day of year (0 = 1 January).
+
+    ``logged`` is 1 on days with any entry; metric arrays hold 0 where no value was logged.
+    """
+
+    year: int
+    days: int
+    logged: list[int]
+    productivity_score: list[int]
+    energy_level: list[int]
+    morning_mood: list[int]
+
+
+class AnalyticsDashboard(BaseModel):
+    """Dashboard payload; sections that were not requested are None."""
+
+    summary: AnalyticsSummary | None = None
+    charts: list[ChartDataPoint] | None = None
+
+
 class CSVImportResult(BaseModel):
     """Result of CSV import operation."""
 
     success: bool
     imported_count: int
+    skipped_count: int = 0  # rows left alone under on_conflict=skip
     failed_count: int
     errors: list[str]
+    batches_sent: int = 0
+    elapsed_seconds: float = 0.0
+
+
+class ImportJob(BaseModel):
+    """Status and progress of a background CSV import."""
+
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed"] = "queued"
+    filename: str
+    on_conflict: str
+    rows_parsed: int = 0
+    imported_count: int = 0
+    skipped_count: int = 0
+    failed_count: int = 0
+    rows_per_second: float = 0.0
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    result: CSVImportResult | None = None  # set once the job has succeeded
+    error: str | None = None  # set when the job failed as a whole
+    warning: str | None = None  # set when a succeeded job's follow-up refresh failed
@@ -4,11 +4,15 @@ from typing import Literal
 from pydantic import BaseModel, ConfigDict, Field
 
 
+# HH:MM, with the optional :SS that Postgres TIME values are returned with.
+WAKE_TIME_PATTERN = r"^([01]\d|2[0-3]):[0-5]\d(:[0-5]\d)?$"
+
+
 class MorningRoutineBase(BaseModel):
     """Base model for morning routine data."""
 
     date: date
-    wake_time: str = Field(..., description="Wake time in HH:MM format")
+    wake_time: str = Field(..., description="Wake time in HH:MM format", pattern=WAKE_TIME_PATTERN)
     sleep_duration_hours: float = Field(..., ge=0, le=24)
     exercise_minutes: int = Field(default=0, ge=0)
     meditation_minutes: int = Field(default=0, ge=0)
@@ -28,7 +32,7 @@ class MorningRoutineCreate(MorningRoutineBase):
 class MorningRoutineUpdate(BaseModel):
     """Model for updating a morning routine entry."""
 
-    wake_time: str | None = None
+    wake_time: str | None = Field(default=None, pattern=WAKE_TIME_PATTERN)
     sleep_duration_hours: float | None = Field(default=None, ge=0, le=24)
     exercise_minutes: int | None = Field(default=None, ge=0)
     meditation_minutes: int | None = Field(default=None, ge=0)
@@ -192,6 +192,30 @@ class UserGoal(UserGoalBase):
     updated_at: datetime
 
 
+class GoalProgress(BaseModel):
+    """Adherence to one goal over a date range."""
+
+    goal_id: str
+    goal_type: GoalType
+    target_value: float
+    direction: Literal["at_least", "at_most"]
+    days_logged: int  # days with a value for the goal's metric
+    days_hit: int
+    hit_rate: float | None  # days_hit / days_logged; None when nothing was logged
+    current_run: int
+    longest_run: int
+    daily: list[bool | None]  # hit/miss per day from start_date; None when not logged
+
+
+class GoalProgressReport(BaseModel):
+    """Progress of every active goal over the same date range."""
+
+    start_date: str
+    end_date: str
+    days: int
+    goals: list[GoalProgress]
+
+
 # ============================================
 # COMBINED USER DATA MODEL
 # ============================================
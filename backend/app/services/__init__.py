@@ -1,7 +1,20 @@
-from .analytics_service import AnalyticsService
-from .productivity_service import ProductivityService
-from .routine_service import RoutineService
-from .user_service import UserService
+from .analytics_service import AsyncAnalyticsService
+from .productivity_service import AsyncProductivityService, ProductivityService
+from .routine_service import AsyncRoutineService, RoutineService
+from .streak_service import AsyncStreakService, StreakService
+from .user_service import AsyncUserService, UserService
+from .version_service import AsyncVersionService
 
 
-__all__ = ["AnalyticsService", "ProductivityService", "RoutineService", "UserService"]
+__all__ = [
+    "AsyncAnalyticsService",
+    "AsyncProductivityService",
+    "AsyncRoutineService",
+    "AsyncStreakService",
+    "AsyncUserService",
+    "AsyncVersionService",
+    "ProductivityService",
+    "RoutineService",
+    "StreakService",
+    "UserService",
+]
@@ -1,162 +1,647 @@
+from collections.abc import Collection
 from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any
 
-from supabase import Client
+from postgrest import AsyncPostgrestClient
 
-from app.models import AnalyticsSummary, ChartDataPoint
+from app.models import (
+    AnalyticsDashboard,
+    AnalyticsSummary,
+    CalendarHeatmap,
+    ChartDataPoint,
+    ChartSeries,
+    CorrelationMatrix,
+    LaggedCorrelations,
+    TrendReport,
+)
+from app.services.concurrency import gather_queries
+from app.services.correlations import (
+    CORRELATION_PRODUCTIVITY_COLUMNS,
+    CORRELATION_ROUTINE_COLUMNS,
+    MAX_LAG,
+    build_correlations,
+    build_lagged_correlations,
+)
+from app.services.downsampling import CHART_METRICS, DEFAULT_MAX_POINTS, downsample_chart_rows
+from app.services.heatmap import (
+    HEATMAP_PRODUCTIVITY_COLUMNS,
+    HEATMAP_ROLLUP_COLUMNS,
+    HEATMAP_ROUTINE_COLUMNS,
+    build_heatmap,
+    year_bounds,
+)
+from app.services.metric_index import (
+    MetricPrefixIndex,
+    index_window,
+    mean_of_hundredths,
+    to_hundredths,
+    trend_direction,
+)
 
 
-class AnalyticsService:
-    """Service for computing analytics and chart data."""
+if TYPE_CHECKING:
+    from app.core.analytics_cache import AnalyticsCache
 
-    def __init__(self, supabase: Client, user_id: str):
+
+# Only the columns each computation reads are fetched.
+SUMMARY_ROUTINE_COLUMNS = "sleep_duration_hours, exercise_minutes, morning_mood"
+SUMMARY_PRODUCTIVITY_COLUMNS = "date, productivity_score, energy_level"
+CHART_ROUTINE_COLUMNS = (
+    "date, sleep_duration_hours, exercise_minutes, meditation_minutes, morning_mood"
+)
+CHART_PRODUCTIVITY_COLUMNS = "date, productivity_score, energy_level"
+CHART_ROLLUP_COLUMNS = (
+    "date, productivity_score, energy_level, morning_mood, "
+    "sleep_duration_hours, exercise_minutes, meditation_minutes"
+)
+
+DASHBOARD_SECTIONS = ("summary", "charts")
+
+
+def resolve_date_range(start_date: date | None, end_date: date | None) -> tuple[date, date]:
+    """Fill in missing range bounds (default: the last 30 days)."""
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    return start_date, end_date
+
+
+class SummaryAggregator:
+    """One-pass accumulator for AnalyticsSummary.
+
+    Every average, the best/worst day and the half-window trend are updated
+    per row, so each fetched row is touched exactly once. Productivity rows
+    must be added in date order for the trend. The trend keeps a running
+    prefix sum of scores so the first-half total is an O(1) lookup once the
+    final row count (and therefore the midpoint) is known. Totals are exact
+    integer hundredths, as in ``MetricPrefixIndex``, so both give the same
+    averages.
+    """
+
+    def __init__(self):
+        self.routine_count = 0
+        self.sleep_total = 0
+        self.exercise_total = 0
+        self.mood_total = 0
+
+        self.productivity_count = 0
+        self.productivity_total = 0
+        self.energy_total = 0
+        self.best: tuple[float, str] | None = None
+        self.worst: tuple[float, str] | None = None
+        self._score_prefix: list[int] = []
+
+    def add_routine(self, row: dict) -> None:
+        """Fold one morning routine row into the running totals."""
+        self.routine_count += 1
+        self.sleep_total += to_hundredths(row["sleep_duration_hours"])
+        self.exercise_total += to_hundredths(row["exercise_minutes"])
+        self.mood_total += to_hundredths(row["morning_mood"])
+
+    def add_productivity(self, row: dict) -> None:
+        """Fold one productivity row into the running totals."""
+        score = row["productivity_score"]
+        self.productivity_count += 1
+        self.productivity_total += to_hundredths(score)
+        self.energy_total += to_hundredths(row["energy_level"])
+        self._score_prefix.append(self.productivity_total)
+
+        # Strict comparisons keep the earliest date on ties.
+        if self.best is None or score > self.best[0]:
+            self.best = (score, row["date"])
+        if self.worst is None or score < self.worst[0]:
+            self.worst = (score, row["date"])
+
+    def trend(self) -> str:
+        """Compare the average score of the first and second half of the range."""
+        n = self.productivity_count
+        if n < 4:
+            return "stable"
+        mid = n // 2
+        first_half_sum = self._score_prefix[mid - 1]
+        first_half_avg = first_half_sum / mid
+        second_half_avg = (self.productivity_total - first_half_sum) / (n - mid)
+        return trend_direction(first_half_avg, second_half_avg)
+
+    def result(self) -> AnalyticsSummary:
+        """Build the summary from the accumulated totals."""
+        routines = self.routine_count
+        productivity = self.productivity_count
+        return AnalyticsSummary(
+            avg_productivity=mean_of_hundredths(self.productivity_total, productivity)
+            if productivity
+            else 0,
+            avg_sleep=mean_of_hundredths(self.sleep_total, routines) if routines else 0,
+            avg_exercise=mean_of_hundredths(self.exercise_total, routines) if routines else 0,
+            avg_mood=mean_of_hundredths(self.mood_total, routines) if routines else 0,
+            avg_energy=mean_of_hundredths(self.energy_total, productivity) if productivity else 0,
+            total_entries=productivity,
+            best_day=self.best[1] if self.best else None,
+            worst_day=self.worst[1] if self.worst else None,
+            productivity_trend=self.trend(),
+        )
+
+
+def build_summary(routines: list[dict], productivity: list[dict]) -> AnalyticsSummary:
+    """Aggregate fetched rows into an AnalyticsSummary in a single sweep.
+
+    ``productivity`` must be ordered by date for the trend calculation.
+    """
+    aggregator = SummaryAggregator()
+    for row in routines:
+        aggregator.add_routine(row)
+    for row in productivity:
+        aggregator.add_productivity(row)
+    return aggregator.result()
+
+
+def summary_from_rpc(rows: list[dict] | dict | None) -> AnalyticsSummary:
+    """Convert the ``analytics_summary`` RPC result into an AnalyticsSummary."""
+    if isinstance(rows, list):
+        rows = rows[0] if rows else None
+    if not rows:
+        return build_summary([], [])
+    return AnalyticsSummary.model_validate(rows)
+
+
+def merge_chart_rows(routines: list[dict], productivity: list[dict]) -> list[dict]:
+    """Merge routine and productivity rows into one date-ordered row per date."""
+    routines_by_date = {r["date"]: r for r in routines}
+    productivity_by_date = {p["date"]: p for p in productivity}
+
+    all_dates = sorted(set(routines_by_date.keys()) | set(productivity_by_date.keys()))
+
+    rows = []
+    for d in all_dates:
+        routine = routines_by_date.get(d, {})
+        prod = productivity_by_date.get(d, {})
+
+        rows.append(
+            {
+                "date": d,
+                "productivity_score": prod.get("productivity_score"),
+                "energy_level": prod.get("energy_level"),
+                "morning_mood": routine.get("morning_mood"),
+                "sleep_duration_hours": routine.get("sleep_duration_hours"),
+                "exercise_minutes": routine.get("exercise_minutes"),
+                "meditation_minutes": routine.get("meditation_minutes"),
+            }
+        )
+
+    return rows
+
+
+def build_chart_rows(
+    routines: list[dict],
+    productivity: list[dict],
+    resolution: str = "day",
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> list[dict]:
+    """Merge routine and productivity rows into chart rows at ``resolution``."""
+    return downsample_chart_rows(merge_chart_rows(routines, productivity), resolution, max_points)
+
+
+def build_chart_data(
+    routines: list[dict],
+    productivity: list[dict],
+    resolution: str = "day",
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> list[ChartDataPoint]:
+    """Merge routine and productivity rows into chart points at ``resolution``."""
+    return chart_points(build_chart_rows(routines, productivity, resolution, max_points))
+
+
+def chart_points(rows: list[dict]) -> list[ChartDataPoint]:
+    """Convert chart rows into one ``ChartDataPoint`` per date."""
+    return [ChartDataPoint(**row) for row in rows]
+
+
+def chart_series(rows: list[dict]) -> ChartSeries:
+    """Transpose chart rows into one array per field, with None for gaps.
+
+    The arrays are built directly from the rows; no per-row model is created.
+    """
+    return ChartSeries(
+        dates=[row["date"] for row in rows],
+        **{metric: [row.get(metric) for row in rows] for metric in CHART_METRICS},
+    )
+
+
+def chart_cache_kind(resolution: str, max_points: int) -> str:
+    """Cache kind for a chart series; LTTB results also depend on ``max_points``."""
+    if resolution == "lttb":
+        return f"charts:lttb:{max_points}"
+    return f"charts:{resolution}"
+
+
+class AsyncAnalyticsService:
+    """Service for computing analytics and chart data on the async client.
+
+    ``summary_source`` selects where the summary is computed: ``"database"``
+    calls the ``analytics_summary`` Postgres function (one row over the
+    wire); ``"index"`` answers from the cached per-user prefix-sum index
+    when the range lies inside it; anything else (and ``"index"`` for older
+    ranges) fetches the rows and aggregates them in Python.
+
+    ``chart_source`` selects where chart rows come from: ``"rollup"`` reads
+    the trigger-maintained ``user_daily_metrics`` table (already one row per
+    day); anything else queries both source tables and merges them by date.
+
+    When ``cache`` is given, results are served from and stored in it per
+    user and resolved date range, and per ``data_version`` when the caller
+    has probed one.
+    """
+
+    def __init__(
+        self,
+        supabase: AsyncPostgrestClient,
+        user_id: str,
+        summary_source: str = "python",
+        chart_source: str = "tables",
+        cache: "AnalyticsCache | None" = None,
+        *,
+        data_version: str | None = None,
+    ):
         self.supabase = supabase
         self.user_id = user_id
+        self.summary_source = summary_source
+        self.chart_source = chart_source
+        self.cache = cache
+        self.data_version = data_version
 
-    def get_summary(
-        self,
-        start_date: date | None = None,
-        end_date: date | None = None,
-    ) -> AnalyticsSummary:
-        """Get analytics summary for the user."""
-        # Default to last 30 days
-        if not end_date:
-            end_date = date.today()
-        if not start_date:
-            start_date = end_date - timedelta(days=30)
-
-        # Fetch routines
-        routines_response = (
-            self.supabase.table("morning_routines")
-            .select("*")
-            .eq("user_id", self.user_id)
-            .gte("date", start_date.isoformat())
-            .lte("date", end_date.isoformat())
-            .execute()
+    def _cached_summary(self, start_date: date, end_date: date) -> AnalyticsSummary | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(
+            self.user_id, "summary", start_date, end_date, version=self.data_version
+        )
+        return AnalyticsSummary.model_validate(cached) if cached is not None else None
+
+    def _cached_charts(self, start_date: date, end_date: date, kind: str) -> list[dict] | None:
+        if self.cache is None:
+            return None
+        return self.cache.get(self.user_id, kind, start_date, end_date, version=self.data_version)
+
+    def _cached_correlations(self, start_date: date, end_date: date) -> CorrelationMatrix | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(
+            self.user_id, "correlations", start_date, end_date, version=self.data_version
         )
+        return CorrelationMatrix.model_validate(cached) if cached is not None else None
 
-        # Fetch productivity
-        productivity_response = (
-            self.supabase.table("productivity_entries")
-            .select("*")
+    def _cached_lagged_correlations(
+        self, start_date: date, end_date: date, max_lag: int
+    ) -> LaggedCorrelations | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(
+            self.user_id,
+            f"lagged_correlations:{max_lag}",
+            start_date,
+            end_date,
+            version=self.data_version,
+        )
+        return LaggedCorrelations.model_validate(cached) if cached is not None else None
+
+    def _cached_metric_index(self, start_date: date, end_date: date) -> MetricPrefixIndex | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(
+            self.user_id, "metric_index", start_date, end_date, version=self.data_version
+        )
+        return MetricPrefixIndex.from_dict(cached) if cached is not None else None
+
+    def _cached_heatmap(self, start_date: date, end_date: date) -> CalendarHeatmap | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(
+            self.user_id, "heatmap", start_date, end_date, version=self.data_version
+        )
+        return CalendarHeatmap.model_validate(cached) if cached is not None else None
+
+    def _cache_generation(self) -> int | None:
+        return self.cache.generation(self.user_id) if self.cache is not None else None
+
+    def _store(
+        self, kind: str, start_date: date, end_date: date, value: Any, generation: int | None
+    ) -> None:
+        if self.cache is not None:
+            self.cache.set(
+                self.user_id,
+                kind,
+                start_date,
+                end_date,
+                value,
+                generation=generation,
+                version=self.data_version,
+            )
+
+    def _store_summary(
+        self, start_date: date, end_date: date, summary: AnalyticsSummary, generation: int | None
+    ) -> None:
+        self._store("summary", start_date, end_date, summary.model_dump(), generation)
+
+    def _store_charts(
+        self,
+        start_date: date,
+        end_date: date,
+        rows: list[dict],
+        generation: int | None,
+        *,
+        kind: str,
+    ) -> None:
+        self._store(kind, start_date, end_date, rows, generation)
+
+    def _store_correlations(
+        self,
+        start_date: date,
+        end_date: date,
+        correlations: CorrelationMatrix,
+        generation: int | None,
+    ) -> None:
+        self._store("correlations", start_date, end_date, correlations.model_dump(), generation)
+
+    def _store_lagged_correlations(
+        self,
+        start_date: date,
+        end_date: date,
+        correlations: LaggedCorrelations,
+        generation: int | None,
+    ) -> None:
+        kind = f"lagged_correlations:{correlations.lags[-1]}"
+        self._store(kind, start_date, end_date, correlations.model_dump(), generation)
+
+    def _store_metric_index(
+        self, start_date: date, end_date: date, index: MetricPrefixIndex, generation: int | None
+    ) -> None:
+        self._store("metric_index", start_date, end_date, index.to_dict(), generation)
+
+    def _store_heatmap(
+        self, start_date: date, end_date: date, heatmap: CalendarHeatmap, generation: int | None
+    ) -> None:
+        self._store("heatmap", start_date, end_date, heatmap.model_dump(), generation)
+
+    @property
+    def _sections_share_fetch(self) -> bool:
+        """Whether summary and charts are both derived from the source-table rows."""
+        return self.summary_source != "database" and self.chart_source != "rollup"
+
+    def _range_query(self, table: str, columns: str, start_date: date, end_date: date):
+        return (
+            self.supabase.table(table)
+            .select(columns)
             .eq("user_id", self.user_id)
             .gte("date", start_date.isoformat())
             .lte("date", end_date.isoformat())
             .order("date")
-            .execute()
         )
 
-        routines = routines_response.data or []
-        productivity = productivity_response.data or []
+    def _summary_queries(self, start_date: date, end_date: date):
+        return (
+            self._range_query("morning_routines", SUMMARY_ROUTINE_COLUMNS, start_date, end_date),
+            self._range_query(
+                "productivity_entries", SUMMARY_PRODUCTIVITY_COLUMNS, start_date, end_date
+            ),
+        )
+
+    def _summary_rpc(self, start_date: date, end_date: date):
+        # The function filters on auth.uid(), so no user_id parameter is needed.
+        return self.supabase.rpc(
+            "analytics_summary",
+            {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()},
+        )
 
-        # Calculate averages
-        avg_productivity = 0
-        avg_sleep = 0
-        avg_exercise = 0
-        avg_mood = 0
-        avg_energy = 0
-        best_day = None
-        worst_day = None
+    def _chart_rollup_query(self, start_date: date, end_date: date):
+        return self._range_query("user_daily_metrics", CHART_ROLLUP_COLUMNS, start_date, end_date)
 
-        if routines:
-            avg_sleep = sum(r["sleep_duration_hours"] for r in routines) / len(routines)
-            avg_exercise = sum(r["exercise_minutes"] for r in routines) / len(routines)
-            avg_mood = sum(r["morning_mood"] for r in routines) / len(routines)
+    def _chart_queries(self, start_date: date, end_date: date):
+        return (
+            self._range_query("morning_routines", CHART_ROUTINE_COLUMNS, start_date, end_date),
+            self._range_query(
+                "productivity_entries", CHART_PRODUCTIVITY_COLUMNS, start_date, end_date
+            ),
+        )
 
-        if productivity:
-            avg_productivity = sum(p["productivity_score"] for p in productivity) / len(
-                productivity
-            )
-            avg_energy = sum(p["energy_level"] for p in productivity) / len(productivity)
-
-            # Find best and worst days
-            best = max(productivity, key=lambda p: p["productivity_score"])
-            worst = min(productivity, key=lambda p: p["productivity_score"])
-            best_day = best["date"]
-            worst_day = worst["date"]
-
-        # Calculate trend (compare first half to second half)
-        trend = "stable"
-        if len(productivity) >= 4:
-            mid = len(productivity) // 2
-            first_half_avg = sum(p["productivity_score"] for p in productivity[:mid]) / mid
-            second_half_avg = sum(p["productivity_score"] for p in productivity[mid:]) / (
-                len(productivity) - mid
+    def _heatmap_queries(self, start_date: date, end_date: date):
+        # The rollup already has one row per day, so a single projected query suffices.
+        if self.chart_source == "rollup":
+            return (
+                self._range_query(
+                    "user_daily_metrics", HEATMAP_ROLLUP_COLUMNS, start_date, end_date
+                ),
             )
+        return (
+            self._range_query("morning_routines", HEATMAP_ROUTINE_COLUMNS, start_date, end_date),
+            self._range_query(
+                "productivity_entries", HEATMAP_PRODUCTIVITY_COLUMNS, start_date, end_date
+            ),
+        )
+
+    def _correlation_queries(self, start_date: date, end_date: date):
+        return (
+            self._range_query(
+                "morning_routines", CORRELATION_ROUTINE_COLUMNS, start_date, end_date
+            ),
+            self._range_query(
+                "productivity_entries", CORRELATION_PRODUCTIVITY_COLUMNS, start_date, end_date
+            ),
+        )
 
-            if second_half_avg > first_half_avg * 1.1:
-                trend = "up"
-            elif second_half_avg < first_half_avg * 0.9:
-                trend = "down"
+    @staticmethod
+    async def _fetch(*queries) -> list[list[dict]]:
+        """Execute independent range queries concurrently."""
+        responses = await gather_queries(*(q.execute() for q in queries))
+        return [r.data or [] for r in responses]
 
-        return AnalyticsSummary(
-            avg_productivity=round(avg_productivity, 2),
-            avg_sleep=round(avg_sleep, 2),
-            avg_exercise=round(avg_exercise, 2),
-            avg_mood=round(avg_mood, 2),
-            avg_energy=round(avg_energy, 2),
-            total_entries=len(productivity),
-            best_day=best_day,
-            worst_day=worst_day,
-            productivity_trend=trend,
-        )
-
-    def get_chart_data(
+    async def get_summary(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> AnalyticsSummary:
+        """Get analytics summary for the user."""
+        start_date, end_date = resolve_date_range(start_date, end_date)
+        summary = self._cached_summary(start_date, end_date)
+        if summary is None:
+            generation = self._cache_generation()
+            summary = await self._compute_summary(start_date, end_date)
+            self._store_summary(start_date, end_date, summary, generation)
+        return summary
+
+    async def _compute_summary(self, start_date: date, end_date: date) -> AnalyticsSummary:
+        if self.summary_source == "database":
+            response = await self._summary_rpc(start_date, end_date).execute()
+            return summary_from_rpc(response.data)
+        if self.summary_source == "index":
+            index = await self.get_metric_index()
+            if index.covers(start_date, end_date):
+                return index.summary(start_date, end_date)
+
+        routines_query, productivity_query = self._summary_queries(start_date, end_date)
+        routines, productivity = await self._fetch(routines_query, productivity_query)
+        return build_summary(routines, productivity)
+
+    async def get_chart_data(
         self,
         start_date: date | None = None,
         end_date: date | None = None,
+        *,
+        resolution: str = "day",
+        max_points: int = DEFAULT_MAX_POINTS,
     ) -> list[ChartDataPoint]:
-        """Get data formatted for charts."""
-        # Default to last 30 days
-        if not end_date:
-            end_date = date.today()
-        if not start_date:
-            start_date = end_date - timedelta(days=30)
-
-        # Fetch routines
-        routines_response = (
-            self.supabase.table("morning_routines")
-            .select(
-                "date, sleep_duration_hours, exercise_minutes, meditation_minutes, morning_mood"
+        """Get data formatted for charts, downsampled to ``resolution``."""
+        return chart_points(
+            await self._chart_rows(
+                start_date, end_date, resolution=resolution, max_points=max_points
             )
-            .eq("user_id", self.user_id)
-            .gte("date", start_date.isoformat())
-            .lte("date", end_date.isoformat())
-            .order("date")
-            .execute()
         )
 
-        # Fetch productivity
-        productivity_response = (
-            self.supabase.table("productivity_entries")
-            .select("date, productivity_score, energy_level")
-            .eq("user_id", self.user_id)
-            .gte("date", start_date.isoformat())
-            .lte("date", end_date.isoformat())
-            .order("date")
-            .execute()
-        )
-
-        # Merge data by date
-        routines_by_date = {r["date"]: r for r in (routines_response.data or [])}
-        productivity_by_date = {p["date"]: p for p in (productivity_response.data or [])}
-
-        all_dates = sorted(set(routines_by_date.keys()) | set(productivity_by_date.keys()))
-
-        chart_data = []
-        for d in all_dates:
-            routine = routines_by_date.get(d, {})
-            prod = productivity_by_date.get(d, {})
-
-            chart_data.append(
-                ChartDataPoint(
-                    date=d,
-                    productivity_score=prod.get("productivity_score"),
-                    energy_level=prod.get("energy_level"),
-                    morning_mood=routine.get("morning_mood"),
-                    sleep_duration_hours=routine.get("sleep_duration_hours"),
-                    exercise_minutes=routine.get("exercise_minutes"),
-                    meditation_minutes=routine.get("meditation_minutes"),
-                )
+    async def get_chart_series(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        *,
+        resolution: str = "day",
+        max_points: int = DEFAULT_MAX_POINTS,
+    ) -> ChartSeries:
+        """Get the same chart data as ``get_chart_data`` as one array per field."""
+        return chart_series(
+            await self._chart_rows(
+                start_date, end_date, resolution=resolution, max_points=max_points
+            )
+        )
+
+    async def _chart_rows(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        *,
+        resolution: str,
+        max_points: int,
+    ) -> list[dict]:
+        start_date, end_date = resolve_date_range(start_date, end_date)
+        kind = chart_cache_kind(resolution, max_points)
+        rows = self._cached_charts(start_date, end_date, kind)
+        if rows is None:
+            generation = self._cache_generation()
+            rows = await self._compute_chart_rows(start_date, end_date, resolution, max_points)
+            self._store_charts(start_date, end_date, rows, generation, kind=kind)
+        return rows
+
+    async def _compute_chart_rows(
+        self, start_date: date, end_date: date, resolution: str, max_points: int
+    ) -> list[dict]:
+        if self.chart_source == "rollup":
+            response = await self._chart_rollup_query(start_date, end_date).execute()
+            return downsample_chart_rows(response.data or [], resolution, max_points)
+
+        routines_query, productivity_query = self._chart_queries(start_date, end_date)
+        routines, productivity = await self._fetch(routines_query, productivity_query)
+        return build_chart_rows(routines, productivity, resolution, max_points)
+
+    async def get_metric_index(self, as_of: date | None = None) -> MetricPrefixIndex:
+        """Get the prefix-sum index for the window ending on ``as_of`` (default today)."""
+        start_date, end_date = index_window(as_of or date.today())
+        index = self._cached_metric_index(start_date, end_date)
+        if index is None:
+            generation = self._cache_generation()
+            rows = await self._compute_chart_rows(start_date, end_date, "day", DEFAULT_MAX_POINTS)
+            index = MetricPrefixIndex.build(rows, start_date, end_date)
+            self._store_metric_index(start_date, end_date, index, generation)
+        return index
+
+    async def get_trends(self, as_of: date | None = None) -> TrendReport:
+        """Compare 7/30/90/365-day averages with the preceding windows."""
+        as_of = as_of or date.today()
+        index = await self.get_metric_index(as_of)
+        return TrendReport(as_of=as_of.isoformat(), trends=index.window_trends(as_of))
+
+    async def get_heatmap(self, year: int | None = None) -> CalendarHeatmap:
+        """Get one value per day of ``year`` (default this year) for each heatmap metric."""
+        year = year or date.today().year
+        start_date, end_date = year_bounds(year)
+        heatmap = self._cached_heatmap(start_date, end_date)
+        if heatmap is None:
+            generation = self._cache_generation()
+            row_sets = await self._fetch(*self._heatmap_queries(start_date, end_date))
+            heatmap = build_heatmap(year, *row_sets)
+            self._store_heatmap(start_date, end_date, heatmap, generation)
+        return heatmap
+
+    async def get_correlations(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> CorrelationMatrix:
+        """Correlate routine metrics with productivity metrics over the range."""
+        start_date, end_date = resolve_date_range(start_date, end_date)
+        correlations = self._cached_correlations(start_date, end_date)
+        if correlations is None:
+            generation = self._cache_generation()
+            routines, productivity = await self._fetch(
+                *self._correlation_queries(start_date, end_date)
+            )
+            correlations = build_correlations(routines, productivity)
+            self._store_correlations(start_date, end_date, correlations, generation)
+        return correlations
+
+    async def get_lagged_correlations(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        max_lag: int = MAX_LAG,
+    ) -> LaggedCorrelations:
+        """Correlate routine metrics with productivity up to ``max_lag`` days later."""
+        start_date, end_date = resolve_date_range(start_date, end_date)
+        correlations = self._cached_lagged_correlations(start_date, end_date, max_lag)
+        if correlations is None:
+            generation = self._cache_generation()
+            routines, productivity = await self._fetch(
+                *self._correlation_queries(start_date, end_date)
+            )
+            correlations = build_lagged_correlations(routines, productivity, max_lag)
+            self._store_lagged_correlations(start_date, end_date, correlations, generation)
+        return correlations
+
+    async def get_dashboard(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        include: Collection[str] = DASHBOARD_SECTIONS,
+        *,
+        resolution: str = "day",
+        max_points: int = DEFAULT_MAX_POINTS,
+    ) -> AnalyticsDashboard:
+        """Get the requested dashboard sections from one shared fetch."""
+        start_date, end_date = resolve_date_range(start_date, end_date)
+        kind = chart_cache_kind(resolution, max_points)
+        summary = self._cached_summary(start_date, end_date) if "summary" in include else None
+        charts = self._cached_charts(start_date, end_date, kind) if "charts" in include else None
+        need_summary = "summary" in include and summary is None
+        need_charts = "charts" in include and charts is None
+
+        generation = self._cache_generation()
+        if need_summary and need_charts and self._sections_share_fetch:
+            # The chart projection is a superset of the summary's, so one pair
+            # of range queries feeds both sections.
+            routines, productivity = await self._fetch(*self._chart_queries(start_date, end_date))
+            summary = build_summary(routines, productivity)
+            charts = build_chart_rows(routines, productivity, resolution, max_points)
+        elif need_summary and need_charts:
+            summary, charts = await gather_queries(
+                self._compute_summary(start_date, end_date),
+                self._compute_chart_rows(start_date, end_date, resolution, max_points),
             )
+        elif need_summary:
+            summary = await self._compute_summary(start_date, end_date)
+        elif need_charts:
+            charts = await self._compute_chart_rows(start_date, end_date, resolution, max_points)
 
-        return chart_data
+        if need_summary:
+            self._store_summary(start_date, end_date, summary, generation)
+        if need_charts:
+            self._store_charts(start_date, end_date, charts, generation, kind=kind)
+        return AnalyticsDashboard(
+            summary=summary, charts=chart_points(charts) if charts is not None else None
+        )
@@ -0,0 +1,68 @@
+"""Helpers for issuing independent queries concurrently.
+
+Both helpers return results in argument order and, if any query fails,
+cancel or wait out the others before re-raising the first error, so a
+failure never leaves a sibling query running unobserved.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+
+# Shared by every sync service call; each call only needs a couple of workers
+# and the underlying httpx.Client is thread-safe.
+QUERY_POOL_SIZE = 8
+
+_executor: ThreadPoolExecutor | None = None
+_worker = threading.local()
+
+
+def _mark_worker() -> None:
+    _worker.active = True
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=QUERY_POOL_SIZE, thread_name_prefix="query", initializer=_mark_worker
+        )
+    return _executor
+
+
+async def gather_queries(*queries: Awaitable[Any]) -> list[Any]:
+    """Await queries concurrently; cancel the rest as soon as one fails."""
+    tasks = [asyncio.ensure_future(q) for q in queries]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        # Let cancelled tasks unwind and mark their exceptions as retrieved.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def run_queries(*queries: Callable[[], Any]) -> list[Any]:
+    """Run blocking queries on the shared pool; wait for all if one fails.
+
+    Called from a pool worker (a query that itself runs queries), they run
+    one after the other on that worker instead: waiting on the pool from
+    inside it can leave every worker blocked on tasks that never start.
+    """
+    if getattr(_worker, "active", False):
+        return [query() for query in queries]
+    futures: list[Future[Any]] = [_get_executor().submit(q) for q in queries]
+    done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+    error = next((e for f in futures if f in done and (e := f.exception()) is not None), None)
+    if error is None:
+        return [f.result() for f in futures]
+
+    for future in pending:
+        future.cancel()
+    # Queries already running cannot be interrupted; wait so none outlives the call.
+    wait(pending)
+    raise error
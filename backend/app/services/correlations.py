@@ -0,0 +1,216 @@
+"""Correlations between routine habits and productivity outcomes.
+
+Rows from both tables are merged by date into one float array with NaN for
+anything not logged, and every routine-vs-productivity Pearson coefficient is
+computed at once from a few matrix products over that array. Each pair uses
+only the days on which both metrics were recorded (pairwise deletion), so a
+missing value in one column does not discard the rest of that day.
+
+The lagged variant lays the rows out on a continuous calendar and relates a
+habit on day ``t - k`` to an outcome on day ``t``. It uses the same sums,
+computed for all lags at once as FFT cross-correlations.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from app.models import CorrelationMatrix, LaggedCorrelations
+
+
+ROUTINE_METRICS = (
+    "sleep_duration_hours",
+    "exercise_minutes",
+    "meditation_minutes",
+    "morning_mood",
+    "screen_time_before_bed",
+    "caffeine_intake",
+    "water_intake_ml",
+)
+PRODUCTIVITY_METRICS = (
+    "productivity_score",
+    "energy_level",
+    "stress_level",
+    "focus_hours",
+    "tasks_completed",
+    "distractions_count",
+)
+CORRELATION_ROUTINE_COLUMNS = "date, " + ", ".join(ROUTINE_METRICS)
+CORRELATION_PRODUCTIVITY_COLUMNS = "date, " + ", ".join(PRODUCTIVITY_METRICS)
+
+# Coefficients from fewer paired days than this are reported as None.
+MIN_SAMPLES = 3
+# Longest habit-to-outcome delay, in days, reported by the lagged analysis.
+MAX_LAG = 14
+
+
+def _fill_metric_array(
+    routines: list[dict], productivity: list[dict], index: dict[str, int], days: int
+) -> np.ndarray:
+    offset = len(ROUTINE_METRICS)
+    values = np.full((days, offset + len(PRODUCTIVITY_METRICS)), np.nan)
+    for rows, metrics, start in (
+        (routines, ROUTINE_METRICS, 0),
+        (productivity, PRODUCTIVITY_METRICS, offset),
+    ):
+        for row in rows:
+            i = index[row["date"]]
+            for j, metric in enumerate(metrics, start):
+                value = row.get(metric)
+                if value is not None:
+                    values[i, j] = value
+    return values
+
+
+def merge_metric_array(
+    routines: list[dict], productivity: list[dict]
+) -> tuple[list[str], np.ndarray]:
+    """Merge rows by date into a ``(days, metrics)`` array, NaN where missing.
+
+    Columns are ``ROUTINE_METRICS`` followed by ``PRODUCTIVITY_METRICS``;
+    the returned dates are sorted and index the rows.
+    """
+    dates = sorted({r["date"] for r in routines} | {p["date"] for p in productivity})
+    index = {d: i for i, d in enumerate(dates)}
+    return dates, _fill_metric_array(routines, productivity, index, len(dates))
+
+
+def calendar_metric_array(routines: list[dict], productivity: list[dict]) -> tuple[int, np.ndarray]:
+    """Like ``merge_metric_array`` but with one row per calendar day.
+
+    Rows run from the first to the last logged date, so a row offset of
+    ``k`` is exactly ``k`` days and unlogged days are all-NaN rows. Returns
+    ``(logged_days, values)``.
+    """
+    logged = {r["date"] for r in routines} | {p["date"] for p in productivity}
+    if not logged:
+        return 0, _fill_metric_array([], [], {}, 0)
+    ordinals = {d: date.fromisoformat(d[:10]).toordinal() for d in logged}
+    first = min(ordinals.values())
+    index = {d: ordinal - first for d, ordinal in ordinals.items()}
+    days = max(ordinals.values()) - first + 1
+    return len(logged), _fill_metric_array(routines, productivity, index, days)
+
+
+def _centered(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return (present mask, values shifted to column mean 0 with NaN as 0).
+
+    Pearson r is shift-invariant; centering keeps the sum-of-squares terms
+    small so ``n * sum_xx - sum_x ** 2`` does not cancel catastrophically.
+    """
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    counts = present.sum(axis=0)
+    means = filled.sum(axis=0) / np.maximum(counts, 1)
+    return present, np.where(present, filled - means, 0.0)
+
+
+def _pearson_from_sums(n, *, sum_x, sum_y, sum_xx, sum_yy, sum_xy) -> np.ndarray:
+    """Pearson r from per-pair sums taken over the rows where both values exist."""
+    cov = n * sum_xy - sum_x * sum_y
+    var_x = n * sum_xx - sum_x * sum_x
+    var_y = n * sum_yy - sum_y * sum_y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = cov / np.sqrt(var_x * var_y)
+    # Constant columns have zero variance; the relative tolerance absorbs
+    # rounding so they never show up as a tiny positive one.
+    r[(var_x <= 1e-9 * n * sum_xx) | (var_y <= 1e-9 * n * sum_yy)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def pairwise_pearson(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pearson r between every column of ``x`` and every column of ``y``.
+
+    Both arrays have one row per observation and may contain NaN. Returns
+    ``(r, n)`` where ``n[i, j]`` counts the rows where both ``x[:, i]`` and
+    ``y[:, j]`` are present; ``r`` is NaN where it is undefined.
+    """
+    mx, x0 = _centered(x)
+    my, y0 = _centered(y)
+    fmx = mx.astype(float)
+    fmy = my.astype(float)
+
+    # All sums are restricted to rows where both columns of the pair exist.
+    n = fmx.T @ fmy
+    r = _pearson_from_sums(
+        n,
+        sum_x=x0.T @ fmy,
+        sum_y=fmx.T @ y0,
+        sum_xx=(x0 * x0).T @ fmy,
+        sum_yy=fmx.T @ (y0 * y0),
+        sum_xy=x0.T @ y0,
+    )
+    return r, n.astype(int)
+
+
+def lagged_pearson(x: np.ndarray, y: np.ndarray, max_lag: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pearson r between ``x`` at ``t - k`` and ``y`` at ``t`` for ``k`` in 0..max_lag.
+
+    ``x`` and ``y`` hold one row per consecutive calendar day and may
+    contain NaN. The six per-pair sums are cross-correlations of the masked
+    series, which are computed for every lag and metric pair at once with
+    FFTs. Returns ``(r, n)`` of shape ``(max_lag + 1, x columns, y columns)``.
+    """
+    mx, x0 = _centered(x)
+    my, y0 = _centered(y)
+    # Zero padding past len + max_lag keeps the circular correlation from wrapping.
+    size = 1 << (len(x) + max_lag).bit_length()
+
+    def spectrum(a: np.ndarray) -> np.ndarray:
+        return np.fft.rfft(a, size, axis=0)
+
+    def xcorr(fa: np.ndarray, fb: np.ndarray) -> np.ndarray:
+        # c[k, i, j] = sum_t a[t - k, i] * b[t, j]
+        c = np.fft.irfft(np.conj(fa)[:, :, None] * fb[:, None, :], size, axis=0)
+        return c[: max_lag + 1]
+
+    fmx, fx, fxx = spectrum(mx.astype(float)), spectrum(x0), spectrum(x0 * x0)
+    fmy, fy, fyy = spectrum(my.astype(float)), spectrum(y0), spectrum(y0 * y0)
+
+    n = np.rint(xcorr(fmx, fmy))
+    r = _pearson_from_sums(
+        n,
+        sum_x=xcorr(fx, fmy),
+        sum_y=xcorr(fmx, fy),
+        sum_xx=xcorr(fxx, fmy),
+        sum_yy=xcorr(fmx, fyy),
+        sum_xy=xcorr(fx, fy),
+    )
+    return r, n.astype(int)
+
+
+def _coefficients(r: np.ndarray, n: np.ndarray) -> list:
+    """Round to 4 places; None where undefined or under ``MIN_SAMPLES`` days."""
+    rounded = np.round(r, 4)
+    return np.where((n >= MIN_SAMPLES) & ~np.isnan(r), rounded, None).tolist()
+
+
+def build_correlations(routines: list[dict], productivity: list[dict]) -> CorrelationMatrix:
+    """Correlate every routine metric with every productivity metric."""
+    dates, values = merge_metric_array(routines, productivity)
+    offset = len(ROUTINE_METRICS)
+    r, n = pairwise_pearson(values[:, :offset], values[:, offset:])
+    return CorrelationMatrix(
+        routine_metrics=list(ROUTINE_METRICS),
+        productivity_metrics=list(PRODUCTIVITY_METRICS),
+        coefficients=_coefficients(r, n),
+        sample_counts=n.tolist(),
+        total_days=len(dates),
+    )
+
+
+def build_lagged_correlations(
+    routines: list[dict], productivity: list[dict], max_lag: int = MAX_LAG
+) -> LaggedCorrelations:
+    """Correlate each routine metric ``k`` days earlier with each productivity metric."""
+    logged_days, values = calendar_metric_array(routines, productivity)
+    offset = len(ROUTINE_METRICS)
+    r, n = lagged_pearson(values[:, :offset], values[:, offset:], max_lag)
+    return LaggedCorrelations(
+        routine_metrics=list(ROUTINE_METRICS),
+        productivity_metrics=list(PRODUCTIVITY_METRICS),
+        lags=list(range(max_lag + 1)),
+        coefficients=_coefficients(r, n),
+        sample_counts=n.tolist(),
+        total_days=logged_days,
+    )
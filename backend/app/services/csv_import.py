@@ -0,0 +1,331 @@
+"""CSV import into the routine and productivity tables.
+
+Rows are written with PostgREST bulk inserts of up to ``batch_size``
+records. Each table and batch costs one request, where the old import made
+one request per row. A bulk insert is a single statement, so one bad row
+fails its whole batch. The failed batch is then split in half and each half
+is retried, down to single rows. The good rows around a bad one are still
+written, and every error names the row that caused it.
+
+``import_csv`` streams the file through the same path ``chunk_rows`` rows
+at a time. Each chunk is parsed, inserted and dropped before the next one
+is read, so memory use depends on the chunk size rather than the file size.
+
+Before anything is sent, each chunk is checked column by column against the
+entry models (see ``import_validation``). Rows that break a constraint are
+reported and skipped without a request.
+"""
+
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from typing import IO, TYPE_CHECKING, Any, Literal
+
+import pandas as pd
+from postgrest import ReturnMethod, SyncPostgrestClient
+
+from app.models import CSVImportResult, ImportJob
+from app.services.import_validation import IMPORT_MODELS, validate_frame
+
+
+if TYPE_CHECKING:
+    from app.core.import_jobs import ImportJobStore
+
+
+logger = logging.getLogger("morning_routine")
+
+# Every model field but the date, which all records carry.
+IMPORT_COLUMNS: dict[str, tuple[str, ...]] = {
+    table: tuple(name for name in model.model_fields if name != "date")
+    for table, model in IMPORT_MODELS.items()
+}
+# Columns that mark a CSV as holding a single table.
+ROUTINE_SIGNATURE = frozenset({"wake_time", "sleep_duration_hours", "morning_mood"})
+PRODUCTIVITY_SIGNATURE = frozenset({"productivity_score", "energy_level"})
+
+# Both tables are UNIQUE(user_id, date).
+CONFLICT_COLUMNS = "user_id,date"
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_CHUNK_ROWS = 5000
+MAX_IMPORT_ERRORS = 10
+
+# (row number, record to insert)
+ImportBatch = list[tuple[int, dict[str, Any]]]
+# What to do with a row whose (user_id, date) already exists.
+OnConflict = Literal["update", "skip", "error"]
+
+
+def read_csv_chunks(source: IO, chunk_rows: int = IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Parse ``source`` incrementally; row labels run on across chunks."""
+    with pd.read_csv(source, chunksize=chunk_rows) as reader:
+        yield from reader
+
+
+def import_tables(columns: set[str]) -> tuple[str, ...]:
+    """Tables a CSV with ``columns`` is imported into.
+
+    A CSV with one table's signature columns is imported into that table
+    only. Any other CSV is split, and each row is written to each table it
+    has values for.
+    """
+    routines, productivity = columns >= ROUTINE_SIGNATURE, columns >= PRODUCTIVITY_SIGNATURE
+    if routines and not productivity:
+        return ("morning_routines",)
+    if productivity and not routines:
+        return ("productivity_entries",)
+    return ("morning_routines", "productivity_entries")
+
+
+class CSVImporter:
+    """Write parsed CSV rows for one user in batched inserts.
+
+    ``on_conflict`` decides what happens to a row for a day that already
+    has one: ``error`` fails the row, ``update`` overwrites the existing row
+    and ``skip`` keeps it. Update and skip are sent as upserts on
+    ``(user_id, date)``, so re-importing a full history is a single pass.
+    An update only writes the columns the row has values for; a skipped row
+    counts toward ``skipped_count`` rather than ``imported_count``.
+
+    Counters accumulate across ``import_frame`` calls, and ``result()``
+    reports the totals.
+    """
+
+    def __init__(
+        self,
+        supabase: SyncPostgrestClient,
+        user_id: str,
+        *,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        on_conflict: OnConflict = "error",
+    ):
+        self.supabase = supabase
+        self.user_id = user_id
+        self.batch_size = max(batch_size, 1)
+        self.on_conflict = on_conflict
+        self.rows_parsed = 0
+        self.imported_count = 0
+        self.skipped_count = 0
+        self.failed_rows: set[int] = set()
+        self.errors: list[str] = []
+        self.batches_sent = 0
+        self.parse_error: str | None = None
+        # Every attempted row counts: a failed row may still have written one table.
+        self.touched_dates: set[str] = set()
+        # Rows of the current frame that an upsert under ``skip`` actually wrote.
+        self._written_rows: set[int] = set()
+        self._started = time.perf_counter()
+
+    def import_csv(
+        self,
+        source: IO,
+        *,
+        chunk_rows: int = IMPORT_CHUNK_ROWS,
+        on_chunk: Callable[["CSVImporter"], None] | None = None,
+    ) -> None:
+        """Import ``source`` one chunk of ``chunk_rows`` rows at a time.
+
+        ``on_chunk`` is called with the importer after each chunk, for
+        progress reporting. Raises ``ValueError`` if the CSV cannot be parsed
+        before any row was read. A parse error further into the file is
+        recorded in the result instead, because the earlier chunks have
+        already been written.
+        """
+        chunks = read_csv_chunks(source, chunk_rows)
+        while True:
+            try:
+                chunk = next(chunks, None)
+            except ValueError as e:
+                if not self.rows_parsed:
+                    raise
+                self.parse_error = f"Failed to parse CSV after row {self.rows_parsed}: {e!s}"
+                return
+            if chunk is None:
+                return
+            self.import_frame(chunk)
+            if on_chunk is not None:
+                on_chunk(self)
+
+    def import_frame(self, df: pd.DataFrame) -> None:
+        """Validate and insert every row of ``df``; row numbers come from its index."""
+        self.rows_parsed += len(df)
+        tables = import_tables(set(df.columns))
+        targets = {table: self._target_rows(df, table, split=len(tables) > 1) for table in tables}
+        df, rejected = validate_frame(df, targets)
+        for label, reason in rejected.items():
+            self._fail(int(label) + 1, reason)
+
+        # (table, columns) -> batch. An update sets every column of the request
+        # on conflict, and a record without one gets the column default. Rows
+        # are therefore only batched with rows that have the same columns, so
+        # a blank cell never overwrites a stored value.
+        batches: dict[tuple[str, tuple[str, ...]], ImportBatch] = {}
+        rows = [int(idx) + 1 for idx in df.index]
+        sent: set[int] = set()
+        self._written_rows = set()
+        for row, raw in zip(rows, df.to_dict("records"), strict=True):
+            # Remove NaN values
+            record = {k: v for k, v in raw.items() if pd.notna(v)}
+            if "date" in record:
+                self.touched_dates.add(record["date"])
+            for table in tables:
+                values = {k: record[k] for k in IMPORT_COLUMNS[table] if k in record}
+                if not values and len(tables) > 1:
+                    continue
+                values |= {"user_id": self.user_id}
+                if "date" in record:
+                    values["date"] = record["date"]
+                key = (table, tuple(values) if self.on_conflict == "update" else ())
+                batch = batches.setdefault(key, [])
+                batch.append((row, values))
+                sent.add(row)
+                if len(batch) >= self.batch_size:
+                    self._send(table, batch)
+                    batches[key] = []
+
+        for (table, _), batch in batches.items():
+            if batch:
+                self._send(table, batch)
+        skipped: set[int] = set()
+        if self.on_conflict == "skip":
+            skipped = sent - self._written_rows - self.failed_rows
+        self.skipped_count += len(skipped)
+        self.imported_count += sum(
+            row not in self.failed_rows and row not in skipped for row in rows
+        )
+
+    @staticmethod
+    def _target_rows(df: pd.DataFrame, table: str, *, split: bool) -> pd.Series:
+        """Rows of ``df`` that will be written to ``table``."""
+        if not split:
+            return pd.Series(True, index=df.index)
+        columns = [c for c in IMPORT_COLUMNS[table] if c in df.columns]
+        return df[columns].notna().any(axis=1)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self._started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.rows_parsed / elapsed if elapsed else 0.0
+
+    def result(self) -> CSVImportResult:
+        errors = list(self.errors)
+        if len(self.failed_rows) > len(errors):
+            errors.append("... (more errors truncated)")
+        if self.parse_error:
+            errors.append(self.parse_error)
+        return CSVImportResult(
+            success=not self.failed_rows and not self.parse_error,
+            imported_count=self.imported_count,
+            skipped_count=self.skipped_count,
+            failed_count=len(self.failed_rows),
+            errors=errors,
+            batches_sent=self.batches_sent,
+            elapsed_seconds=round(self.elapsed_seconds, 3),
+        )
+
+    def _send(self, table: str, batch: ImportBatch) -> None:
+        """Insert ``batch``, halving it on failure until the bad rows are isolated."""
+        self.batches_sent += 1
+        records = [values for _, values in batch]
+        skip = self.on_conflict == "skip"
+        # Omitted (NaN) fields take the column default, as single-row inserts did.
+        # A skipping upsert returns only the rows it inserted, which tells the
+        # written rows from the skipped ones.
+        options: dict[str, Any] = {
+            "returning": ReturnMethod.representation if skip else ReturnMethod.minimal,
+            "default_to_null": False,
+        }
+        query = self.supabase.table(table)
+        try:
+            if self.on_conflict == "error":
+                query.insert(records, **options).execute()
+            else:
+                response = query.upsert(
+                    records,
+                    on_conflict=CONFLICT_COLUMNS,
+                    ignore_duplicates=skip,
+                    **options,
+                ).execute()
+                if skip:
+                    self._mark_written(batch, response.data)
+        except Exception as e:
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                self._send(table, batch[:middle])
+                self._send(table, batch[middle:])
+                return
+            self._fail(batch[0][0], str(e))
+
+    def _mark_written(self, batch: ImportBatch, inserted: list[dict[str, Any]]) -> None:
+        """Record which rows of ``batch`` the returned ``inserted`` rows came from."""
+        dates = Counter(str(record["date"]) for record in inserted)
+        for row, values in batch:
+            # Of several rows for one day, only the first is inserted.
+            if dates[values.get("date")] > 0:
+                dates[values["date"]] -= 1
+                self._written_rows.add(row)
+
+    def _fail(self, row: int, reason: str) -> None:
+        if row in self.failed_rows:
+            return
+        self.failed_rows.add(row)
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append(f"Row {row}: {reason}")
+
+
+def run_import_job(
+    store: "ImportJobStore",
+    job: ImportJob,
+    importer: CSVImporter,
+    *,
+    chunk_rows: int = IMPORT_CHUNK_ROWS,
+    on_success: Callable[[CSVImporter], None] | None = None,
+) -> ImportJob:
+    """Import the job's stored upload, saving progress after every chunk.
+
+    Runs in a background worker. Row-level failures end up in
+    ``job.result``; ``job.error`` is only set when the import as a whole
+    failed, for example because the file could not be parsed. The stored
+    upload is deleted either way. ``on_success`` runs after the rows are
+    written, so if it raises the job still succeeds, with ``job.warning``
+    set.
+    """
+    path = store.upload_path(job.id)
+
+    def save(status: str | None = None) -> None:
+        job.rows_parsed = importer.rows_parsed
+        job.imported_count = importer.imported_count
+        job.skipped_count = importer.skipped_count
+        job.failed_count = len(importer.failed_rows)
+        job.rows_per_second = round(importer.rows_per_second, 1)
+        if status is not None:
+            job.status = status
+        store.save(importer.user_id, job)
+
+    job.started_at = datetime.now(UTC)
+    save("running")
+    try:
+        with path.open("rb") as source:
+            importer.import_csv(source, chunk_rows=chunk_rows, on_chunk=lambda _: save())
+        job.result = importer.result()
+        status = "succeeded"
+    except Exception as e:
+        job.error = f"Failed to parse CSV: {e!s}" if isinstance(e, ValueError) else str(e)
+        status = "failed"
+    finally:
+        path.unlink(missing_ok=True)
+    if status == "succeeded" and on_success is not None:
+        try:
+            on_success(importer)
+        except Exception as e:
+            logger.exception("Import job %s: refresh after import failed", job.id)
+            job.warning = f"Rows were imported, but refreshing derived data failed: {e!s}"
+    job.finished_at = datetime.now(UTC)
+    save(status)
+    return job
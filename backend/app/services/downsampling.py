@@ -0,0 +1,126 @@
+"""Downsampling for chart series.
+
+``week`` and ``month`` average every metric per ISO week (starting Monday) or
+calendar month, labelled with the bucket's first day. ``lttb`` keeps at most
+``max_points`` real days using largest-triangle-three-buckets on the
+productivity score, so peaks and troughs survive even on multi-year ranges.
+"""
+
+from datetime import date
+
+
+CHART_RESOLUTIONS = ("day", "week", "month", "lttb")
+DEFAULT_MAX_POINTS = 120
+
+CHART_METRICS = (
+    "productivity_score",
+    "energy_level",
+    "morning_mood",
+    "sleep_duration_hours",
+    "exercise_minutes",
+    "meditation_minutes",
+)
+# ChartDataPoint declares these as int, so bucket means are rounded.
+INTEGER_METRICS = frozenset({"exercise_minutes", "meditation_minutes"})
+
+
+def _bucket_start(day: date, resolution: str) -> date:
+    if resolution == "week":
+        return date.fromordinal(day.toordinal() - day.weekday())
+    return day.replace(day=1)
+
+
+def bucket_chart_rows(rows: list[dict], resolution: str) -> list[dict]:
+    """Average date-ordered chart rows per week or month, ignoring missing values."""
+    # bucket label -> metric -> [sum, count]
+    buckets: dict[str, dict[str, list[float]]] = {}
+    for row in rows:
+        label = _bucket_start(date.fromisoformat(row["date"][:10]), resolution).isoformat()
+        totals = buckets.get(label)
+        if totals is None:
+            totals = buckets[label] = {metric: [0.0, 0] for metric in CHART_METRICS}
+        for metric in CHART_METRICS:
+            value = row.get(metric)
+            if value is not None:
+                totals[metric][0] += value
+                totals[metric][1] += 1
+
+    points = []
+    for label, totals in buckets.items():
+        point: dict = {"date": label}
+        for metric, (total, count) in totals.items():
+            if not count:
+                point[metric] = None
+            elif metric in INTEGER_METRICS:
+                point[metric] = round(total / count)
+            else:
+                point[metric] = round(total / count, 2)
+        points.append(point)
+    return points
+
+
+def lttb_indices(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """Return the indices kept by largest-triangle-three-buckets.
+
+    The first and last points are always kept. The rest are split into
+    ``threshold - 2`` buckets, and from each one the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average is chosen.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        span = next_end - end
+        avg_x = sum(xs[end:next_end]) / span
+        avg_y = sum(ys[end:next_end]) / span
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+
+    kept.append(n - 1)
+    return kept
+
+
+def lttb_chart_rows(rows: list[dict], max_points: int) -> list[dict]:
+    """Keep at most ``max_points`` date-ordered rows, preserving score peaks.
+
+    Days without a productivity score are placed at the mean score so they
+    never look like a peak or trough.
+    """
+    if len(rows) <= max_points:
+        return rows
+
+    scores = [r["productivity_score"] for r in rows if r.get("productivity_score") is not None]
+    neutral = sum(scores) / len(scores) if scores else 0.0
+    xs = [date.fromisoformat(r["date"][:10]).toordinal() for r in rows]
+    ys = [
+        r["productivity_score"] if r.get("productivity_score") is not None else neutral
+        for r in rows
+    ]
+    return [rows[i] for i in lttb_indices(xs, ys, max_points)]
+
+
+def downsample_chart_rows(
+    rows: list[dict], resolution: str = "day", max_points: int = DEFAULT_MAX_POINTS
+) -> list[dict]:
+    """Apply ``resolution`` to date-ordered chart rows."""
+    if resolution in {"week", "month"}:
+        return bucket_chart_rows(rows, resolution)
+    if resolution == "lttb":
+        return lttb_chart_rows(rows, max_points)
+    return rows
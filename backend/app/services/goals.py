@@ -0,0 +1,138 @@
+"""Goal adherence over a date range.
+
+Each goal type is checked against one logged column: either the value must
+reach the target (``at_least``) or stay within it (``at_most``). All goals
+are evaluated together. The columns are laid out as a ``(days, columns)``
+array with NaN for days without a value, and every goal's daily hits, hit
+rate and runs come from a few array operations over that array. One fetch
+of each table therefore serves any number of goals.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from app.models import GoalProgress, GoalProgressReport
+
+
+# goal_type -> (logged column, direction)
+GOAL_RULES: dict[str, tuple[str, str]] = {
+    "sleep_duration": ("sleep_duration_hours", "at_least"),
+    "wake_time": ("wake_time", "at_most"),
+    "exercise_minutes": ("exercise_minutes", "at_least"),
+    "meditation_minutes": ("meditation_minutes", "at_least"),
+    "water_intake": ("water_intake_ml", "at_least"),
+    "caffeine_limit": ("caffeine_intake", "at_most"),
+    "productivity_score": ("productivity_score", "at_least"),
+    "focus_hours": ("focus_hours", "at_least"),
+    "tasks_completed": ("tasks_completed", "at_least"),
+    "stress_level_max": ("stress_level", "at_most"),
+    "screen_time_limit": ("screen_time_before_bed", "at_most"),
+}
+ROUTINE_GOAL_COLUMNS = (
+    "sleep_duration_hours",
+    "wake_time",
+    "exercise_minutes",
+    "meditation_minutes",
+    "water_intake_ml",
+    "caffeine_intake",
+    "screen_time_before_bed",
+)
+PRODUCTIVITY_GOAL_COLUMNS = ("productivity_score", "focus_hours", "tasks_completed", "stress_level")
+GOAL_COLUMNS = ROUTINE_GOAL_COLUMNS + PRODUCTIVITY_GOAL_COLUMNS
+GOAL_ROUTINE_COLUMNS = "date, " + ", ".join(ROUTINE_GOAL_COLUMNS)
+GOAL_PRODUCTIVITY_COLUMNS = "date, " + ", ".join(PRODUCTIVITY_GOAL_COLUMNS)
+
+# Absorbs float noise such as 7.999999 hours of sleep against an 8 hour target.
+_TOLERANCE = 1e-9
+
+
+def clock_hours(value: str) -> float:
+    """Convert an ``HH:MM`` time to hours after midnight (``"06:30"`` -> 6.5)."""
+    hours, minutes = value.split(":")[:2]
+    return int(hours) + int(minutes) / 60
+
+
+def goal_value_array(
+    routines: list[dict], productivity: list[dict], start_date: date, days: int
+) -> np.ndarray:
+    """Lay the goal columns out as ``(days, GOAL_COLUMNS)``, NaN where not logged."""
+    values = np.full((days, len(GOAL_COLUMNS)), np.nan)
+    for rows, columns, offset in (
+        (routines, ROUTINE_GOAL_COLUMNS, 0),
+        (productivity, PRODUCTIVITY_GOAL_COLUMNS, len(ROUTINE_GOAL_COLUMNS)),
+    ):
+        for row in rows:
+            i = (date.fromisoformat(row["date"][:10]) - start_date).days
+            if not 0 <= i < days:
+                continue
+            for j, column in enumerate(columns, offset):
+                value = row.get(column)
+                if value is None:
+                    continue
+                values[i, j] = clock_hours(value) if column == "wake_time" else value
+    return values
+
+
+def run_lengths(hits: np.ndarray) -> np.ndarray:
+    """Length of the run of consecutive hits ending on each row, per column."""
+    rows = np.arange(len(hits))[:, None]
+    last_miss = np.maximum.accumulate(np.where(hits, -1, rows), axis=0)
+    return np.where(hits, rows - last_miss, 0)
+
+
+def evaluate_goals(
+    goals: list[dict],
+    routines: list[dict],
+    productivity: list[dict],
+    start_date: date,
+    end_date: date,
+) -> GoalProgressReport:
+    """Score every goal against each day of ``start_date``..``end_date``.
+
+    A day without a value for the goal's column is neither a hit nor a miss
+    and breaks runs. The current run ends on ``end_date``, or on the day
+    before when ``end_date`` has no value yet.
+    """
+    goals = [g for g in goals if g["goal_type"] in GOAL_RULES]
+    days = max((end_date - start_date).days + 1, 0)
+    report = GoalProgressReport(
+        start_date=start_date.isoformat(), end_date=end_date.isoformat(), days=days, goals=[]
+    )
+    if not goals or not days:
+        return report
+
+    columns = [GOAL_COLUMNS.index(GOAL_RULES[g["goal_type"]][0]) for g in goals]
+    at_most = np.array([GOAL_RULES[g["goal_type"]][1] == "at_most" for g in goals])
+    targets = np.array([float(g["target_value"]) for g in goals])
+
+    # One column per goal; goals on the same logged column share its values.
+    values = goal_value_array(routines, productivity, start_date, days)[:, columns]
+    present = ~np.isnan(values)
+    margin = np.where(at_most, targets - values, values - targets)
+    with np.errstate(invalid="ignore"):
+        hits = present & (margin >= -_TOLERANCE)
+
+    runs = run_lengths(hits)
+    previous = runs[-2] if days > 1 else np.zeros(len(goals), dtype=int)
+    current = np.where(present[-1], runs[-1], previous)
+    logged = present.sum(axis=0)
+    hit_days = hits.sum(axis=0)
+    daily = np.where(present, hits, None).T.tolist()
+
+    report.goals = [
+        GoalProgress(
+            goal_id=goal["id"],
+            goal_type=goal["goal_type"],
+            target_value=float(targets[k]),
+            direction=GOAL_RULES[goal["goal_type"]][1],
+            days_logged=int(logged[k]),
+            days_hit=int(hit_days[k]),
+            hit_rate=round(float(hit_days[k] / logged[k]), 4) if logged[k] else None,
+            current_run=int(current[k]),
+            longest_run=int(runs[:, k].max()),
+            daily=daily[k],
+        )
+        for k, goal in enumerate(goals)
+    ]
+    return report
@@ -0,0 +1,52 @@
+"""Calendar heatmap of one year as dense small-int arrays.
+
+Every metric is one array with an entry per calendar day, where index ``i``
+is ``i`` days after 1 January. Scores are 1-10 and ``0`` marks a day without
+a value, so the arrays hold no nulls and every entry fits in a byte. A year
+costs a few kilobytes of JSON, whatever the number of logged days.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from app.models import CalendarHeatmap
+
+
+HEATMAP_METRICS = ("productivity_score", "energy_level", "morning_mood")
+HEATMAP_ROUTINE_COLUMNS = "date, morning_mood"
+HEATMAP_PRODUCTIVITY_COLUMNS = "date, productivity_score, energy_level"
+HEATMAP_ROLLUP_COLUMNS = "date, " + ", ".join(HEATMAP_METRICS)
+
+
+def year_bounds(year: int) -> tuple[date, date]:
+    """First and last day of ``year``."""
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def build_heatmap(year: int, *row_sets: list[dict]) -> CalendarHeatmap:
+    """Lay out rows of one or more tables on the days of ``year``.
+
+    A day is logged when any row falls on it; each metric is taken from
+    whichever row carries it.
+    """
+    start, end = year_bounds(year)
+    days = (end - start).days + 1
+    # Row 0 is the logged flag, then one row per metric.
+    values = np.zeros((1 + len(HEATMAP_METRICS), days), dtype=np.uint8)
+    for rows in row_sets:
+        for row in rows:
+            i = (date.fromisoformat(row["date"][:10]) - start).days
+            if not 0 <= i < days:
+                continue
+            values[0, i] = 1
+            for j, metric in enumerate(HEATMAP_METRICS, 1):
+                value = row.get(metric)
+                if value is not None:
+                    values[j, i] = round(value)
+    return CalendarHeatmap(
+        year=year,
+        days=days,
+        logged=values[0].tolist(),
+        **{metric: values[j].tolist() for j, metric in enumerate(HEATMAP_METRICS, 1)},
+    )
@@ -0,0 +1,172 @@
+"""Column-wise validation of imported rows against the entry models.
+
+The rules come from the pydantic fields of ``MorningRoutineBase`` and
+``ProductivityBase``: the type, whether the field is required, numeric
+bounds (``ge``/``gt``/``le``/``lt``), ``Literal`` choices and string
+patterns. A model change therefore applies to the import too. Each rule
+is checked on a whole column at once, and invalid rows are rejected with
+their reasons before any request is sent.
+"""
+
+import types
+from datetime import date
+from typing import Any, Literal, Union, get_args, get_origin
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+
+from app.models.productivity import ProductivityBase
+from app.models.routine import MorningRoutineBase
+
+
+IMPORT_MODELS: dict[str, type[BaseModel]] = {
+    "morning_routines": MorningRoutineBase,
+    "productivity_entries": ProductivityBase,
+}
+
+
+class ColumnRule(BaseModel):
+    """What one model field accepts, in a form pandas can check."""
+
+    column: str
+    kind: Literal["int", "float", "str", "date"]
+    required: bool = False
+    ge: float | None = None
+    gt: float | None = None
+    le: float | None = None
+    lt: float | None = None
+    choices: tuple[str, ...] | None = None
+    pattern: str | None = None
+
+    @classmethod
+    def from_field(cls, column: str, field: FieldInfo) -> "ColumnRule":
+        annotation = field.annotation
+        if get_origin(annotation) in (Union, types.UnionType):
+            annotation = next(a for a in get_args(annotation) if a is not type(None))
+        choices = None
+        if get_origin(annotation) is Literal:
+            choices = tuple(str(choice) for choice in get_args(annotation))
+            annotation = str
+        kind = {int: "int", float: "float", date: "date"}.get(annotation, "str")
+
+        constraints: dict[str, Any] = {}
+        for item in field.metadata:
+            for name in ("ge", "gt", "le", "lt", "pattern"):
+                value = getattr(item, name, None)
+                if value is not None:
+                    constraints[name] = value
+        return cls(
+            column=column, kind=kind, required=field.is_required(), choices=choices, **constraints
+        )
+
+    def describe_bounds(self) -> str:
+        low = f"at least {self.ge:g}" if self.ge is not None else None
+        if self.gt is not None:
+            low = f"greater than {self.gt:g}"
+        high = f"at most {self.le:g}" if self.le is not None else None
+        if self.lt is not None:
+            high = f"less than {self.lt:g}"
+        if self.ge is not None and self.le is not None:
+            return f"must be between {self.ge:g} and {self.le:g}"
+        return "must be " + " and ".join(part for part in (low, high) if part)
+
+    def check(self, values: pd.Series) -> tuple[pd.Series, pd.Series | None]:
+        """Return why each value is invalid (None if valid or blank) and the values to send.
+
+        The values are only returned for numbers and dates. Blank cells turn
+        an integer column into floats, so integers are converted back; dates
+        are normalized to ``YYYY-MM-DD``.
+        """
+        present = values.notna().to_numpy()
+        flagged = np.zeros(len(values), dtype=bool)
+        reasons = np.full(len(values), None, dtype=object)
+
+        def reject(mask: pd.Series, reason: str) -> None:
+            # The first failing check gives the reason.
+            new = present & ~flagged & mask.to_numpy(dtype=bool, na_value=False)
+            reasons[new] = reason
+            flagged[new] = True
+
+        if self.kind == "date":
+            parsed = pd.to_datetime(values, format="ISO8601", errors="coerce")
+            reject(parsed.isna(), f"{self.column} must be a YYYY-MM-DD date")
+            return pd.Series(reasons, index=values.index), parsed.dt.strftime("%Y-%m-%d")
+
+        if self.kind == "str":
+            text = values.astype(str)
+            if self.choices is not None:
+                reject(
+                    ~text.isin(self.choices),
+                    f"{self.column} must be one of {', '.join(self.choices)}",
+                )
+            if self.pattern is not None:
+                matches = text.str.fullmatch(self.pattern).fillna(False).astype(bool)
+                reject(~matches, f"{self.column} has an invalid format")
+            return pd.Series(reasons, index=values.index), None
+
+        numbers = pd.to_numeric(values, errors="coerce")
+        reject(numbers.isna(), f"{self.column} must be a number")
+        if self.kind == "int":
+            reject(numbers % 1 != 0, f"{self.column} must be a whole number")
+        outside = pd.Series(False, index=values.index)
+        for name, beyond in (
+            ("ge", numbers.lt),
+            ("gt", numbers.le),
+            ("le", numbers.gt),
+            ("lt", numbers.ge),
+        ):
+            bound = getattr(self, name)
+            if bound is not None:
+                outside |= beyond(bound)
+        reject(outside, f"{self.column} {self.describe_bounds()}")
+        if self.kind == "int":
+            return pd.Series(reasons, index=values.index), numbers.round().astype("Int64")
+        return pd.Series(reasons, index=values.index), numbers
+
+
+def model_rules(model: type[BaseModel]) -> dict[str, ColumnRule]:
+    """Derive the column rules for every field of ``model``."""
+    return {name: ColumnRule.from_field(name, field) for name, field in model.model_fields.items()}
+
+
+IMPORT_RULES: dict[str, dict[str, ColumnRule]] = {
+    table: model_rules(model) for table, model in IMPORT_MODELS.items()
+}
+
+
+def validate_frame(
+    df: pd.DataFrame, targets: dict[str, pd.Series]
+) -> tuple[pd.DataFrame, dict[Any, str]]:
+    """Check ``df`` against the rules of each target table.
+
+    ``targets`` maps a table to a boolean mask of the rows that will be
+    written to it; required fields are only enforced on those rows. Returns
+    the valid rows, with numbers and dates converted, and the reasons each
+    rejected row was rejected, keyed by its index label.
+    """
+    # label -> reasons, a dict so a column shared by both tables is reported once
+    reasons: dict[Any, dict[str, None]] = {}
+    converted: dict[str, pd.Series | None] = {}
+
+    def reject(labels: pd.Index, reason: str) -> None:
+        for label in labels:
+            reasons.setdefault(label, {})[reason] = None
+
+    for table, rows in targets.items():
+        for column, rule in IMPORT_RULES[table].items():
+            present = column in df.columns
+            if rule.required:
+                missing = rows & df[column].isna() if present else rows
+                reject(df.index[missing], f"{column} is required")
+            if present and column not in converted:
+                column_reasons, converted[column] = rule.check(df[column])
+                for label, reason in column_reasons.dropna().items():
+                    reasons.setdefault(label, {})[reason] = None
+
+    valid = df.drop(index=list(reasons))
+    for column, values in converted.items():
+        if values is not None:
+            valid[column] = values.loc[valid.index]
+    return valid, {label: "; ".join(messages) for label, messages in reasons.items()}
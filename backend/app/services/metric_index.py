@@ -0,0 +1,266 @@
+"""Prefix-sum index over a user's daily metrics.
+
+The index covers a fixed calendar window (by default the two years ending on
+a given day). For every metric it stores the running sum and running count
+of logged values, one entry per day, so the total or average over any range
+inside the window is two lookups. Best and worst productivity days come from
+sparse tables, so any range's extreme is two lookups as well.
+
+Everything is stored as plain lists. The index can therefore sit in the
+analytics cache as-is and answer queries without decoding anything.
+
+Stored metrics have at most two decimals, so sums are kept as exact integer
+hundredths. Float prefix sums would make a window's total the difference of
+two large inexact numbers, and its average could be a cent off.
+"""
+
+from bisect import bisect_left
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.models import AnalyticsSummary, MetricTrend
+
+
+INDEX_METRICS = (
+    "productivity_score",
+    "energy_level",
+    "sleep_duration_hours",
+    "exercise_minutes",
+    "morning_mood",
+)
+TREND_WINDOWS = (7, 30, 90, 365)
+# Long enough to compare the longest trend window with the one before it.
+INDEX_HORIZON_DAYS = 2 * max(TREND_WINDOWS)
+# Metrics are integers or DECIMAL(4,2), so hundredths hold them exactly.
+SCALE = 100
+
+
+def to_hundredths(value: float) -> int:
+    """A metric value as an exact integer number of hundredths."""
+    return round(value * SCALE)
+
+
+def mean_of_hundredths(total: int, count: int) -> float:
+    """Average of ``count`` non-negative values summing to ``total`` hundredths.
+
+    Rounded half up to two decimals in integer arithmetic, like ``ROUND`` on
+    a Postgres NUMERIC, so every summary source agrees to the cent.
+    """
+    return (2 * total + count) // (2 * count) / SCALE
+
+
+def trend_direction(previous_avg: float, current_avg: float) -> str:
+    """Return "up"/"down" when the average moved by more than 10%, else "stable"."""
+    if current_avg > previous_avg * 1.1:
+        return "up"
+    if current_avg < previous_avg * 0.9:
+        return "down"
+    return "stable"
+
+
+def index_window(as_of: date) -> tuple[date, date]:
+    """The calendar window an index built for ``as_of`` covers."""
+    return as_of - timedelta(days=INDEX_HORIZON_DAYS - 1), as_of
+
+
+def _sparse_table(values: np.ndarray, prefer_max: bool) -> list[list[int]]:
+    """Level ``k`` holds, per start day, the index of the extreme over ``2**k`` days.
+
+    Missing days never win, and ties go to the earlier day.
+    """
+    keyed = np.where(np.isnan(values), -np.inf, values if prefer_max else -values)
+    level = np.arange(len(values))
+    table = [level.tolist()]
+    width = 1
+    while 2 * width <= len(values):
+        left = level[: len(level) - width]
+        right = level[width:]
+        level = np.where(keyed[left] >= keyed[right], left, right)
+        table.append(level.tolist())
+        width *= 2
+    return table
+
+
+class MetricPrefixIndex:
+    """Per-day prefix sums and counts for ``INDEX_METRICS`` over a calendar window."""
+
+    def __init__(
+        self,
+        start: date,
+        sums: dict[str, list[int]],
+        counts: dict[str, list[int]],
+        scores: list[float | None],
+        extremes: dict[str, list[list[int]]],
+    ):
+        self.start = start
+        # sums[m][i] (in hundredths) / counts[m][i] cover the first i days of the window.
+        self.sums = sums
+        self.counts = counts
+        self.scores = scores
+        self.extremes = extremes
+
+    @classmethod
+    def build(cls, rows: list[dict], start: date, end: date) -> "MetricPrefixIndex":
+        """Index merged daily rows (one per date) that fall in ``start``..``end``."""
+        days = (end - start).days + 1
+        values = np.full((days, len(INDEX_METRICS)), np.nan)
+        for row in rows:
+            i = (date.fromisoformat(row["date"][:10]) - start).days
+            if not 0 <= i < days:
+                continue
+            for j, metric in enumerate(INDEX_METRICS):
+                value = row.get(metric)
+                if value is not None:
+                    values[i, j] = value
+
+        present = ~np.isnan(values)
+        zero = np.zeros((1, len(INDEX_METRICS)), dtype=np.int64)
+        hundredths = np.where(present, np.rint(values * SCALE), 0).astype(np.int64)
+        sums = np.concatenate([zero, np.cumsum(hundredths, axis=0)])
+        counts = np.concatenate([zero, np.cumsum(present, axis=0)])
+
+        scores = values[:, INDEX_METRICS.index("productivity_score")]
+        return cls(
+            start,
+            sums={m: sums[:, j].tolist() for j, m in enumerate(INDEX_METRICS)},
+            counts={m: counts[:, j].tolist() for j, m in enumerate(INDEX_METRICS)},
+            scores=[None if np.isnan(s) else float(s) for s in scores],
+            extremes={
+                "best": _sparse_table(scores, prefer_max=True),
+                "worst": _sparse_table(scores, prefer_max=False),
+            },
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MetricPrefixIndex":
+        return cls(
+            date.fromisoformat(data["start"]),
+            data["sums"],
+            data["counts"],
+            data["scores"],
+            data["extremes"],
+        )
+
+    def to_dict(self) -> dict:
+        """JSON-compatible form for the analytics cache."""
+        return {
+            "start": self.start.isoformat(),
+            "sums": self.sums,
+            "counts": self.counts,
+            "scores": self.scores,
+            "extremes": self.extremes,
+        }
+
+    @property
+    def days(self) -> int:
+        return len(self.scores)
+
+    def covers(self, start_date: date, end_date: date) -> bool:
+        """Whether ``start_date``..``end_date`` lies inside the indexed window."""
+        first = (start_date - self.start).days
+        last = (end_date - self.start).days
+        return first >= 0 and last < self.days
+
+    def _bounds(self, start_date: date, end_date: date) -> tuple[int, int]:
+        # Clip to the window; an empty range comes back as lo == hi.
+        lo = min(max((start_date - self.start).days, 0), self.days)
+        hi = min(max((end_date - self.start).days + 1, lo), self.days)
+        return lo, hi
+
+    def _hundredths(self, metric: str, start_date: date, end_date: date) -> tuple[int, int]:
+        lo, hi = self._bounds(start_date, end_date)
+        sums, counts = self.sums[metric], self.counts[metric]
+        return sums[hi] - sums[lo], counts[hi] - counts[lo]
+
+    def total(self, metric: str, start_date: date, end_date: date) -> tuple[float, int]:
+        """Sum and count of ``metric`` over the inclusive range."""
+        total, count = self._hundredths(metric, start_date, end_date)
+        return total / SCALE, count
+
+    def average(self, metric: str, start_date: date, end_date: date) -> float | None:
+        """Mean of ``metric`` over the inclusive range, or None if nothing was logged."""
+        total, count = self._hundredths(metric, start_date, end_date)
+        return total / count / SCALE if count else None
+
+    def _extreme_day(self, kind: str, lo: int, hi: int) -> str | None:
+        # Two overlapping power-of-two blocks cover lo..hi-1.
+        level = (hi - lo).bit_length() - 1
+        table = self.extremes[kind][level]
+        a, b = table[lo], table[hi - (1 << level)]
+        sa, sb = self.scores[a], self.scores[b]
+        if sa is None and sb is None:
+            return None
+        if sb is None or (sa is not None and (sa >= sb if kind == "best" else sa <= sb)):
+            winner = a
+        else:
+            winner = b
+        return (self.start + timedelta(days=winner)).isoformat()
+
+    def _half_trend(self, lo: int, hi: int) -> str:
+        """Same rule as SummaryAggregator.trend: first vs second half of the entries."""
+        counts, sums = self.counts["productivity_score"], self.sums["productivity_score"]
+        n = counts[hi] - counts[lo]
+        if n < 4:
+            return "stable"
+        mid = n // 2
+        # First prefix position holding the first ``mid`` entries of the range.
+        split = bisect_left(counts, counts[lo] + mid, lo, hi + 1)
+        first_half_sum = sums[split] - sums[lo]
+        second_half_sum = sums[hi] - sums[split]
+        return trend_direction(first_half_sum / mid, second_half_sum / (n - mid))
+
+    def summary(self, start_date: date, end_date: date) -> AnalyticsSummary:
+        """Build the same AnalyticsSummary as ``build_summary`` from lookups only."""
+        lo, hi = self._bounds(start_date, end_date)
+        count = {m: self.counts[m][hi] - self.counts[m][lo] for m in INDEX_METRICS}
+
+        def avg(metric: str) -> float:
+            total = self.sums[metric][hi] - self.sums[metric][lo]
+            return mean_of_hundredths(total, count[metric]) if count[metric] else 0
+
+        has_entries = count["productivity_score"] > 0
+        return AnalyticsSummary(
+            avg_productivity=avg("productivity_score"),
+            avg_sleep=avg("sleep_duration_hours"),
+            avg_exercise=avg("exercise_minutes"),
+            avg_mood=avg("morning_mood"),
+            avg_energy=avg("energy_level"),
+            total_entries=count["productivity_score"],
+            best_day=self._extreme_day("best", lo, hi) if has_entries else None,
+            worst_day=self._extreme_day("worst", lo, hi) if has_entries else None,
+            productivity_trend=self._half_trend(lo, hi),
+        )
+
+    def window_trends(
+        self, as_of: date, windows: tuple[int, ...] = TREND_WINDOWS
+    ) -> list[MetricTrend]:
+        """Compare each metric's last ``n`` days with the ``n`` days before, per window."""
+        trends = []
+        for days in windows:
+            current = (as_of - timedelta(days=days - 1), as_of)
+            previous = (as_of - timedelta(days=2 * days - 1), as_of - timedelta(days=days))
+            for metric in INDEX_METRICS:
+                current_total, current_count = self._hundredths(metric, *current)
+                previous_total, previous_count = self._hundredths(metric, *previous)
+                direction = (
+                    trend_direction(previous_total / previous_count, current_total / current_count)
+                    if current_count and previous_count
+                    else "stable"
+                )
+                trends.append(
+                    MetricTrend(
+                        metric=metric,
+                        window_days=days,
+                        current_avg=mean_of_hundredths(current_total, current_count)
+                        if current_count
+                        else None,
+                        previous_avg=mean_of_hundredths(previous_total, previous_count)
+                        if previous_count
+                        else None,
+                        current_count=current_count,
+                        previous_count=previous_count,
+                        direction=direction,
+                    )
+                )
+        return trends
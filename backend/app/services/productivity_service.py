@@ -1,6 +1,7 @@
 from datetime import date
+from typing import TYPE_CHECKING
 
-from supabase import Client
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
 
 from app.models import (
     PaginatedResponse,
@@ -8,24 +9,41 @@ from app.models import (
     ProductivityCreate,
     ProductivityUpdate,
 )
+from app.services.streak_service import record_activity
 
 
-class ProductivityService:
-    """Service for managing productivity data."""
+if TYPE_CHECKING:
+    from app.core.activity_store import ActivityStore
+    from app.core.analytics_cache import AnalyticsCache
+
+
+class _ProductivityQueries:
+    """Query builders shared by the sync and async productivity services.
 
-    def __init__(self, supabase: Client, user_id: str):
+    Builders are identical for both PostgREST clients; only ``execute()``
+    differs (blocking vs awaitable), so each service just runs them.
+    """
+
+    def __init__(
+        self,
+        supabase: SyncPostgrestClient | AsyncPostgrestClient,
+        user_id: str,
+        cache: "AnalyticsCache | None" = None,
+        activity: "ActivityStore | None" = None,
+    ):
         self.supabase = supabase
         self.user_id = user_id
+        self.cache = cache
+        self.activity = activity
         self.table = "productivity_entries"
 
-    def list(
+    def _list_query(
         self,
-        page: int = 1,
-        page_size: int = 10,
-        start_date: date | None = None,
-        end_date: date | None = None,
-    ) -> PaginatedResponse[Productivity]:
-        """List productivity entries with pagination."""
+        page: int,
+        page_size: int,
+        start_date: date | None,
+        end_date: date | None,
+    ):
         query = (
             self.supabase.table(self.table)
             .select("*", count="exact")
@@ -40,11 +58,11 @@ class ProductivityService:
 
         # Pagination
         offset = (page - 1) * page_size
-        query = query.range(offset, offset + page_size - 1)
+        return query.range(offset, offset + page_size - 1)
 
-        response = query.execute()
+    @staticmethod
+    def _paginate(response, page: int, page_size: int) -> PaginatedResponse[Productivity]:
         total = response.count or 0
-
         return PaginatedResponse(
             data=response.data,
             total=total,
@@ -53,48 +71,145 @@ class ProductivityService:
             total_pages=(total + page_size - 1) // page_size,
         )
 
-    def get(self, entry_id: str) -> dict | None:
-        """Get a single productivity entry by ID."""
-        response = (
+    def _get_query(self, entry_id: str):
+        return (
             self.supabase.table(self.table)
             .select("*")
             .eq("id", entry_id)
             .eq("user_id", self.user_id)
             .single()
-            .execute()
         )
-        return response.data
 
-    def create(self, data: ProductivityCreate) -> dict:
-        """Create a new productivity entry."""
+    def _create_query(self, data: ProductivityCreate):
         payload = data.model_dump()
         payload["user_id"] = self.user_id
         payload["date"] = payload["date"].isoformat()
+        return self.supabase.table(self.table).insert(payload)
 
-        response = self.supabase.table(self.table).insert(payload).execute()
-        return response.data[0]
-
-    def update(self, entry_id: str, data: ProductivityUpdate) -> dict | None:
-        """Update an existing productivity entry."""
+    def _update_query(self, entry_id: str, data: ProductivityUpdate):
         payload = data.model_dump(exclude_unset=True)
-
-        response = (
+        return (
             self.supabase.table(self.table)
             .update(payload)
             .eq("id", entry_id)
             .eq("user_id", self.user_id)
-            .execute()
         )
 
+    def _invalidate(self, rows: list[dict] | None, date_changed: bool = False) -> None:
+        """Drop cached analytics covering the days ``rows`` were written to."""
+        if self.cache is not None and rows:
+            self.cache.invalidate_rows(self.user_id, rows, date_changed)
+
+    def _record_activity(self, rows: list[dict] | None, *, logged: bool) -> None:
+        """Set or clear ``rows``' days in the user's streak bitmap."""
+        record_activity(self.activity, self.user_id, self.table, rows, logged=logged)
+
+    def _forget_activity(self) -> None:
+        """Drop the streak bitmap when an update moves a row to another day."""
+        if self.activity is not None:
+            self.activity.discard(self.user_id)
+
+    def _delete_query(self, entry_id: str):
+        return (
+            self.supabase.table(self.table).delete().eq("id", entry_id).eq("user_id", self.user_id)
+        )
+
+
+class ProductivityService(_ProductivityQueries):
+    """Service for managing productivity data."""
+
+    def __init__(
+        self,
+        supabase: SyncPostgrestClient,
+        user_id: str,
+        cache: "AnalyticsCache | None" = None,
+        activity: "ActivityStore | None" = None,
+    ):
+        super().__init__(supabase, user_id, cache, activity)
+
+    def list(
+        self,
+        page: int = 1,
+        page_size: int = 10,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> PaginatedResponse[Productivity]:
+        """List productivity entries with pagination."""
+        response = self._list_query(page, page_size, start_date, end_date).execute()
+        return self._paginate(response, page, page_size)
+
+    def get(self, entry_id: str) -> dict | None:
+        """Get a single productivity entry by ID."""
+        return self._get_query(entry_id).execute().data
+
+    def create(self, data: ProductivityCreate) -> dict:
+        """Create a new productivity entry."""
+        row = self._create_query(data).execute().data[0]
+        self._invalidate([row])
+        self._record_activity([row], logged=True)
+        return row
+
+    def update(self, entry_id: str, data: ProductivityUpdate) -> dict | None:
+        """Update an existing productivity entry."""
+        response = self._update_query(entry_id, data).execute()
+        self._invalidate(response.data, date_changed="date" in data.model_fields_set)
+        if "date" in data.model_fields_set and response.data:
+            self._forget_activity()
         return response.data[0] if response.data else None
 
     def delete(self, entry_id: str) -> bool:
         """Delete a productivity entry."""
-        response = (
-            self.supabase.table(self.table)
-            .delete()
-            .eq("id", entry_id)
-            .eq("user_id", self.user_id)
-            .execute()
-        )
-        return len(response.data) > 0
+        deleted = self._delete_query(entry_id).execute().data
+        self._invalidate(deleted)
+        self._record_activity(deleted, logged=False)
+        return len(deleted) > 0
+
+
+class AsyncProductivityService(_ProductivityQueries):
+    """Async variant of ProductivityService for use from async routes."""
+
+    def __init__(
+        self,
+        supabase: AsyncPostgrestClient,
+        user_id: str,
+        cache: "AnalyticsCache | None" = None,
+        activity: "ActivityStore | None" = None,
+    ):
+        super().__init__(supabase, user_id, cache, activity)
+
+    async def list(
+        self,
+        page: int = 1,
+        page_size: int = 10,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> PaginatedResponse[Productivity]:
+        """List productivity entries with pagination."""
+        response = await self._list_query(page, page_size, start_date, end_date).execute()
+        return self._paginate(response, page, page_size)
+
+    async def get(self, entry_id: str) -> dict | None:
+        """Get a single productivity entry by ID."""
+        return (await self._get_query(entry_id).execute()).data
+
+    async def create(self, data: ProductivityCreate) -> dict:
+        """Create a new productivity entry."""
+        row = (await self._create_query(data).execute()).data[0]
+        self._invalidate([row])
+        self._record_activity([row], logged=True)
+        return row
+
+    async def update(self, entry_id: str, data: ProductivityUpdate) -> dict | None:
+        """Update an existing productivity entry."""
+        response = await self._update_query(entry_id, data).execute()
+        self._invalidate(response.data, date_changed="date" in data.model_fields_set)
+        if "date" in data.model_fields_set and response.data:
+            self._forget_activity()
+        return response.data[0] if response.data else None
+
+    async def delete(self, entry_id: str) -> bool:
+        """Delete a productivity entry."""
+        deleted = (await self._delete_query(entry_id).execute()).data
+        self._invalidate(deleted)
+        self._record_activity(deleted, logged=False)
+        return len(deleted) > 0
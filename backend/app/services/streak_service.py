@@ -0,0 +1,275 @@
+"""Logging streaks from a per-user activity bitmap.
+
+Each table's logged days are kept as an integer bitset where bit ``i`` is
+``origin + i`` days. Because each table has at most one row per user and
+day, a create sets one bit and a delete clears it, and a day counts as
+logged while either table still has its bit. The derived figures (runs,
+gaps, longest streak) are recomputed when the bitmap changes and stored
+with it, so reading streaks never scans dates.
+"""
+
+import re
+from collections.abc import Iterable
+from datetime import date, timedelta
+from itertools import pairwise
+from typing import TYPE_CHECKING, Any
+
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+
+from app.models import StreakStats
+from app.services.concurrency import gather_queries, run_queries
+
+
+if TYPE_CHECKING:
+    from app.core.activity_store import ActivityStore
+
+
+ACTIVITY_TABLES = ("morning_routines", "productivity_entries")
+# PostgREST caps rows per response, so rebuilds page through the dates.
+REBUILD_PAGE_SIZE = 1000
+
+_LOGGED_RUN = re.compile("1+")
+
+
+class ActivityBitmap:
+    """Logged days per table as integer bitsets anchored at ``origin``."""
+
+    def __init__(self, origin: date | None = None, bits: dict[str, int] | None = None):
+        self.origin = origin
+        self.bits = bits if bits is not None else dict.fromkeys(ACTIVITY_TABLES, 0)
+
+    @classmethod
+    def from_dates(cls, dates_by_table: dict[str, Iterable[str]]) -> "ActivityBitmap":
+        """Build a bitmap from each table's logged ISO dates."""
+        days = {t: [date.fromisoformat(d[:10]) for d in ds] for t, ds in dates_by_table.items()}
+        bitmap = cls(min((d for ds in days.values() for d in ds), default=None))
+        for table, table_days in days.items():
+            for day in table_days:
+                bitmap.mark(table, day, logged=True)
+        return bitmap
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ActivityBitmap":
+        origin = date.fromisoformat(data["origin"]) if data["origin"] else None
+        return cls(origin, {table: int(bits, 16) for table, bits in data["bits"].items()})
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-compatible form, with the derived streak figures alongside."""
+        return {
+            "origin": self.origin.isoformat() if self.origin else None,
+            "bits": {table: format(bits, "x") for table, bits in self.bits.items()},
+            "summary": self.summarize(),
+        }
+
+    def mark(self, table: str, day: date, *, logged: bool) -> None:
+        """Set (``logged``) or clear the bit for ``day`` in ``table``."""
+        if self.origin is None:
+            if not logged:
+                return
+            self.origin = day
+        offset = (day - self.origin).days
+        if offset < 0:
+            if not logged:
+                return
+            # Re-anchor at the earlier day.
+            self.bits = {t: bits << -offset for t, bits in self.bits.items()}
+            self.origin, offset = day, 0
+        if logged:
+            self.bits[table] |= 1 << offset
+        else:
+            self.bits[table] &= ~(1 << offset)
+
+    @property
+    def logged(self) -> int:
+        """Days logged in any table."""
+        combined = 0
+        for bits in self.bits.values():
+            combined |= bits
+        return combined
+
+    def summarize(self) -> dict[str, Any]:
+        """Runs and gaps of logged days, as stored alongside the bits."""
+        logged = self.logged
+        if not logged:
+            return {"days_logged": 0}
+
+        def day(offset: int) -> str:
+            return (self.origin + timedelta(days=offset)).isoformat()
+
+        # Reversed so string index i is bit i; the regex scan runs in C.
+        runs = [m.span() for m in _LOGGED_RUN.finditer(format(logged, "b")[::-1])]
+        longest = max(runs, key=lambda run: run[1] - run[0])
+        gaps = [nxt[0] - prev[1] for prev, nxt in pairwise(runs)]
+        return {
+            "days_logged": logged.bit_count(),
+            "first_logged": day(runs[0][0]),
+            "last_logged": day(runs[-1][1] - 1),
+            "last_run_start": day(runs[-1][0]),
+            "longest_streak": longest[1] - longest[0],
+            "longest_streak_start": day(longest[0]),
+            "longest_streak_end": day(longest[1] - 1),
+            "gap_count": len(gaps),
+            "longest_gap": max(gaps, default=0),
+        }
+
+
+def streak_stats(summary: dict[str, Any], today: date) -> StreakStats:
+    """Turn a stored summary into StreakStats in constant time.
+
+    The current streak is the latest run if it reaches today or yesterday,
+    so it does not drop to zero before today's entry has been logged.
+    """
+    if not summary["days_logged"]:
+        return StreakStats(current_streak=0, longest_streak=0, days_logged=0)
+
+    run_start = date.fromisoformat(summary["last_run_start"])
+    run_end = date.fromisoformat(summary["last_logged"])
+    current = 0
+    if run_end >= today - timedelta(days=1) and run_start <= today:
+        current = (min(run_end, today) - run_start).days + 1
+    return StreakStats(
+        current_streak=current,
+        longest_streak=summary["longest_streak"],
+        longest_streak_start=summary["longest_streak_start"],
+        longest_streak_end=summary["longest_streak_end"],
+        days_logged=summary["days_logged"],
+        first_logged=summary["first_logged"],
+        last_logged=summary["last_logged"],
+        gap_count=summary["gap_count"],
+        longest_gap=summary["longest_gap"],
+    )
+
+
+def record_activity(
+    store: "ActivityStore | None",
+    user_id: str,
+    table: str,
+    rows: list[dict] | None,
+    *,
+    logged: bool,
+) -> None:
+    """Patch the user's stored bitmap after rows were written to or deleted from ``table``."""
+    if store is None or not rows:
+        return
+
+    def update(value: dict[str, Any]) -> dict[str, Any]:
+        bitmap = ActivityBitmap.from_dict(value)
+        for row in rows:
+            if row.get("date"):
+                bitmap.mark(table, date.fromisoformat(row["date"][:10]), logged=logged)
+        return bitmap.to_dict()
+
+    store.patch(user_id, update)
+
+
+class _StreakQueries:
+    """Query builders shared by the sync and async streak services."""
+
+    def __init__(
+        self,
+        supabase: SyncPostgrestClient | AsyncPostgrestClient,
+        user_id: str,
+        store: "ActivityStore | None" = None,
+        *,
+        data_version: str | None = None,
+    ):
+        self.supabase = supabase
+        self.user_id = user_id
+        self.store = store
+        self.data_version = data_version
+
+    def _dates_page_query(self, table: str, offset: int):
+        return (
+            self.supabase.table(table)
+            .select("date")
+            .eq("user_id", self.user_id)
+            .order("date")
+            .range(offset, offset + REBUILD_PAGE_SIZE - 1)
+        )
+
+    def _stored_summary(self) -> dict[str, Any] | None:
+        if self.store is None:
+            return None
+        value = self.store.get(self.user_id, data_version=self.data_version)
+        return value["summary"] if value is not None else None
+
+    def _store_bitmap(self, bitmap: ActivityBitmap, version: int | None) -> dict[str, Any]:
+        value = bitmap.to_dict()
+        if self.store is not None:
+            self.store.set(self.user_id, value, version=version, data_version=self.data_version)
+        return value
+
+    def _store_version(self) -> int | None:
+        return self.store.version(self.user_id) if self.store is not None else None
+
+
+class StreakService(_StreakQueries):
+    """Service for logging streaks."""
+
+    def __init__(
+        self,
+        supabase: SyncPostgrestClient,
+        user_id: str,
+        store: "ActivityStore | None" = None,
+        *,
+        data_version: str | None = None,
+    ):
+        super().__init__(supabase, user_id, store, data_version=data_version)
+
+    def get_streaks(self, today: date | None = None) -> StreakStats:
+        """Get current and longest streaks, rebuilding the bitmap if none is stored."""
+        summary = self._stored_summary()
+        if summary is None:
+            summary = self.rebuild()["summary"]
+        return streak_stats(summary, today or date.today())
+
+    def rebuild(self) -> dict[str, Any]:
+        """Rebuild the user's bitmap from every logged date."""
+        version = self._store_version()
+        dates = run_queries(*(lambda t=t: self._fetch_dates(t) for t in ACTIVITY_TABLES))
+        bitmap = ActivityBitmap.from_dates(dict(zip(ACTIVITY_TABLES, dates, strict=True)))
+        return self._store_bitmap(bitmap, version)
+
+    def _fetch_dates(self, table: str) -> list[str]:
+        dates: list[str] = []
+        while True:
+            rows = self._dates_page_query(table, len(dates)).execute().data or []
+            dates.extend(row["date"] for row in rows)
+            if len(rows) < REBUILD_PAGE_SIZE:
+                return dates
+
+
+class AsyncStreakService(_StreakQueries):
+    """Async variant of StreakService for use from async routes."""
+
+    def __init__(
+        self,
+        supabase: AsyncPostgrestClient,
+        user_id: str,
+        store: "ActivityStore | None" = None,
+        *,
+        data_version: str | None = None,
+    ):
+        super().__init__(supabase, user_id, store, data_version=data_version)
+
+    async def get_streaks(self, today: date | None = None) -> StreakStats:
+        """Get current and longest streaks, rebuilding the bitmap if none is stored."""
+        summary = self._stored_summary()
+        if summary is None:
+            summary = (await self.rebuild())["summary"]
+        return streak_stats(summary, today or date.today())
+
+    async def rebuild(self) -> dict[str, Any]:
+        """Rebuild the user's bitmap from every logged date."""
+        version = self._store_version()
+        dates = await gather_queries(*(self._fetch_dates(t) for t in ACTIVITY_TABLES))
+        bitmap = ActivityBitmap.from_dates(dict(zip(ACTIVITY_TABLES, dates, strict=True)))
+        return self._store_bitmap(bitmap, version)
+
+    async def _fetch_dates(self, table: str) -> list[str]:
+        dates: list[str] = []
+        while True:
+            rows = (await self._dates_page_query(table, len(dates)).execute()).data or []
+            dates.extend(row["date"] for row in rows)
+            if len(rows) < REBUILD_PAGE_SIZE:
+                return dates
@@ -1,89 +1,65 @@
-from supabase import Client
+from datetime import date
+
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
 
 from app.models import (
+    GoalProgressReport,
     UserGoalCreate,
     UserGoalUpdate,
     UserProfileUpdate,
     UserSettingsUpdate,
 )
+from app.services.analytics_service import resolve_date_range
+from app.services.concurrency import gather_queries
+from app.services.goals import GOAL_PRODUCTIVITY_COLUMNS, GOAL_ROUTINE_COLUMNS, evaluate_goals
 
 
-class UserService:
-    """Service for managing user profiles, settings, and goals."""
+class _UserQueries:
+    """Query builders shared by the sync and async user services."""
 
-    def __init__(self, supabase: Client, user_id: str):
+    def __init__(self, supabase: SyncPostgrestClient | AsyncPostgrestClient, user_id: str):
         self.supabase = supabase
         self.user_id = user_id
 
     # ==========================================
-    # PROFILE METHODS
+    # PROFILE QUERIES
     # ==========================================
 
-    def get_profile(self) -> dict | None:
-        """Get the current user's profile."""
-        response = (
-            self.supabase.table("user_profiles")
-            .select("*")
-            .eq("id", self.user_id)
-            .single()
-            .execute()
-        )
-        return response.data
+    def _get_profile_query(self):
+        return self.supabase.table("user_profiles").select("*").eq("id", self.user_id).single()
 
-    def update_profile(self, data: UserProfileUpdate) -> dict | None:
-        """Update the current user's profile."""
+    def _update_profile_query(self, data: UserProfileUpdate):
         payload = data.model_dump(exclude_unset=True)
+        return self.supabase.table("user_profiles").update(payload).eq("id", self.user_id)
 
-        response = (
-            self.supabase.table("user_profiles").update(payload).eq("id", self.user_id).execute()
+    def _update_last_login_query(self):
+        return (
+            self.supabase.table("user_profiles")
+            .update({"last_login_at": "now()"})
+            .eq("id", self.user_id)
         )
 
-        return response.data[0] if response.data else None
-
-    def update_last_login(self) -> None:
-        """Update the last login timestamp."""
-        self.supabase.table("user_profiles").update({"last_login_at": "now()"}).eq(
-            "id", self.user_id
-        ).execute()
-
     # ==========================================
-    # SETTINGS METHODS
+    # SETTINGS QUERIES
     # ==========================================
 
-    def get_settings(self) -> dict | None:
-        """Get the current user's settings."""
-        response = (
-            self.supabase.table("user_settings")
-            .select("*")
-            .eq("user_id", self.user_id)
-            .single()
-            .execute()
-        )
-        return response.data
+    def _get_settings_query(self):
+        return self.supabase.table("user_settings").select("*").eq("user_id", self.user_id).single()
 
-    def update_settings(self, data: UserSettingsUpdate) -> dict | None:
-        """Update the current user's settings."""
+    def _update_settings_query(self, data: UserSettingsUpdate):
         payload = data.model_dump(exclude_unset=True)
 
         # Convert time objects to string for JSON serialization
         if payload.get("reminder_time"):
             payload["reminder_time"] = payload["reminder_time"].isoformat()
 
-        response = (
-            self.supabase.table("user_settings")
-            .update(payload)
-            .eq("user_id", self.user_id)
-            .execute()
-        )
-
-        return response.data[0] if response.data else None
+        return self.supabase.table("user_settings").update(payload).eq("user_id", self.user_id)
 
     # ==========================================
-    # GOALS METHODS
+    # GOALS QUERIES
     # ==========================================
 
-    def list_goals(self, active_only: bool = False) -> list[dict]:
-        """List all goals for the current user."""
+    def _list_goals_query(self, active_only: bool):
         query = (
             self.supabase.table("user_goals")
             .select("*")
@@ -94,34 +70,118 @@ class UserService:
         if active_only:
             query = query.eq("is_active", True)
 
-        response = query.execute()
-        return response.data or []
+        return query
 
-    def get_goal(self, goal_id: str) -> dict | None:
-        """Get a specific goal by ID."""
-        response = (
+    def _get_goal_query(self, goal_id: str):
+        return (
             self.supabase.table("user_goals")
             .select("*")
             .eq("id", goal_id)
             .eq("user_id", self.user_id)
             .single()
-            .execute()
         )
-        return response.data
+
+    def _deactivate_goals_query(self, goal_type: str):
+        return (
+            self.supabase.table("user_goals")
+            .update({"is_active": False})
+            .eq("user_id", self.user_id)
+            .eq("goal_type", goal_type)
+            .eq("is_active", True)
+        )
+
+    def _create_goal_query(self, data: UserGoalCreate):
+        payload = data.model_dump()
+        payload["user_id"] = self.user_id
+        return self.supabase.table("user_goals").insert(payload)
+
+    def _update_goal_query(self, goal_id: str, payload: dict):
+        return (
+            self.supabase.table("user_goals")
+            .update(payload)
+            .eq("id", goal_id)
+            .eq("user_id", self.user_id)
+        )
+
+    def _delete_goal_query(self, goal_id: str):
+        return (
+            self.supabase.table("user_goals").delete().eq("id", goal_id).eq("user_id", self.user_id)
+        )
+
+    def _goal_progress_queries(self, start_date: date, end_date: date):
+        # The projected columns cover every goal type, so the three queries
+        # can run together instead of waiting for the goal list.
+        return (
+            self._list_goals_query(active_only=True),
+            *(
+                self.supabase.table(table)
+                .select(columns)
+                .eq("user_id", self.user_id)
+                .gte("date", start_date.isoformat())
+                .lte("date", end_date.isoformat())
+                for table, columns in (
+                    ("morning_routines", GOAL_ROUTINE_COLUMNS),
+                    ("productivity_entries", GOAL_PRODUCTIVITY_COLUMNS),
+                )
+            ),
+        )
+
+
+class UserService(_UserQueries):
+    """Service for managing user profiles, settings, and goals."""
+
+    def __init__(self, supabase: SyncPostgrestClient, user_id: str):
+        super().__init__(supabase, user_id)
+
+    # ==========================================
+    # PROFILE METHODS
+    # ==========================================
+
+    def get_profile(self) -> dict | None:
+        """Get the current user's profile."""
+        return self._get_profile_query().execute().data
+
+    def update_profile(self, data: UserProfileUpdate) -> dict | None:
+        """Update the current user's profile."""
+        response = self._update_profile_query(data).execute()
+        return response.data[0] if response.data else None
+
+    def update_last_login(self) -> None:
+        """Update the last login timestamp."""
+        self._update_last_login_query().execute()
+
+    # ==========================================
+    # SETTINGS METHODS
+    # ==========================================
+
+    def get_settings(self) -> dict | None:
+        """Get the current user's settings."""
+        return self._get_settings_query().execute().data
+
+    def update_settings(self, data: UserSettingsUpdate) -> dict | None:
+        """Update the current user's settings."""
+        response = self._update_settings_query(data).execute()
+        return response.data[0] if response.data else None
+
+    # ==========================================
+    # GOALS METHODS
+    # ==========================================
+
+    def list_goals(self, active_only: bool = False) -> list[dict]:
+        """List all goals for the current user."""
+        return self._list_goals_query(active_only).execute().data or []
+
+    def get_goal(self, goal_id: str) -> dict | None:
+        """Get a specific goal by ID."""
+        return self._get_goal_query(goal_id).execute().data
 
     def create_goal(self, data: UserGoalCreate) -> dict:
         """Create a new goal."""
         # Deactivate existing goal of same type if creating active goal
         if data.is_active:
-            self.supabase.table("user_goals").update({"is_active": False}).eq(
-                "user_id", self.user_id
-            ).eq("goal_type", data.goal_type).eq("is_active", True).execute()
-
-        payload = data.model_dump()
-        payload["user_id"] = self.user_id
+            self._deactivate_goals_query(data.goal_type).execute()
 
-        response = self.supabase.table("user_goals").insert(payload).execute()
-        return response.data[0]
+        return self._create_goal_query(data).execute().data[0]
 
     def update_goal(self, goal_id: str, data: UserGoalUpdate) -> dict | None:
         """Update an existing goal."""
@@ -131,29 +191,98 @@ class UserService:
         if payload.get("is_active"):
             existing = self.get_goal(goal_id)
             if existing:
-                self.supabase.table("user_goals").update({"is_active": False}).eq(
-                    "user_id", self.user_id
-                ).eq("goal_type", existing["goal_type"]).eq("is_active", True).neq(
-                    "id", goal_id
-                ).execute()
-
-        response = (
-            self.supabase.table("user_goals")
-            .update(payload)
-            .eq("id", goal_id)
-            .eq("user_id", self.user_id)
-            .execute()
-        )
+                self._deactivate_goals_query(existing["goal_type"]).neq("id", goal_id).execute()
 
+        response = self._update_goal_query(goal_id, payload).execute()
         return response.data[0] if response.data else None
 
     def delete_goal(self, goal_id: str) -> bool:
         """Delete a goal."""
-        response = (
-            self.supabase.table("user_goals")
-            .delete()
-            .eq("id", goal_id)
-            .eq("user_id", self.user_id)
-            .execute()
+        return len(self._delete_goal_query(goal_id).execute().data) > 0
+
+
+class AsyncUserService(_UserQueries):
+    """Async variant of UserService for use from async routes."""
+
+    def __init__(self, supabase: AsyncPostgrestClient, user_id: str):
+        super().__init__(supabase, user_id)
+
+    # ==========================================
+    # PROFILE METHODS
+    # ==========================================
+
+    async def get_profile(self) -> dict | None:
+        """Get the current user's profile."""
+        return (await self._get_profile_query().execute()).data
+
+    async def update_profile(self, data: UserProfileUpdate) -> dict | None:
+        """Update the current user's profile."""
+        response = await self._update_profile_query(data).execute()
+        return response.data[0] if response.data else None
+
+    async def update_last_login(self) -> None:
+        """Update the last login timestamp."""
+        await self._update_last_login_query().execute()
+
+    # ==========================================
+    # SETTINGS METHODS
+    # ==========================================
+
+    async def get_settings(self) -> dict | None:
+        """Get the current user's settings."""
+        return (await self._get_settings_query().execute()).data
+
+    async def update_settings(self, data: UserSettingsUpdate) -> dict | None:
+        """Update the current user's settings."""
+        response = await self._update_settings_query(data).execute()
+        return response.data[0] if response.data else None
+
+    # ==========================================
+    # GOALS METHODS
+    # ==========================================
+
+    async def list_goals(self, active_only: bool = False) -> list[dict]:
+        """List all goals for the current user."""
+        return (await self._list_goals_query(active_only).execute()).data or []
+
+    async def get_goal(self, goal_id: str) -> dict | None:
+        """Get a specific goal by ID."""
+        return (await self._get_goal_query(goal_id).execute()).data
+
+    async def create_goal(self, data: UserGoalCreate) -> dict:
+        """Create a new goal."""
+        # Deactivate existing goal of same type if creating active goal
+        if data.is_active:
+            await self._deactivate_goals_query(data.goal_type).execute()
+
+        return (await self._create_goal_query(data).execute()).data[0]
+
+    async def update_goal(self, goal_id: str, data: UserGoalUpdate) -> dict | None:
+        """Update an existing goal."""
+        payload = data.model_dump(exclude_unset=True)
+
+        # If activating this goal, deactivate others of same type
+        if payload.get("is_active"):
+            existing = await self.get_goal(goal_id)
+            if existing:
+                await (
+                    self._deactivate_goals_query(existing["goal_type"]).neq("id", goal_id).execute()
+                )
+
+        response = await self._update_goal_query(goal_id, payload).execute()
+        return response.data[0] if response.data else None
+
+    async def delete_goal(self, goal_id: str) -> bool:
+        """Delete a goal."""
+        return len((await self._delete_goal_query(goal_id).execute()).data) > 0
+
+    async def get_goal_progress(
+        self, start_date: date | None = None, end_date: date | None = None
+    ) -> GoalProgressReport:
+        """Evaluate every active goal against the range (default: the last 30 days)."""
+        start_date, end_date = resolve_date_range(start_date, end_date)
+        queries = self._goal_progress_queries(start_date, end_date)
+        goals, routines, productivity = await gather_queries(*(q.execute() for q in queries))
+        return evaluate_goals(
+            goals.data or [], routines.data or [], productivity.data or [], start_date, end_date
         )
-        return len(response.data) > 0
@@ -0,0 +1,58 @@
+"""Cheap change probes for conditional GETs.
+
+A probe asks PostgREST for the newest ``updated_at`` and the exact count of
+the user's rows in a date range, and returns at most one row. Inserts and
+updates move the newest ``updated_at`` and deletes change the count, so the
+pair identifies the data a list or analytics response is built from without
+fetching it.
+"""
+
+from collections.abc import Sequence
+from datetime import date
+
+from postgrest import AsyncPostgrestClient
+
+from app.services.concurrency import gather_queries
+
+
+ENTRY_TABLES = ("morning_routines", "productivity_entries")
+
+
+class AsyncVersionService:
+    """Data versions for conditional GETs."""
+
+    def __init__(self, supabase: AsyncPostgrestClient, user_id: str):
+        self.supabase = supabase
+        self.user_id = user_id
+
+    def _probe_query(self, table: str, start_date: date | None, end_date: date | None):
+        query = (
+            self.supabase.table(table)
+            .select("updated_at", count="exact")
+            .eq("user_id", self.user_id)
+        )
+        if start_date:
+            query = query.gte("date", start_date.isoformat())
+        if end_date:
+            query = query.lte("date", end_date.isoformat())
+        return query.order("updated_at", desc=True, nullsfirst=False).range(0, 0)
+
+    @staticmethod
+    def _fingerprint(responses: list, start_date: date | None, end_date: date | None) -> str:
+        parts = [f"{start_date}..{end_date}"]
+        for response in responses:
+            latest = response.data[0].get("updated_at") if response.data else None
+            parts.append(f"{latest}:{response.count or 0}")
+        return "|".join(parts)
+
+    async def get_version(
+        self,
+        tables: Sequence[str] = ENTRY_TABLES,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> str:
+        """Fingerprint the user's rows of ``tables`` within the date range."""
+        responses = await gather_queries(
+            *(self._probe_query(t, start_date, end_date).execute() for t in tables)
+        )
+        return self._fingerprint(responses, start_date, end_date)
@@ -0,0 +1,254 @@
+"""Weekly summary batch job for users with ``weekly_summary_email`` enabled.
+
+Users are read in pages of ``user_page_size`` ids (keyset-paginated on
+``user_id``). For each page, the previous week's rows of both tables are
+fetched with ``in.(...)`` filters, and offset paging keeps each response
+under the PostgREST row cap. The rows are then grouped by user and handed to
+a process pool in batches. At most ``max_pending`` batches are in flight, so
+memory stays bounded by a few pages however many users opt in. Results are
+written to a ``SummarySink`` as batches complete.
+"""
+
+import json
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, TextIO
+
+from pydantic import BaseModel
+from supabase import Client
+
+from app.services.analytics_service import (
+    SUMMARY_PRODUCTIVITY_COLUMNS,
+    SUMMARY_ROUTINE_COLUMNS,
+    build_summary,
+)
+
+
+# Every id of a page goes into the GET URL of the row queries, about 40 bytes
+# each; 100 ids keep the URL near 4 KB, under common 8 KB gateway limits.
+USER_PAGE_SIZE = 100
+# PostgREST returns at most this many rows per request by default.
+ROW_PAGE_SIZE = 1000
+# Users per process-pool task; larger batches amortize pickling overhead.
+TASK_BATCH_SIZE = 100
+
+
+class SummarySink(ABC):
+    """Destination for weekly summary records."""
+
+    @abstractmethod
+    def write(self, records: list[dict[str, Any]]) -> None:
+        """Deliver a batch of records."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flush and release resources once the run is over."""
+
+
+class JsonLinesSink(SummarySink):
+    """Write one JSON object per line to a text stream (stdout by default)."""
+
+    def __init__(self, stream: TextIO | None = None):
+        self.stream = stream or sys.stdout
+        self._owns_stream = False
+
+    @classmethod
+    def open(cls, path: str | Path) -> "JsonLinesSink":
+        """Write to ``path``, replacing any existing file."""
+        sink = cls(Path(path).open("w", encoding="utf-8"))  # noqa: SIM115 - closed by close()
+        sink._owns_stream = True
+        return sink
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        self.stream.writelines(json.dumps(record) + "\n" for record in records)
+
+    def close(self) -> None:
+        self.stream.flush()
+        if self._owns_stream:
+            self.stream.close()
+
+
+class WeeklySummaryStats(BaseModel):
+    """Counts and timing for one run of the job."""
+
+    week_start: str
+    week_end: str
+    users: int = 0
+    user_pages: int = 0
+    rows: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def users_per_second(self) -> float:
+        return self.users / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def previous_week(today: date) -> tuple[date, date]:
+    """Monday and Sunday of the week before the one containing ``today``."""
+    monday = today - timedelta(days=today.weekday() + 7)
+    return monday, monday + timedelta(days=6)
+
+
+def summarize_users(
+    batch: list[tuple[str, list[dict], list[dict]]], week_start: str, week_end: str
+) -> list[dict[str, Any]]:
+    """Summarize each ``(user_id, routines, productivity)``; runs in a pool worker."""
+    return [
+        {
+            "user_id": user_id,
+            "week_start": week_start,
+            "week_end": week_end,
+            "summary": build_summary(routines, productivity).model_dump(),
+        }
+        for user_id, routines, productivity in batch
+    ]
+
+
+class WeeklySummaryJob:
+    """Compute last week's summary for every opted-in user."""
+
+    def __init__(
+        self,
+        supabase: Client,
+        sink: SummarySink,
+        *,
+        user_page_size: int = USER_PAGE_SIZE,
+        row_page_size: int = ROW_PAGE_SIZE,
+        task_batch_size: int = TASK_BATCH_SIZE,
+    ):
+        self.supabase = supabase
+        self.sink = sink
+        self.user_page_size = user_page_size
+        self.row_page_size = row_page_size
+        self.task_batch_size = task_batch_size
+
+    def run(
+        self, today: date | None = None, *, workers: int | None = None, max_pending: int = 0
+    ) -> WeeklySummaryStats:
+        """Run the job for the week before ``today``.
+
+        ``workers=0`` aggregates in this process, which is useful for tests
+        and small installations; otherwise a pool of ``workers`` processes
+        (default: one per CPU) is used. ``max_pending`` caps the batches in
+        flight (default: twice the pool size).
+        """
+        week_start, week_end = previous_week(today or date.today())
+        stats = WeeklySummaryStats(week_start=week_start.isoformat(), week_end=week_end.isoformat())
+        started = time.perf_counter()
+        try:
+            if workers == 0:
+                for batch in self._batches(week_start, week_end, stats):
+                    self.sink.write(summarize_users(batch, stats.week_start, stats.week_end))
+            else:
+                workers = workers or os.cpu_count() or 1
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    self._run_pool(
+                        pool, week_start, week_end, stats, max_pending=max_pending or 2 * workers
+                    )
+        finally:
+            self.sink.close()
+        stats.elapsed_seconds = round(time.perf_counter() - started, 3)
+        return stats
+
+    def _run_pool(
+        self,
+        pool: Executor,
+        week_start: date,
+        week_end: date,
+        stats: WeeklySummaryStats,
+        *,
+        max_pending: int,
+    ) -> None:
+        pending: deque[Future] = deque()
+        for batch in self._batches(week_start, week_end, stats):
+            if len(pending) >= max_pending:
+                self.sink.write(pending.popleft().result())
+            pending.append(pool.submit(summarize_users, batch, stats.week_start, stats.week_end))
+        while pending:
+            self.sink.write(pending.popleft().result())
+
+    def _batches(
+        self, week_start: date, week_end: date, stats: WeeklySummaryStats
+    ) -> Iterator[list[tuple[str, list[dict], list[dict]]]]:
+        """Yield task batches of ``(user_id, routines, productivity)`` page by page."""
+        for user_ids in self._user_pages():
+            stats.user_pages += 1
+            routines = self._fetch_rows(
+                "morning_routines", SUMMARY_ROUTINE_COLUMNS, user_ids, week_start, week_end
+            )
+            productivity = self._fetch_rows(
+                "productivity_entries", SUMMARY_PRODUCTIVITY_COLUMNS, user_ids, week_start, week_end
+            )
+            stats.users += len(user_ids)
+            stats.rows += len(routines) + len(productivity)
+
+            by_user: dict[str, tuple[list[dict], list[dict]]] = {u: ([], []) for u in user_ids}
+            for row in routines:
+                by_user[row["user_id"]][0].append(row)
+            for row in productivity:
+                by_user[row["user_id"]][1].append(row)
+            batch = [(user_id, r, p) for user_id, (r, p) in by_user.items()]
+            for i in range(0, len(batch), self.task_batch_size):
+                yield batch[i : i + self.task_batch_size]
+
+    def _user_pages(self) -> Iterator[list[str]]:
+        """Opted-in user ids, ``user_page_size`` at a time in id order."""
+        last_id: str | None = None
+        while True:
+            query = (
+                self.supabase.table("user_settings")
+                .select("user_id")
+                .eq("weekly_summary_email", True)
+                .order("user_id")
+                .limit(self.user_page_size)
+            )
+            if last_id is not None:
+                query = query.gt("user_id", last_id)
+            ids = [row["user_id"] for row in query.execute().data or []]
+            if ids:
+                yield ids
+            if len(ids) < self.user_page_size:
+                return
+            last_id = ids[-1]
+
+    def _fetch_rows(
+        self, table: str, columns: str, user_ids: list[str], week_start: date, week_end: date
+    ) -> list[dict]:
+        """All of the week's rows in ``table`` for ``user_ids``, in (user, date) order."""
+        rows: list[dict] = []
+        while True:
+            query = self._rows_query(
+                table, columns, user_ids, week_start, week_end, offset=len(rows)
+            )
+            page = query.execute().data or []
+            rows.extend(page)
+            if len(page) < self.row_page_size:
+                return rows
+
+    def _rows_query(
+        self,
+        table: str,
+        columns: str,
+        user_ids: list[str],
+        week_start: date,
+        week_end: date,
+        *,
+        offset: int,
+    ):
+        return (
+            self.supabase.table(table)
+            .select(f"user_id, {columns}")
+            .in_("user_id", user_ids)
+            .gte("date", week_start.isoformat())
+            .lte("date", week_end.isoformat())
+            .order("user_id")
+            .order("date")
+            .range(offset, offset + self.row_page_size - 1)
+        )
@@ -0,0 +1,129 @@
+"""
+Benchmark the blocking service path against the async service path.
+
+Every route is ``async def``. With the blocking services each ``.execute()``
+holds the event loop for the whole PostgREST round trip, so concurrent
+requests queue up behind each other. The async services await the round
+trip instead, so throughput grows with concurrency.
+
+PostgREST is simulated with an httpx MockTransport that sleeps for a fixed
+latency, so no Supabase project is needed.
+
+Usage:
+    python scripts/benchmark_async_services.py
+    python scripts/benchmark_async_services.py --latency-ms 50 --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import AsyncRoutineService, RoutineService
+
+
+REST_URL = "https://benchmark.invalid/rest/v1"
+USER_ID = "benchmark-user"
+ROWS = [
+    {
+        "id": f"routine-{i}",
+        "user_id": USER_ID,
+        "date": f"2024-01-{i + 1:02d}",
+        "wake_time": "06:30",
+        "sleep_duration_hours": 7.5,
+        "exercise_minutes": 30,
+        "meditation_minutes": 10,
+        "breakfast_quality": "good",
+        "morning_mood": 7,
+    }
+    for i in range(10)
+]
+
+
+def _response() -> httpx.Response:
+    return httpx.Response(
+        200,
+        content=json.dumps(ROWS),
+        headers={"content-type": "application/json", "content-range": f"0-9/{len(ROWS)}"},
+    )
+
+
+def make_sync_service(latency: float) -> RoutineService:
+    def handler(_request: httpx.Request) -> httpx.Response:
+        time.sleep(latency)
+        return _response()
+
+    client = SyncPostgrestClient(
+        REST_URL, http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    return RoutineService(client, USER_ID)
+
+
+def make_async_service(latency: float) -> AsyncRoutineService:
+    async def handler(_request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return _response()
+
+    client = AsyncPostgrestClient(
+        REST_URL, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    return AsyncRoutineService(client, USER_ID)
+
+
+async def run(requests: int, concurrency: int, handle) -> float:
+    """Run ``requests`` calls of ``handle`` with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await handle()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main_async(latency_ms: float, requests: int, levels: list[int]) -> None:
+    latency = latency_ms / 1000
+    sync_service = make_sync_service(latency)
+    async_service = make_async_service(latency)
+
+    # Mirrors the old routes: an async handler calling a blocking service.
+    async def blocking_handler() -> None:
+        sync_service.list()
+
+    async def async_handler() -> None:
+        await async_service.list()
+
+    print(f"Simulated PostgREST latency: {latency_ms:.0f} ms, {requests} requests per level\n")
+    print(f"{'concurrency':>11} | {'blocking req/s':>14} | {'async req/s':>11} | {'speedup':>7}")
+    print("-" * 54)
+    for concurrency in levels:
+        blocking = await run(requests, concurrency, blocking_handler)
+        non_blocking = await run(requests, concurrency, async_handler)
+        print(
+            f"{concurrency:>11} | {blocking:>14.1f} | {non_blocking:>11.1f} | "
+            f"{non_blocking / blocking:>6.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args.latency_ms, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the per-point chart format against the columnar format.
+
+``/api/analytics/charts`` returns one ``ChartDataPoint`` object per date by
+default, repeating every key name on each point. ``format=columnar`` returns
+one array per field built straight from the rows. For each range length this
+builds the response from the same merged rows and serializes it the way the
+route does (response-model dump, then compact JSON), reporting the time per
+response and the payload size.
+
+Usage:
+    python scripts/benchmark_chart_formats.py
+    python scripts/benchmark_chart_formats.py --days 30 365 1825 --repeat 200
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models import ChartDataPoint, ChartSeries
+from app.services.analytics_service import chart_points, chart_series
+
+
+POINTS_ADAPTER = TypeAdapter(list[ChartDataPoint])
+SERIES_ADAPTER = TypeAdapter(ChartSeries)
+
+
+def make_rows(days: int, seed: int = 0) -> list[dict]:
+    """Merged chart rows with a few gaps, as the service produces them."""
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    rows = []
+    for i in range(days):
+        logged_productivity = rng.random() > 0.1
+        rows.append(
+            {
+                "date": (start + timedelta(days=i)).isoformat(),
+                "productivity_score": rng.randint(1, 10) if logged_productivity else None,
+                "energy_level": rng.randint(1, 10) if logged_productivity else None,
+                "morning_mood": rng.randint(1, 10),
+                "sleep_duration_hours": round(rng.uniform(5, 9), 1),
+                "exercise_minutes": rng.choice([0, 15, 30, 45]),
+                "meditation_minutes": rng.choice([0, 10, 20]),
+            }
+        )
+    return rows
+
+
+def serialize(adapter: TypeAdapter, value) -> bytes:
+    # Matches FastAPI: dump through the response model, then Starlette's JSONResponse.
+    content = adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def time_per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365, 1825])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(
+        f"{'days':>5} | {'points ms':>9} | {'columnar ms':>11} | {'speedup':>7} | "
+        f"{'points KB':>9} | {'columnar KB':>11} | {'size':>5}"
+    )
+    print("-" * 79)
+    for days in args.days:
+        rows = make_rows(days)
+        points_body = serialize(POINTS_ADAPTER, chart_points(rows))
+        series_body = serialize(SERIES_ADAPTER, chart_series(rows))
+        points_time = time_per_call(
+            lambda rows=rows: serialize(POINTS_ADAPTER, chart_points(rows)), args.repeat
+        )
+        series_time = time_per_call(
+            lambda rows=rows: serialize(SERIES_ADAPTER, chart_series(rows)), args.repeat
+        )
+        print(
+            f"{days:>5} | {points_time * 1000:>9.3f} | {series_time * 1000:>11.3f} | "
+            f"{points_time / series_time:>6.1f}x | {len(points_body) / 1024:>9.1f} | "
+            f"{len(series_body) / 1024:>11.1f} | {len(series_body) / len(points_body):>4.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compute last week's summary for every user with weekly summary emails enabled.
+
+Reads through the service-role client (bypassing RLS), so it must run with
+the project's service key in SUPABASE_KEY. Summaries are written as JSON
+lines to stdout or to --output; throughput is reported on stderr.
+
+Usage:
+    python scripts/weekly_summary.py
+    python scripts/weekly_summary.py --output summaries.jsonl --workers 8
+    python scripts/weekly_summary.py --today 2024-06-03 --user-page-size 150
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.weekly_summary import (
+    TASK_BATCH_SIZE,
+    JsonLinesSink,
+    WeeklySummaryJob,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="JSON lines file (default: stdout)")
+    parser.add_argument("--today", type=date.fromisoformat, help="Summarize the week before this")
+    parser.add_argument("--workers", type=int, help="Pool processes (0: in-process)")
+    parser.add_argument(
+        "--user-page-size",
+        type=int,
+        help="Users per page (default: WEEKLY_SUMMARY_USER_PAGE_SIZE); ids go in the query URL",
+    )
+    parser.add_argument("--task-batch-size", type=int, default=TASK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    # Imported here so --help works without Supabase credentials.
+    from app.core.config import get_settings  # noqa: PLC0415
+    from app.core.supabase import get_supabase  # noqa: PLC0415
+
+    sink = JsonLinesSink.open(args.output) if args.output else JsonLinesSink()
+    job = WeeklySummaryJob(
+        get_supabase(),
+        sink,
+        user_page_size=args.user_page_size or get_settings().weekly_summary_user_page_size,
+        task_batch_size=args.task_batch_size,
+    )
+    stats = job.run(args.today, workers=args.workers)
+    print(
+        f"weekly summaries {stats.week_start}..{stats.week_end}: {stats.users} users, "
+        f"{stats.rows} rows, {stats.user_pages} pages in {stats.elapsed_seconds:.2f}s "
+        f"({stats.users_per_second:.0f} users/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
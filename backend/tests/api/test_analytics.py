@@ -2,12 +2,13 @@
 Tests for the analytics API endpoints.
 """
 
+from datetime import date
 from typing import Any
 
 import pytest
 from fastapi.testclient import TestClient
 
-from app.core import get_current_user, get_user_supabase
+from app.core import get_async_user_supabase, get_current_user, get_user_supabase
 from app.main import app
 from tests.conftest import TEST_USER, MockSupabaseClient
 
@@ -53,6 +54,7 @@ class TestAnalyticsEndpoints:
 
         app.dependency_overrides[get_current_user] = override_get_current_user
         app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+        app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
         yield TestClient(app)
 
@@ -70,6 +72,7 @@ class TestAnalyticsEndpoints:
 
         app.dependency_overrides[get_current_user] = override_get_current_user
         app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+        app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
         yield TestClient(app)
 
@@ -120,3 +123,119 @@ class TestAnalyticsEndpoints:
         )
 
         assert response.status_code == 200
+
+    def test_get_charts_weekly_resolution(self, client_with_data: TestClient) -> None:
+        """Test that weekly charts are labelled with the Monday of each week."""
+        response = client_with_data.get(
+            "/api/analytics/charts?start_date=2024-01-01&end_date=2024-01-31&resolution=week"
+        )
+
+        assert response.status_code == 200
+        for point in response.json():
+            assert date.fromisoformat(point["date"]).weekday() == 0
+
+    def test_get_charts_columnar(self, client_with_data: TestClient) -> None:
+        """Test that the columnar format returns one array per field."""
+        points = client_with_data.get("/api/analytics/charts").json()
+        response = client_with_data.get("/api/analytics/charts?format=columnar")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["dates"] == [p["date"] for p in points]
+        assert data["morning_mood"] == [p["morning_mood"] for p in points]
+
+    def test_get_charts_rejects_tiny_max_points(self, client_with_data: TestClient) -> None:
+        """Test that LTTB needs room for at least the two endpoints and one peak."""
+        response = client_with_data.get("/api/analytics/charts?resolution=lttb&max_points=2")
+
+        assert response.status_code == 422
+
+    def test_get_trends(self, client_with_data: TestClient) -> None:
+        """Test that every metric is reported for every window."""
+        response = client_with_data.get("/api/analytics/trends?as_of=2024-01-31")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["as_of"] == "2024-01-31"
+        assert {t["window_days"] for t in data["trends"]} == {7, 30, 90, 365}
+
+    def test_get_correlations_success(self, client_with_data: TestClient) -> None:
+        """Test getting the correlation matrix."""
+        response = client_with_data.get("/api/analytics/correlations")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["coefficients"]) == len(data["routine_metrics"])
+        assert len(data["sample_counts"][0]) == len(data["productivity_metrics"])
+
+    def test_get_lagged_correlations(self, client_with_data: TestClient) -> None:
+        """Test that one matrix is returned per lag."""
+        response = client_with_data.get("/api/analytics/correlations/lagged?max_lag=3")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["lags"] == [0, 1, 2, 3]
+        assert len(data["coefficients"]) == 4
+
+    def test_get_lagged_correlations_rejects_long_lag(self, client_with_data: TestClient) -> None:
+        """Test that lags beyond two weeks are rejected."""
+        response = client_with_data.get("/api/analytics/correlations/lagged?max_lag=15")
+
+        assert response.status_code == 422
+
+    def test_get_heatmap(self, client_with_data: TestClient) -> None:
+        """Test that each day of the year gets one entry per metric."""
+        response = client_with_data.get("/api/analytics/heatmap?year=2024")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["days"] == 366
+        assert len(data["productivity_score"]) == 366
+        assert data["logged"][:3] == [1, 1, 0]
+        assert data["productivity_score"][0] == 8
+
+    def test_get_streaks(self, client_with_data: TestClient) -> None:
+        """Test streaks over two consecutive logged days."""
+        response = client_with_data.get("/api/analytics/streaks")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["current_streak"] == 0
+        assert data["longest_streak"] == 2
+        assert data["longest_streak_start"] == "2024-01-01"
+        assert data["days_logged"] == 2
+
+    def test_get_summary_not_modified(self, client_with_data: TestClient) -> None:
+        """Test that analytics endpoints answer conditional GETs."""
+        url = "/api/analytics/summary?start_date=2024-01-01&end_date=2024-01-31"
+        etag = client_with_data.get(url).headers["etag"]
+
+        response = client_with_data.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_get_dashboard_success(self, client_with_data: TestClient) -> None:
+        """Test getting summary and charts in one request."""
+        response = client_with_data.get(
+            "/api/analytics/dashboard?start_date=2024-01-01&end_date=2024-01-31"
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"]["total_entries"] == 2
+        assert [p["date"] for p in data["charts"]] == ["2024-01-01", "2024-01-02"]
+
+    def test_get_dashboard_single_section(self, client_with_data: TestClient) -> None:
+        """Test requesting only the summary section."""
+        response = client_with_data.get("/api/analytics/dashboard?include=summary")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"] is not None
+        assert data["charts"] is None
+
+    def test_get_dashboard_unknown_section(self, client_with_data: TestClient) -> None:
+        """Test that unknown sections are rejected."""
+        response = client_with_data.get("/api/analytics/dashboard?include=heatmap")
+
+        assert response.status_code == 422
@@ -0,0 +1,172 @@
+"""
+Tests for the CSV import API endpoint.
+"""
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import import_data
+from app.core import get_settings
+from app.core.import_jobs import ImportJobStore
+from app.main import app
+from app.services.csv_import import CSVImporter
+
+
+ROUTINES_CSV = (
+    "date,wake_time,sleep_duration_hours,morning_mood\n"
+    "2024-01-01,06:30,7.5,7\n"
+    "2024-01-02,07:00,8.0,8\n"
+)
+
+
+class TestImportEndpoints:
+    """Tests for /api/import endpoints."""
+
+    def test_import_csv(self, client: TestClient) -> None:
+        """Rows are imported in one bulk insert."""
+        response = client.post(
+            "/api/import/csv",
+            files={"file": ("routines.csv", ROUTINES_CSV, "text/csv")},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is True
+        assert data["imported_count"] == 2
+        assert data["failed_count"] == 0
+        assert data["batches_sent"] == 1
+        assert data["elapsed_seconds"] >= 0
+
+    def test_import_rejects_non_csv(self, client: TestClient) -> None:
+        """Only .csv uploads are accepted."""
+        response = client.post(
+            "/api/import/csv",
+            files={"file": ("routines.txt", ROUTINES_CSV, "text/plain")},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "File must be a CSV"
+
+    def test_import_rejects_unparseable_csv(self, client: TestClient) -> None:
+        """A file that cannot be parsed is rejected before any insert."""
+        response = client.post(
+            "/api/import/csv",
+            files={"file": ("empty.csv", "", "text/csv")},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Failed to parse CSV")
+
+    def test_import_csv_upsert(self, client: TestClient) -> None:
+        """on_conflict=update is accepted."""
+        response = client.post(
+            "/api/import/csv?on_conflict=update",
+            files={"file": ("routines.csv", ROUTINES_CSV, "text/csv")},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["imported_count"] == 2
+
+    def test_import_runs_off_the_event_loop(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The blocking parse and inserts run in a worker thread."""
+        loops: list[bool] = []
+        import_csv = CSVImporter.import_csv
+
+        def record(importer: CSVImporter, *args: Any, **kwargs: Any) -> None:
+            try:
+                asyncio.get_running_loop()
+                loops.append(True)
+            except RuntimeError:
+                loops.append(False)
+            import_csv(importer, *args, **kwargs)
+
+        monkeypatch.setattr(CSVImporter, "import_csv", record)
+
+        response = client.post(
+            "/api/import/csv",
+            files={"file": ("routines.csv", ROUTINES_CSV, "text/csv")},
+        )
+
+        assert response.status_code == 200
+        assert loops == [False]
+
+    def test_import_csv_rejects_unknown_conflict_mode(self, client: TestClient) -> None:
+        """on_conflict must be update, skip or error."""
+        response = client.post(
+            "/api/import/csv?on_conflict=replace",
+            files={"file": ("routines.csv", ROUTINES_CSV, "text/csv")},
+        )
+
+        assert response.status_code == 422
+
+
+class TestImportJobEndpoints:
+    """Tests for background imports and /api/import/jobs."""
+
+    @pytest.fixture(autouse=True)
+    def job_store(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> ImportJobStore:
+        store = ImportJobStore(tmp_path)
+        monkeypatch.setattr(import_data, "get_import_job_store", lambda: store)
+        return store
+
+    @pytest.mark.usefixtures("client")
+    def test_background_import(self) -> None:
+        """The job is queued, runs in the worker and can be polled."""
+        # Uses the client fixture's overrides; entering a client keeps its
+        # event loop, and so the worker, alive between requests.
+        with TestClient(app) as live:
+            response = live.post(
+                "/api/import/csv?background=true",
+                files={"file": ("routines.csv", ROUTINES_CSV, "text/csv")},
+            )
+            assert response.status_code == 202
+            job = response.json()
+            assert job["status"] == "queued"
+
+            for _ in range(100):
+                job = live.get(f"/api/import/jobs/{job['id']}").json()
+                if job["status"] in ("succeeded", "failed"):
+                    break
+                time.sleep(0.02)
+
+        assert job["status"] == "succeeded"
+        assert job["rows_parsed"] == 2
+        assert job["imported_count"] == 2
+        assert job["result"]["batches_sent"] == 1
+
+    def test_background_import_disabled(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Deployments without a long-lived worker reject background imports."""
+        settings = get_settings().model_copy(update={"import_background_jobs": False})
+        monkeypatch.setattr(import_data, "get_settings", lambda: settings)
+
+        response = client.post(
+            "/api/import/csv?background=true",
+            files={"file": ("routines.csv", ROUTINES_CSV, "text/csv")},
+        )
+
+        assert response.status_code == 400
+        assert "not available" in response.json()["detail"]
+
+    def test_get_job_not_found(self, client: TestClient) -> None:
+        """Unknown ids return 404."""
+        response = client.get(f"/api/import/jobs/{'0' * 32}")
+
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Import job not found"
+
+    def test_get_job_of_another_user(self, client: TestClient, job_store: ImportJobStore) -> None:
+        """Another user's job is reported as missing."""
+        job = job_store.create("someone-else", "routines.csv", "error")
+
+        response = client.get(f"/api/import/jobs/{job.id}")
+
+        assert response.status_code == 404
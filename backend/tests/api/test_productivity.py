@@ -8,7 +8,7 @@ from typing import Any
 import pytest
 from fastapi.testclient import TestClient
 
-from app.core import get_current_user, get_user_supabase
+from app.core import get_async_user_supabase, get_current_user, get_user_supabase
 from app.main import app
 from tests.conftest import TEST_USER, TEST_USER_ID, MockSupabaseClient
 
@@ -48,6 +48,7 @@ class TestProductivityEndpoints:
 
         app.dependency_overrides[get_current_user] = override_get_current_user
         app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+        app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
         yield TestClient(app)
 
@@ -65,6 +66,7 @@ class TestProductivityEndpoints:
 
         app.dependency_overrides[get_current_user] = override_get_current_user
         app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+        app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
         yield TestClient(app)
 
@@ -8,7 +8,7 @@ from typing import Any
 import pytest
 from fastapi.testclient import TestClient
 
-from app.core import get_current_user, get_user_supabase
+from app.core import get_async_user_supabase, get_current_user, get_user_supabase
 from app.main import app
 from tests.conftest import TEST_USER, TEST_USER_ID, MockSupabaseClient
 
@@ -48,6 +48,7 @@ class TestRoutinesEndpoints:
 
         app.dependency_overrides[get_current_user] = override_get_current_user
         app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+        app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
         yield TestClient(app)
 
@@ -65,6 +66,7 @@ class TestRoutinesEndpoints:
 
         app.dependency_overrides[get_current_user] = override_get_current_user
         app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+        app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
         yield TestClient(app)
 
@@ -108,6 +110,31 @@ class TestRoutinesEndpoints:
 
         assert response.status_code == 200
 
+    def test_list_routines_sets_weak_etag(self, client_with_routines: TestClient) -> None:
+        """Test that list responses carry a weak ETag."""
+        response = client_with_routines.get("/api/routines")
+
+        assert response.headers["etag"].startswith('W/"')
+        assert response.headers["cache-control"] == "private, no-cache"
+
+    def test_list_routines_not_modified(self, client_with_routines: TestClient) -> None:
+        """Test that a matching If-None-Match returns 304 without a body."""
+        etag = client_with_routines.get("/api/routines").headers["etag"]
+
+        response = client_with_routines.get("/api/routines", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_list_routines_etag_varies_with_params(self, client_with_routines: TestClient) -> None:
+        """Test that another page is not answered with 304."""
+        etag = client_with_routines.get("/api/routines").headers["etag"]
+
+        response = client_with_routines.get("/api/routines?page=2", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+
     def test_get_routine_success(self, client_with_routines: TestClient) -> None:
         """Test getting a specific routine by ID."""
         response = client_with_routines.get("/api/routines/routine-123")
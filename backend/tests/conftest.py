@@ -4,14 +4,20 @@ Pytest configuration and fixtures for backend tests.
 Provides mock Supabase client, test data factories, and API test client.
 """
 
-from collections.abc import Generator
+from collections.abc import Callable, Generator
 from datetime import date, datetime
 from typing import Any
 
 import pytest
 from fastapi.testclient import TestClient
 
-from app.core import get_current_user, get_user_supabase
+from app.core import (
+    get_activity_store,
+    get_analytics_cache,
+    get_async_user_supabase,
+    get_current_user,
+    get_user_supabase,
+)
 from app.main import app
 
 
@@ -43,6 +49,14 @@ class MockSupabaseResponse:
         self.data = data
         self.count = count
 
+    def __await__(self) -> Generator[Any, None, "MockSupabaseResponse"]:
+        """Allow ``await query.execute()`` so one mock serves sync and async services."""
+
+        async def resolve() -> "MockSupabaseResponse":
+            return self
+
+        return resolve().__await__()
+
 
 class MockSupabaseQuery:
     """Mock Supabase query builder."""
@@ -55,17 +69,26 @@ class MockSupabaseQuery:
     def select(self, *_args: Any, **_kwargs: Any) -> "MockSupabaseQuery":
         return self
 
-    def insert(self, data: dict[str, Any]) -> "MockSupabaseQuery":
-        # Add id and timestamps to inserted data
-        inserted = {
-            **data,
-            "id": "new-id-123",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-        }
-        self._data = [inserted]
+    def insert(
+        self, data: dict[str, Any] | list[dict[str, Any]], **_kwargs: Any
+    ) -> "MockSupabaseQuery":
+        # Add id and timestamps to inserted data; a list is a bulk insert
+        self._data = [
+            {
+                **row,
+                "id": "new-id-123",
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+            }
+            for row in (data if isinstance(data, list) else [data])
+        ]
         return self
 
+    def upsert(
+        self, data: dict[str, Any] | list[dict[str, Any]], **kwargs: Any
+    ) -> "MockSupabaseQuery":
+        return self.insert(data, **kwargs)
+
     def update(self, data: dict[str, Any]) -> "MockSupabaseQuery":
         if self._data:
             self._data = [{**self._data[0], **data}]
@@ -130,12 +153,40 @@ class MockSupabaseClient:
     def table(self, _name: str) -> MockSupabaseQuery:
         return MockSupabaseQuery(self._data, self._count)
 
+    def rpc(self, _name: str, _params: dict[str, Any] | None = None) -> MockSupabaseQuery:
+        return MockSupabaseQuery(self._data, self._count)
+
+
+class RecordingSupabaseClient(MockSupabaseClient):
+    """Mock Supabase client that records which tables were queried."""
+
+    def __init__(self, data: list[dict[str, Any]] | None = None, count: int | None = None):
+        super().__init__(data, count)
+        self.tables: list[str] = []
+
+    @property
+    def queries(self) -> int:
+        """Number of table queries issued so far."""
+        return len(self.tables)
+
+    def table(self, name: str) -> MockSupabaseQuery:
+        self.tables.append(name)
+        return super().table(name)
+
 
 # ==========================================
 # FIXTURES
 # ==========================================
 
 
+@pytest.fixture(autouse=True)
+def clear_analytics_cache() -> Generator[None, None, None]:
+    """Keep cached analytics results and streak bitmaps from leaking between tests."""
+    yield
+    get_analytics_cache().clear()
+    get_activity_store().clear()
+
+
 @pytest.fixture
 def mock_supabase() -> MockSupabaseClient:
     """Create a mock Supabase client."""
@@ -148,6 +199,12 @@ def mock_supabase_with_data(sample_routine: dict[str, Any]) -> MockSupabaseClien
     return MockSupabaseClient(data=[sample_routine], count=1)
 
 
+@pytest.fixture
+def recording_supabase() -> Callable[..., RecordingSupabaseClient]:
+    """Build mock Supabase clients that record their table queries."""
+    return RecordingSupabaseClient
+
+
 @pytest.fixture
 def sample_routine() -> dict[str, Any]:
     """Sample morning routine data."""
@@ -208,6 +265,7 @@ def client() -> Generator[TestClient, None, None]:
 
     app.dependency_overrides[get_current_user] = override_get_current_user
     app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+    app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
     yield TestClient(app)
 
@@ -226,6 +284,7 @@ def client_with_data(sample_routine: dict[str, Any]) -> Generator[TestClient, No
 
     app.dependency_overrides[get_current_user] = override_get_current_user
     app.dependency_overrides[get_user_supabase] = override_get_user_supabase
+    app.dependency_overrides[get_async_user_supabase] = override_get_user_supabase
 
     yield TestClient(app)
 
@@ -0,0 +1,198 @@
+"""
+Tests for the analytics result cache and its write-through invalidation.
+"""
+
+from collections.abc import Callable
+from datetime import date
+from typing import Any
+
+import pytest
+
+from app.core.analytics_cache import (
+    AnalyticsCache,
+    InMemoryAnalyticsCacheBackend,
+    UserGenerations,
+)
+from app.models import MorningRoutineCreate
+from app.services import AsyncAnalyticsService, AsyncRoutineService
+from tests.conftest import TEST_USER_ID, MockSupabaseClient, RecordingSupabaseClient
+
+
+JAN = (date(2024, 1, 1), date(2024, 1, 31))
+FEB = (date(2024, 2, 1), date(2024, 2, 29))
+
+
+@pytest.fixture
+def cache() -> AnalyticsCache:
+    """A fresh cache with a generous TTL."""
+    return AnalyticsCache(InMemoryAnalyticsCacheBackend(max_entries=16), ttl_seconds=60)
+
+
+class TestAnalyticsCache:
+    """Unit tests for AnalyticsCache."""
+
+    def test_invalidation_is_limited_to_covering_ranges(self, cache: AnalyticsCache) -> None:
+        """A write on a day only drops ranges that contain that day."""
+        cache.set(TEST_USER_ID, "summary", *JAN, {"month": "jan"})
+        cache.set(TEST_USER_ID, "summary", *FEB, {"month": "feb"})
+        cache.set("other-user", "summary", *JAN, {"month": "jan"})
+
+        assert cache.invalidate(TEST_USER_ID, ["2024-01-15"]) == 1
+
+        assert cache.get(TEST_USER_ID, "summary", *JAN) is None
+        assert cache.get(TEST_USER_ID, "summary", *FEB) == {"month": "feb"}
+        assert cache.get("other-user", "summary", *JAN) == {"month": "jan"}
+
+    def test_range_bounds_are_inclusive(self, cache: AnalyticsCache) -> None:
+        """Writes on the first or last day of a range invalidate it."""
+        cache.set(TEST_USER_ID, "charts", *JAN, [])
+        cache.invalidate(TEST_USER_ID, [date(2024, 1, 31)])
+
+        assert cache.get(TEST_USER_ID, "charts", *JAN) is None
+
+    def test_date_change_drops_everything_for_user(self, cache: AnalyticsCache) -> None:
+        """Moving a row to another day invalidates all of the user's ranges."""
+        cache.set(TEST_USER_ID, "summary", *JAN, {})
+        cache.set(TEST_USER_ID, "summary", *FEB, {})
+
+        cache.invalidate_rows(TEST_USER_ID, [{"date": "2024-03-01"}], date_changed=True)
+
+        assert cache.get(TEST_USER_ID, "summary", *JAN) is None
+        assert cache.get(TEST_USER_ID, "summary", *FEB) is None
+
+    def test_stale_result_not_stored_after_concurrent_write(self, cache: AnalyticsCache) -> None:
+        """A result computed before an invalidation is discarded."""
+        generation = cache.generation(TEST_USER_ID)
+        cache.invalidate(TEST_USER_ID, ["2024-01-10"])
+
+        cache.set(TEST_USER_ID, "summary", *JAN, {"stale": True}, generation=generation)
+
+        assert cache.get(TEST_USER_ID, "summary", *JAN) is None
+
+    def test_generations_of_evicted_users_are_dropped(self) -> None:
+        """Per-user generations do not outlive the users' cached entries."""
+        cache = AnalyticsCache(InMemoryAnalyticsCacheBackend(max_entries=2), ttl_seconds=60)
+
+        for i in range(10 * UserGenerations.MIN_SWEEP):
+            cache.set(f"user-{i}", "summary", *JAN, {})
+            cache.invalidate(f"user-{i}", ["2024-02-10"])
+
+        assert len(cache._generations) < 2 * UserGenerations.MIN_SWEEP
+
+    def test_stale_result_not_stored_after_sweep(self, cache: AnalyticsCache) -> None:
+        """Dropping a user's generation never makes an older one current again."""
+        generation = cache.generation(TEST_USER_ID)
+        cache.invalidate(TEST_USER_ID, ["2024-01-10"])
+        for i in range(UserGenerations.MIN_SWEEP):
+            cache.invalidate_user(f"user-{i}")
+
+        cache.set(TEST_USER_ID, "summary", *JAN, {"stale": True}, generation=generation)
+
+        assert cache.get(TEST_USER_ID, "summary", *JAN) is None
+
+    def test_entries_are_kept_per_version(self, cache: AnalyticsCache) -> None:
+        """A result stored under one data version is not served under another."""
+        cache.set(TEST_USER_ID, "summary", *JAN, {"v": 1}, version="v1")
+
+        assert cache.get(TEST_USER_ID, "summary", *JAN, version="v1") == {"v": 1}
+        assert cache.get(TEST_USER_ID, "summary", *JAN, version="v2") is None
+        assert cache.get(TEST_USER_ID, "summary", *JAN) is None
+
+    def test_versioned_entries_are_invalidated(self, cache: AnalyticsCache) -> None:
+        """Range invalidation also reaches versioned keys."""
+        cache.set(TEST_USER_ID, "summary", *JAN, {}, version="v1")
+
+        assert cache.invalidate(TEST_USER_ID, ["2024-01-15"]) == 1
+
+    def test_lru_eviction_respects_max_entries(self) -> None:
+        """The backend evicts the least recently used entry."""
+        backend = InMemoryAnalyticsCacheBackend(max_entries=2)
+        cache = AnalyticsCache(backend, ttl_seconds=60)
+
+        cache.set("a", "summary", *JAN, 1)
+        cache.set("b", "summary", *JAN, 2)
+        cache.get("a", "summary", *JAN)
+        cache.set("c", "summary", *JAN, 3)
+
+        assert cache.get("b", "summary", *JAN) is None
+        assert cache.get("a", "summary", *JAN) == 1
+        assert backend.evictions == 1
+        assert backend.keys("b") == []
+
+    def test_zero_ttl_disables_cache(self) -> None:
+        """With a TTL of 0 nothing is stored."""
+        cache = AnalyticsCache(InMemoryAnalyticsCacheBackend(), ttl_seconds=0)
+        cache.set(TEST_USER_ID, "summary", *JAN, {})
+
+        assert cache.get(TEST_USER_ID, "summary", *JAN) is None
+
+
+class TestServiceCaching:
+    """Services read through and invalidate the cache."""
+
+    async def test_repeat_summary_served_from_cache(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient], cache: AnalyticsCache
+    ) -> None:
+        """A second identical request issues no queries."""
+        client = recording_supabase()
+        service = AsyncAnalyticsService(client, TEST_USER_ID, cache=cache)
+
+        first = await service.get_summary(*JAN)
+        queries = client.queries
+        second = await service.get_summary(*JAN)
+
+        assert second == first
+        assert client.queries == queries
+
+    async def test_new_data_version_bypasses_cached_result(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient], cache: AnalyticsCache
+    ) -> None:
+        """A write seen only through the probed version is not answered from the cache."""
+        client = recording_supabase()
+        await AsyncAnalyticsService(
+            client, TEST_USER_ID, cache=cache, data_version="v1"
+        ).get_summary(*JAN)
+        queries = client.queries
+
+        service = AsyncAnalyticsService(client, TEST_USER_ID, cache=cache, data_version="v2")
+        await service.get_summary(*JAN)
+        refetched = client.queries
+        await service.get_summary(*JAN)
+
+        assert refetched > queries
+        assert client.queries == refetched
+
+    async def test_routine_create_invalidates_covering_range(
+        self,
+        cache: AnalyticsCache,
+        sample_routine: dict[str, Any],
+        recording_supabase: Callable[..., RecordingSupabaseClient],
+    ) -> None:
+        """Creating a routine drops the cached summary for its range only."""
+        client = recording_supabase()
+        analytics = AsyncAnalyticsService(client, TEST_USER_ID, cache=cache)
+        await analytics.get_summary(*JAN)
+        await analytics.get_summary(*FEB)
+
+        routines = AsyncRoutineService(MockSupabaseClient(), TEST_USER_ID, cache)
+        payload = {
+            k: v for k, v in sample_routine.items() if k in MorningRoutineCreate.model_fields
+        }
+        await routines.create(MorningRoutineCreate(**{**payload, "date": date(2024, 1, 20)}))
+
+        assert cache.get(TEST_USER_ID, "summary", *JAN) is None
+        assert cache.get(TEST_USER_ID, "summary", *FEB) is not None
+
+    async def test_repeat_correlations_served_from_cache(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient], cache: AnalyticsCache
+    ) -> None:
+        """Correlations are cached per user and range like the summary."""
+        client = recording_supabase()
+        service = AsyncAnalyticsService(client, TEST_USER_ID, cache=cache)
+
+        await service.get_correlations(*JAN)
+        queries = client.queries
+        await service.get_correlations(*JAN)
+
+        assert client.queries == queries
+        assert cache.invalidate(TEST_USER_ID, ["2024-01-05"]) == 1
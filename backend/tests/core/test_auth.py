@@ -0,0 +1,346 @@
+"""
+Tests for token verification in get_current_user.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.auth import get_current_user
+from app.core.token_cache import TokenCache
+from app.core.token_verifier import JWKSCache, LocalTokenVerifier
+from tests.conftest import TEST_USER_ID
+
+
+SECRET = "test-jwt-secret-with-enough-bytes-for-hs256"
+
+
+def make_token(
+    key: Any = SECRET,
+    algorithm: str = "HS256",
+    headers: dict[str, Any] | None = None,
+    **overrides: Any,
+) -> str:
+    """Build a Supabase-shaped access token."""
+    claims = {
+        "sub": TEST_USER_ID,
+        "email": "test@example.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+        "user_metadata": {"full_name": "Test User"},
+        **overrides,
+    }
+    return jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+
+def bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.fixture(autouse=True)
+def token_cache() -> Generator[TokenCache, None, None]:
+    """Give every test its own empty validated-token cache."""
+    cache = TokenCache()
+    with patch("app.core.auth.get_token_cache", return_value=cache):
+        yield cache
+
+
+class TestLocalVerification:
+    """get_current_user with a local verifier configured."""
+
+    @pytest.fixture
+    def remote(self) -> MagicMock:
+        return MagicMock()
+
+    async def authenticate(
+        self, token: str, remote: MagicMock, verifier: LocalTokenVerifier | None
+    ) -> dict[str, Any]:
+        with patch("app.core.auth.get_token_verifier", return_value=verifier):
+            return await get_current_user(bearer(token), remote)
+
+    async def test_valid_token_skips_remote_call(self, remote: MagicMock) -> None:
+        """A correctly signed token is accepted without calling Supabase Auth."""
+        token = make_token()
+        user = await self.authenticate(token, remote, LocalTokenVerifier(jwt_secret=SECRET))
+
+        assert user["id"] == TEST_USER_ID
+        assert user["email"] == "test@example.com"
+        assert user["user_metadata"] == {"full_name": "Test User"}
+        assert user["access_token"] == token
+        remote.auth.get_user.assert_not_called()
+
+    async def test_expired_token_rejected(self, remote: MagicMock) -> None:
+        """Expired tokens are rejected locally with the expiry message."""
+        token = make_token(exp=int(time.time()) - 60)
+
+        with pytest.raises(HTTPException) as exc:
+            await self.authenticate(token, remote, LocalTokenVerifier(jwt_secret=SECRET))
+
+        assert exc.value.status_code == 401
+        assert "expired" in exc.value.detail.lower()
+        remote.auth.get_user.assert_not_called()
+
+    async def test_bad_signature_rejected(self, remote: MagicMock) -> None:
+        """Tokens signed with another secret are rejected locally."""
+        token = make_token(key="some-other-secret-with-enough-bytes-too")
+
+        with pytest.raises(HTTPException) as exc:
+            await self.authenticate(token, remote, LocalTokenVerifier(jwt_secret=SECRET))
+
+        assert exc.value.status_code == 401
+        remote.auth.get_user.assert_not_called()
+
+    async def test_wrong_audience_rejected(self, remote: MagicMock) -> None:
+        """Tokens minted for another audience are rejected."""
+        token = make_token(aud="anon")
+
+        with pytest.raises(HTTPException):
+            await self.authenticate(token, remote, LocalTokenVerifier(jwt_secret=SECRET))
+
+    async def test_falls_back_to_remote_without_key(self, remote: MagicMock) -> None:
+        """Without a secret for the token's algorithm, Supabase Auth is asked."""
+        remote.auth.get_user.return_value.user.id = TEST_USER_ID
+        token = make_token()
+
+        user = await self.authenticate(token, remote, LocalTokenVerifier())
+
+        assert user["id"] == TEST_USER_ID
+        remote.auth.get_user.assert_called_once_with(token)
+
+    async def test_remote_mode_uses_supabase_auth(self, remote: MagicMock) -> None:
+        """With no verifier configured, every token goes to Supabase Auth."""
+        remote.auth.get_user.return_value.user.id = TEST_USER_ID
+
+        await self.authenticate(make_token(), remote, None)
+
+        remote.auth.get_user.assert_called_once()
+
+
+class TestJWKSCache:
+    """Tests for JWKS-based verification and key caching."""
+
+    @pytest.fixture
+    def private_key(self) -> rsa.RSAPrivateKey:
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    @pytest.fixture
+    def jwks_document(self, private_key: rsa.RSAPrivateKey) -> dict[str, Any]:
+        jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+        return {"keys": [{**jwk, "kid": "key-1", "alg": "RS256", "use": "sig"}]}
+
+    def test_verifies_rs256_token(
+        self, private_key: rsa.RSAPrivateKey, jwks_document: dict[str, Any]
+    ) -> None:
+        """RS256 tokens are verified against the published key set."""
+        fetch = MagicMock(return_value=jwks_document)
+        verifier = LocalTokenVerifier(jwks=JWKSCache("https://jwks.test", fetch=fetch))
+        token = make_token(private_key, "RS256", headers={"kid": "key-1"})
+
+        claims = verifier.verify(token)
+
+        assert claims is not None
+        assert claims["sub"] == TEST_USER_ID
+
+    def test_key_set_is_cached(
+        self, private_key: rsa.RSAPrivateKey, jwks_document: dict[str, Any]
+    ) -> None:
+        """The key set is fetched once and reused across verifications."""
+        fetch = MagicMock(return_value=jwks_document)
+        verifier = LocalTokenVerifier(jwks=JWKSCache("https://jwks.test", fetch=fetch))
+        token = make_token(private_key, "RS256", headers={"kid": "key-1"})
+
+        for _ in range(5):
+            verifier.verify(token)
+
+        fetch.assert_called_once()
+
+    def test_unknown_kid_returns_none(
+        self, private_key: rsa.RSAPrivateKey, jwks_document: dict[str, Any]
+    ) -> None:
+        """An unknown key id means the verifier cannot decide."""
+        fetch = MagicMock(return_value=jwks_document)
+        verifier = LocalTokenVerifier(jwks=JWKSCache("https://jwks.test", fetch=fetch))
+        token = make_token(private_key, "RS256", headers={"kid": "rotated"})
+
+        assert verifier.verify(token) is None
+
+    def test_fetch_failure_returns_none(self, private_key: rsa.RSAPrivateKey) -> None:
+        """When the key set cannot be fetched, the verifier defers to remote."""
+        fetch = MagicMock(side_effect=OSError("network down"))
+        verifier = LocalTokenVerifier(jwks=JWKSCache("https://jwks.test", fetch=fetch))
+        token = make_token(private_key, "RS256", headers={"kid": "key-1"})
+
+        assert verifier.verify(token) is None
+
+    def test_stale_keys_served_while_refreshing(self, jwks_document: dict[str, Any]) -> None:
+        """A stale cache keeps serving keys while refreshing in the background."""
+        fetch = MagicMock(return_value=jwks_document)
+        cache = JWKSCache("https://jwks.test", ttl_seconds=0, fetch=fetch)
+        cache.refresh()
+
+        with patch.object(cache, "_refresh_in_background") as background:
+            key = cache.get_signing_key("key-1")
+
+        assert key is not None
+        background.assert_called_once()
+
+    async def test_key_fetch_runs_off_the_event_loop(
+        self, private_key: rsa.RSAPrivateKey, jwks_document: dict[str, Any]
+    ) -> None:
+        """Only a request that has to fetch the key set leaves the loop's thread."""
+        threads: list[int] = []
+
+        def fetch(_url: str) -> dict[str, Any]:
+            threads.append(threading.get_ident())
+            return jwks_document
+
+        verifier = LocalTokenVerifier(jwks=JWKSCache("https://jwks.test", fetch=fetch))
+        token = make_token(private_key, "RS256", headers={"kid": "key-1"})
+
+        with patch("app.core.auth.get_token_verifier", return_value=verifier):
+            user = await get_current_user(bearer(token), MagicMock())
+
+        assert user["id"] == TEST_USER_ID
+        assert threads
+        assert threads[0] != threading.get_ident()
+        assert not verifier.needs_network(token)
+
+    def test_prefetch_loads_keys_in_background(self, jwks_document: dict[str, Any]) -> None:
+        """After a prefetch, lookups find the key without fetching."""
+        loaded = threading.Event()
+
+        def fetch(_url: str) -> dict[str, Any]:
+            loaded.set()
+            return jwks_document
+
+        cache = JWKSCache("https://jwks.test", fetch=fetch)
+        cache.prefetch()
+        assert loaded.wait(5)
+        for _ in range(100):
+            if cache.get_signing_key("key-1") is not None:
+                break
+            time.sleep(0.01)
+
+        assert cache.get_signing_key("key-1") is not None
+        assert not cache.needs_fetch("key-1")
+
+
+class TestTokenCache:
+    """Tests for the validated-token cache."""
+
+    async def test_repeat_requests_hit_cache(self, token_cache: TokenCache) -> None:
+        """Only the first request with a token reaches Supabase Auth."""
+        remote = MagicMock()
+        remote.auth.get_user.return_value.user.id = TEST_USER_ID
+        token = make_token()
+
+        with patch("app.core.auth.get_token_verifier", return_value=None):
+            for _ in range(3):
+                await get_current_user(bearer(token), remote)
+
+        remote.auth.get_user.assert_called_once()
+        assert token_cache.stats()["hits"] == 2
+
+    async def test_concurrent_validations_are_coalesced(self, token_cache: TokenCache) -> None:
+        """Concurrent lookups for the same token share one validation."""
+        calls = 0
+
+        async def load() -> dict[str, Any]:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": TEST_USER_ID}
+
+        token = make_token()
+        results = await asyncio.gather(*(token_cache.get_or_load(token, load) for _ in range(5)))
+
+        assert calls == 1
+        assert all(r == {"id": TEST_USER_ID} for r in results)
+        assert token_cache.stats()["coalesced"] == 4
+
+    async def test_failures_are_not_cached(self, token_cache: TokenCache) -> None:
+        """A failed validation is retried on the next request."""
+        load = MagicMock(side_effect=[RuntimeError("boom"), {"id": TEST_USER_ID}])
+
+        async def run() -> dict[str, Any]:
+            return load()
+
+        token = make_token()
+        with pytest.raises(RuntimeError):
+            await token_cache.get_or_load(token, run)
+
+        assert await token_cache.get_or_load(token, run) == {"id": TEST_USER_ID}
+
+    async def test_finished_load_keeps_newer_inflight_task(self, token_cache: TokenCache) -> None:
+        """A load from another event loop finishing does not drop this loop's load."""
+        token = make_token()
+        key = token_cache.key_for(token)
+        release = asyncio.Event()
+
+        async def slow() -> dict[str, Any]:
+            await asyncio.sleep(0.05)
+            return {"id": "other-loop"}
+
+        async def gated() -> dict[str, Any]:
+            await release.wait()
+            return {"id": TEST_USER_ID}
+
+        other = threading.Thread(target=asyncio.run, args=(token_cache.get_or_load(token, slow),))
+        other.start()
+        while key not in token_cache._inflight:
+            await asyncio.sleep(0.001)
+        pending = asyncio.ensure_future(token_cache.get_or_load(token, gated))
+        await asyncio.sleep(0)
+        task = token_cache._inflight[key]
+        await asyncio.to_thread(other.join)
+
+        assert token_cache._inflight.get(key) is task
+        release.set()
+        assert await pending == {"id": TEST_USER_ID}
+        assert key not in token_cache._inflight
+
+    def test_entry_expires_with_token(self, token_cache: TokenCache) -> None:
+        """Entries never outlive the token's exp claim."""
+        token = make_token(exp=int(time.time()) - 1)
+        token_cache.set(token, {"id": TEST_USER_ID})
+
+        assert token_cache.get(token) is None
+        assert token_cache.stats()["expirations"] == 1
+
+    def test_stats_are_logged_periodically(self, caplog: pytest.LogCaptureFixture) -> None:
+        """Counters, hits included, are logged once per interval rather than per lookup."""
+        cache = TokenCache(stats_interval_seconds=60)
+        cache._next_stats_at = 0
+        token = make_token()
+        cache.set(token, {"id": TEST_USER_ID})
+
+        with caplog.at_level("INFO", logger="morning_routine"):
+            for _ in range(3):
+                cache.get(token)
+
+        logged = [r for r in caplog.records if "token cache" in r.getMessage()]
+        assert len(logged) == 1
+        assert "'hits': 1" in logged[0].getMessage()
+        assert cache.stats()["hit_rate"] == 1.0
+
+    def test_lru_eviction_respects_max_entries(self) -> None:
+        """The least recently used entry is evicted once the cap is reached."""
+        cache = TokenCache(max_entries=2)
+        tokens = [make_token(sub=f"user-{i}") for i in range(3)]
+        cache.set(tokens[0], {"id": "user-0"})
+        cache.set(tokens[1], {"id": "user-1"})
+        cache.get(tokens[0])
+        cache.set(tokens[2], {"id": "user-2"})
+
+        assert cache.get(tokens[1]) is None
+        assert cache.get(tokens[0]) == {"id": "user-0"}
+        assert cache.stats()["evictions"] == 1
@@ -0,0 +1,27 @@
+"""
+Tests for weak ETags and conditional GET matching.
+"""
+
+from app.core.etag import etag_matches, weak_etag
+
+
+class TestEtag:
+    """Unit tests for the ETag helpers."""
+
+    def test_weak_etag_is_stable(self) -> None:
+        assert weak_etag("a", 1) == weak_etag("a", 1)
+        assert weak_etag("a", 1) != weak_etag("a", 2)
+        assert weak_etag("a").startswith('W/"')
+
+    def test_weak_comparison(self) -> None:
+        """Weak and strong forms of the same tag match."""
+        etag = weak_etag("x")
+
+        assert etag_matches(etag, etag)
+        assert etag_matches(etag.removeprefix("W/"), etag)
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+
+    def test_no_match(self) -> None:
+        assert not etag_matches(None, weak_etag("x"))
+        assert not etag_matches(weak_etag("y"), weak_etag("x"))
@@ -0,0 +1,144 @@
+"""
+Tests for the background import job store and in-process runner.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.import_jobs import AsyncioImportJobRunner, ImportJobStore
+
+
+class TestImportJobStore:
+    """Jobs are persisted per user as JSON files."""
+
+    @pytest.fixture
+    def store(self, tmp_path: Path) -> ImportJobStore:
+        return ImportJobStore(tmp_path / "jobs")
+
+    def test_create_and_get(self, store: ImportJobStore) -> None:
+        job = store.create("user-1", "routines.csv", "update")
+
+        loaded = store.get("user-1", job.id)
+
+        assert loaded == job
+        assert loaded.status == "queued"
+        assert loaded.on_conflict == "update"
+
+    def test_jobs_survive_a_new_store(self, store: ImportJobStore) -> None:
+        job = store.create("user-1", "routines.csv", "error")
+        job.status = "running"
+        job.rows_parsed = 500
+        store.save("user-1", job)
+
+        reopened = ImportJobStore(store.directory)
+
+        assert reopened.get("user-1", job.id).rows_parsed == 500
+
+    def test_other_users_cannot_read_a_job(self, store: ImportJobStore) -> None:
+        job = store.create("user-1", "routines.csv", "error")
+
+        assert store.get("user-2", job.id) is None
+
+    def test_unknown_and_malformed_ids(self, store: ImportJobStore) -> None:
+        assert store.get("user-1", "0" * 32) is None
+        assert store.get("user-1", "../../etc/passwd") is None
+
+    def test_save_leaves_no_temporary_file(self, store: ImportJobStore) -> None:
+        job = store.create("user-1", "routines.csv", "error")
+
+        assert [p.name for p in store.directory.iterdir()] == [f"{job.id}.json"]
+
+
+class TestJobExpiry:
+    """Jobs not written for ``ttl_seconds`` are deleted on the next create."""
+
+    def _age(self, store: ImportJobStore, job_id: str, seconds: float) -> None:
+        then = time.time() - seconds
+        os.utime(store.directory / f"{job_id}.json", (then, then))
+
+    def test_expired_jobs_are_removed_with_their_upload(self, tmp_path: Path) -> None:
+        store = ImportJobStore(tmp_path, ttl_seconds=3600)
+        old = store.create("user-1", "old.csv", "error")
+        store.upload_path(old.id).write_text("date\n")
+        recent = store.create("user-1", "recent.csv", "error")
+        self._age(store, old.id, 7200)
+
+        new = store.create("user-1", "new.csv", "error")
+
+        assert store.get("user-1", old.id) is None
+        assert not store.upload_path(old.id).exists()
+        assert store.get("user-1", recent.id) == recent
+        assert store.get("user-1", new.id) == new
+
+    def test_zero_ttl_keeps_every_job(self, tmp_path: Path) -> None:
+        store = ImportJobStore(tmp_path)
+        job = store.create("user-1", "old.csv", "error")
+        self._age(store, job.id, 365 * 86400)
+
+        assert store.prune() == 0
+        assert store.get("user-1", job.id) == job
+
+
+class TestAsyncioImportJobRunner:
+    """Submitted jobs run off the event loop, ``workers`` at a time."""
+
+    async def test_runs_jobs_in_a_worker_thread(self) -> None:
+        runner = AsyncioImportJobRunner()
+        threads: list[int] = []
+
+        runner.submit(lambda: threads.append(threading.get_ident()))
+        await runner.join()
+
+        assert threads
+        assert threads[0] != threading.get_ident()
+
+    async def test_workers_limit_concurrency(self) -> None:
+        runner = AsyncioImportJobRunner(workers=2)
+        lock = threading.Lock()
+        running = peak = 0
+
+        def job() -> None:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            threading.Event().wait(0.02)
+            with lock:
+                running -= 1
+
+        for _ in range(6):
+            runner.submit(job)
+        await runner.join()
+
+        assert peak == 2
+
+    async def test_failed_job_does_not_stop_the_worker(self) -> None:
+        runner = AsyncioImportJobRunner()
+        done: list[str] = []
+
+        def crash() -> None:
+            raise RuntimeError("boom")
+
+        runner.submit(crash)
+        runner.submit(lambda: done.append("second"))
+        await runner.join()
+
+        assert done == ["second"]
+
+    def test_restarts_on_a_new_loop(self) -> None:
+        runner = AsyncioImportJobRunner()
+        done: list[int] = []
+
+        async def run_one(n: int) -> None:
+            runner.submit(lambda: done.append(n))
+            await runner.join()
+
+        asyncio.run(run_one(1))
+        asyncio.run(run_one(2))
+
+        assert done == [1, 2]
@@ -0,0 +1,32 @@
+"""
+Tests for user-scoped PostgREST client construction.
+"""
+
+from app.core.supabase import get_authenticated_supabase, get_http_client
+
+
+class TestAuthenticatedClient:
+    """Tests for get_authenticated_supabase."""
+
+    def test_clients_share_one_connection_pool(self) -> None:
+        """Every user client reuses the same pooled HTTP transport."""
+        first = get_authenticated_supabase("token-a")
+        second = get_authenticated_supabase("token-b")
+
+        assert first.session is second.session
+        assert first.session is get_http_client()
+
+    def test_token_is_attached_as_header(self) -> None:
+        """The user's JWT travels as a per-client Authorization header."""
+        client = get_authenticated_supabase("token-a")
+
+        assert client.headers["Authorization"] == "Bearer token-a"
+        assert "apikey" in client.headers
+
+    def test_headers_are_not_shared_between_users(self) -> None:
+        """Authenticating one client never leaks into another."""
+        first = get_authenticated_supabase("token-a")
+        get_authenticated_supabase("token-b")
+
+        assert first.headers["Authorization"] == "Bearer token-a"
+        assert "Authorization" not in get_http_client().headers
@@ -143,6 +143,27 @@ class TestMorningRoutineModels:
             )
             assert routine.breakfast_quality == quality
 
+    def test_routine_wake_time_format(self) -> None:
+        """Test wake time must be HH:MM, optionally with seconds."""
+        for wake_time in ["06:30", "23:59", "06:30:00"]:
+            routine = MorningRoutineCreate(
+                date=date.today(),
+                wake_time=wake_time,
+                sleep_duration_hours=8.0,
+                morning_mood=7,
+            )
+            assert routine.wake_time == wake_time
+
+        for wake_time in ["6:30", "24:00", "06:60", "morning"]:
+            with pytest.raises(ValidationError) as exc_info:
+                MorningRoutineCreate(
+                    date=date.today(),
+                    wake_time=wake_time,
+                    sleep_duration_hours=8.0,
+                    morning_mood=7,
+                )
+            assert "wake_time" in str(exc_info.value)
+
     def test_routine_update_partial(self) -> None:
         """Test update model allows partial updates."""
         update = MorningRoutineUpdate(
@@ -0,0 +1,184 @@
+"""
+Tests for AsyncAnalyticsService and its aggregation helpers.
+"""
+
+from datetime import date
+from typing import ClassVar
+
+from app.services.analytics_service import (
+    AsyncAnalyticsService,
+    SummaryAggregator,
+    build_summary,
+    summary_from_rpc,
+)
+from tests.conftest import TEST_USER_ID, MockSupabaseClient
+
+
+def _productivity(scores: list[int]) -> list[dict]:
+    return [
+        {"date": f"2024-01-{i + 1:02d}", "productivity_score": s, "energy_level": 5}
+        for i, s in enumerate(scores)
+    ]
+
+
+class TestBuildSummary:
+    """Unit tests for the single-pass summary aggregation."""
+
+    def test_empty_ranges(self) -> None:
+        """No rows yields zero averages and no best/worst day."""
+        summary = build_summary([], [])
+
+        assert summary.avg_productivity == 0
+        assert summary.avg_sleep == 0
+        assert summary.total_entries == 0
+        assert summary.best_day is None
+        assert summary.worst_day is None
+        assert summary.productivity_trend == "stable"
+
+    def test_averages(self) -> None:
+        """Averages are computed per table and rounded to two decimals."""
+        routines = [
+            {"sleep_duration_hours": 7.0, "exercise_minutes": 30, "morning_mood": 6},
+            {"sleep_duration_hours": 8.0, "exercise_minutes": 0, "morning_mood": 7},
+            {"sleep_duration_hours": 6.5, "exercise_minutes": 45, "morning_mood": 9},
+        ]
+        productivity = [
+            {"date": "2024-01-01", "productivity_score": 6, "energy_level": 5},
+            {"date": "2024-01-02", "productivity_score": 9, "energy_level": 8},
+            {"date": "2024-01-03", "productivity_score": 4, "energy_level": 3},
+        ]
+
+        summary = build_summary(routines, productivity)
+
+        assert summary.avg_sleep == 7.17
+        assert summary.avg_exercise == 25
+        assert summary.avg_mood == 7.33
+        assert summary.avg_productivity == 6.33
+        assert summary.avg_energy == 5.33
+        assert summary.total_entries == 3
+        assert summary.best_day == "2024-01-02"
+        assert summary.worst_day == "2024-01-03"
+
+    def test_ties_keep_earliest_day(self) -> None:
+        """Best and worst day match max()/min() on ties: first occurrence wins."""
+        summary = build_summary([], _productivity([5, 8, 8, 5]))
+
+        assert summary.best_day == "2024-01-02"
+        assert summary.worst_day == "2024-01-01"
+
+    def test_trend(self) -> None:
+        """Trend compares first and second half averages with a 10% band."""
+        assert build_summary([], _productivity([4, 4, 8, 8])).productivity_trend == "up"
+        assert build_summary([], _productivity([8, 8, 4, 4])).productivity_trend == "down"
+        assert build_summary([], _productivity([5, 5, 5, 5])).productivity_trend == "stable"
+        assert build_summary([], _productivity([1, 10, 10])).productivity_trend == "stable"
+
+    def test_trend_odd_length(self) -> None:
+        """With an odd count the extra row belongs to the second half."""
+        aggregator = SummaryAggregator()
+        for row in _productivity([5, 5, 5, 5, 10]):
+            aggregator.add_productivity(row)
+
+        # First half: [5, 5] -> 5.0; second half: [5, 5, 10] -> 6.67.
+        assert aggregator.trend() == "up"
+
+
+class TestDatabaseSummarySource:
+    """The summary can be computed by the analytics_summary Postgres function."""
+
+    RPC_ROW: ClassVar[dict] = {
+        "avg_productivity": 6.33,
+        "avg_sleep": 7.17,
+        "avg_exercise": 25,
+        "avg_mood": 7.33,
+        "avg_energy": 5.33,
+        "total_entries": 3,
+        "best_day": "2024-01-02",
+        "worst_day": "2024-01-03",
+        "productivity_trend": "stable",
+    }
+
+    async def test_async_service_uses_rpc(self) -> None:
+        """The service returns the RPC row as an AnalyticsSummary."""
+        service = AsyncAnalyticsService(
+            MockSupabaseClient(data=[self.RPC_ROW]), TEST_USER_ID, summary_source="database"
+        )
+
+        summary = await service.get_summary(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert summary.model_dump() == self.RPC_ROW
+
+    def test_empty_rpc_result(self) -> None:
+        """An empty RPC result matches the empty Python summary."""
+        assert summary_from_rpc([]) == build_summary([], [])
+
+
+class TestRollupChartSource:
+    """Chart data can be read from the user_daily_metrics rollup."""
+
+    ROLLUP_ROW: ClassVar[dict] = {
+        "date": "2024-01-02",
+        "productivity_score": 8,
+        "energy_level": 7,
+        "morning_mood": 6,
+        "sleep_duration_hours": 7.5,
+        "exercise_minutes": 30,
+        "meditation_minutes": None,
+    }
+
+    async def test_async_service_reads_rollup(self) -> None:
+        """Rollup rows map one-to-one onto chart points."""
+        service = AsyncAnalyticsService(
+            MockSupabaseClient(data=[self.ROLLUP_ROW]), TEST_USER_ID, chart_source="rollup"
+        )
+
+        points = await service.get_chart_data(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert [p.model_dump() for p in points] == [self.ROLLUP_ROW]
+
+
+class TestDashboard:
+    """The dashboard derives both sections from one pair of range queries."""
+
+    async def test_one_fetch_feeds_both_sections(self) -> None:
+        """Summary and charts together cost two table queries, not four."""
+        rows = [
+            {
+                "date": "2024-01-01",
+                "sleep_duration_hours": 7.0,
+                "exercise_minutes": 30,
+                "meditation_minutes": 10,
+                "morning_mood": 6,
+                "productivity_score": 8,
+                "energy_level": 7,
+            },
+        ]
+        client = MockSupabaseClient(data=rows)
+        tables = []
+        table = client.table
+        client.table = lambda name: tables.append(name) or table(name)
+        service = AsyncAnalyticsService(client, TEST_USER_ID)
+
+        dashboard = await service.get_dashboard(date(2024, 1, 1), date(2024, 1, 31))
+
+        assert sorted(tables) == ["morning_routines", "productivity_entries"]
+        assert dashboard.summary == build_summary(rows, rows)
+        assert dashboard.charts == await service.get_chart_data(date(2024, 1, 1), date(2024, 1, 31))
+
+    async def test_sections_can_be_omitted(self) -> None:
+        """Sections not in ``include`` are None."""
+        service = AsyncAnalyticsService(MockSupabaseClient(), TEST_USER_ID)
+
+        dashboard = await service.get_dashboard(include=["charts"])
+
+        assert dashboard.summary is None
+        assert dashboard.charts == []
+
+    async def test_separate_sources(self) -> None:
+        """With the rollup, summary and charts are fetched separately."""
+        service = AsyncAnalyticsService(MockSupabaseClient(), TEST_USER_ID, chart_source="rollup")
+
+        dashboard = await service.get_dashboard()
+
+        assert dashboard.summary == build_summary([], [])
+        assert dashboard.charts == []
@@ -0,0 +1,104 @@
+"""
+Tests for concurrent query helpers.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.concurrency import QUERY_POOL_SIZE, gather_queries, run_queries
+
+
+class TestGatherQueries:
+    """Tests for the asyncio helper."""
+
+    async def test_runs_queries_concurrently(self) -> None:
+        """Total latency is the slowest query, not the sum."""
+
+        async def query(value: int) -> int:
+            await asyncio.sleep(0.05)
+            return value
+
+        start = time.perf_counter()
+        results = await gather_queries(query(1), query(2))
+
+        assert results == [1, 2]
+        assert time.perf_counter() - start < 0.09
+
+    async def test_failure_cancels_sibling(self) -> None:
+        """A failing query cancels the other one and re-raises its error."""
+        cancelled = asyncio.Event()
+
+        async def slow() -> None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def failing() -> None:
+            await asyncio.sleep(0)
+            msg = "query failed"
+            raise ValueError(msg)
+
+        with pytest.raises(ValueError, match="query failed"):
+            await gather_queries(slow(), failing())
+
+        assert cancelled.is_set()
+
+
+class TestRunQueries:
+    """Tests for the thread-pool helper."""
+
+    def test_runs_queries_in_parallel(self) -> None:
+        """Blocking queries overlap on the shared pool."""
+
+        def query(value: int) -> int:
+            time.sleep(0.05)
+            return value
+
+        start = time.perf_counter()
+        results = run_queries(lambda: query(1), lambda: query(2))
+
+        assert results == [1, 2]
+        assert time.perf_counter() - start < 0.09
+
+    def test_failure_waits_for_sibling(self) -> None:
+        """The error is raised only after the other query has finished."""
+        finished = threading.Event()
+
+        def slow() -> None:
+            time.sleep(0.05)
+            finished.set()
+
+        def failing() -> None:
+            msg = "query failed"
+            raise ValueError(msg)
+
+        with pytest.raises(ValueError, match="query failed"):
+            run_queries(slow, failing)
+
+        assert finished.is_set()
+
+    def test_nested_calls_do_not_exhaust_the_pool(self) -> None:
+        """More concurrent callers than workers, each nesting run_queries, all finish."""
+
+        def section() -> list[int]:
+            return run_queries(lambda: time.sleep(0.01) or 1, lambda: 2)
+
+        results: list[list] = []
+        callers = [
+            threading.Thread(
+                target=lambda: results.append(run_queries(section, section)), daemon=True
+            )
+            for _ in range(QUERY_POOL_SIZE * 3)
+        ]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join(timeout=5)
+
+        assert not any(caller.is_alive() for caller in callers)
+        assert results == [[[1, 2], [1, 2]]] * len(callers)
@@ -0,0 +1,167 @@
+"""
+Tests for the routine/productivity correlation matrix.
+"""
+
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.services.correlations import (
+    PRODUCTIVITY_METRICS,
+    ROUTINE_METRICS,
+    build_correlations,
+    build_lagged_correlations,
+    lagged_pearson,
+    pairwise_pearson,
+)
+
+
+def _cell(matrix, routine_metric: str, productivity_metric: str):
+    return matrix.coefficients[ROUTINE_METRICS.index(routine_metric)][
+        PRODUCTIVITY_METRICS.index(productivity_metric)
+    ]
+
+
+class TestPairwisePearson:
+    """Unit tests for the vectorized pairwise Pearson kernel."""
+
+    def test_matches_pandas_with_missing_values(self) -> None:
+        """Pairwise deletion gives the same result as pandas' Series.corr."""
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=(50, 3))
+        y = rng.normal(size=(50, 2)) + x[:, :2]
+        x[rng.random(x.shape) < 0.2] = np.nan
+        y[rng.random(y.shape) < 0.2] = np.nan
+
+        r, n = pairwise_pearson(x, y)
+
+        for i in range(3):
+            for j in range(2):
+                expected = pd.Series(x[:, i]).corr(pd.Series(y[:, j]))
+                assert math.isclose(r[i, j], expected, abs_tol=1e-9)
+                assert n[i, j] == int((~np.isnan(x[:, i]) & ~np.isnan(y[:, j])).sum())
+
+    def test_constant_column_is_undefined(self) -> None:
+        """A column with no variance has no correlation."""
+        x = np.array([[1.0], [1.0], [1.0], [1.0]])
+        y = np.array([[1.0], [2.0], [3.0], [4.0]])
+
+        r, _ = pairwise_pearson(x, y)
+
+        assert np.isnan(r[0, 0])
+
+
+class TestBuildCorrelations:
+    """Tests for the correlation matrix built from fetched rows."""
+
+    def test_perfect_relationship_and_counts(self) -> None:
+        """Sleep tracking productivity exactly gives r = 1 over the shared days."""
+        routines = [
+            {"date": f"2024-01-0{d}", "sleep_duration_hours": 5 + d, "morning_mood": 5}
+            for d in range(1, 6)
+        ]
+        productivity = [
+            {"date": f"2024-01-0{d}", "productivity_score": d, "energy_level": 10 - d}
+            for d in range(2, 8)
+        ]
+
+        matrix = build_correlations(routines, productivity)
+
+        assert matrix.total_days == 7
+        assert _cell(matrix, "sleep_duration_hours", "productivity_score") == 1.0
+        assert _cell(matrix, "sleep_duration_hours", "energy_level") == -1.0
+        sleep = ROUTINE_METRICS.index("sleep_duration_hours")
+        assert matrix.sample_counts[sleep][PRODUCTIVITY_METRICS.index("productivity_score")] == 4
+        # Constant mood and never-logged metrics have no coefficient.
+        assert _cell(matrix, "morning_mood", "productivity_score") is None
+        assert _cell(matrix, "caffeine_intake", "productivity_score") is None
+
+    def test_too_few_samples(self) -> None:
+        """Pairs with fewer than three shared days are not reported."""
+        routines = [{"date": "2024-01-01", "sleep_duration_hours": 7}]
+        productivity = [{"date": "2024-01-01", "productivity_score": 7}]
+
+        matrix = build_correlations(routines, productivity)
+
+        assert _cell(matrix, "sleep_duration_hours", "productivity_score") is None
+
+    def test_empty_range(self) -> None:
+        """No data yields an all-None matrix of the full shape."""
+        matrix = build_correlations([], [])
+
+        assert matrix.total_days == 0
+        assert len(matrix.coefficients) == len(ROUTINE_METRICS)
+        assert all(c is None for row in matrix.coefficients for c in row)
+
+
+class TestLaggedPearson:
+    """Unit tests for the FFT lagged cross-correlation kernel."""
+
+    def test_matches_naive_per_lag_loop(self) -> None:
+        """Every lag agrees with shifting the series and calling pandas."""
+        rng = np.random.default_rng(1)
+        x = rng.normal(size=(120, 2))
+        y = rng.normal(size=(120, 3))
+        y[3:, 0] += x[:-3, 1]
+        x[rng.random(x.shape) < 0.15] = np.nan
+        y[rng.random(y.shape) < 0.15] = np.nan
+
+        r, n = lagged_pearson(x, y, 14)
+
+        assert r.shape == (15, 2, 3)
+        for k in range(15):
+            for i in range(2):
+                for j in range(3):
+                    habit = pd.Series(x[: len(x) - k, i])
+                    outcome = pd.Series(y[k:, j])
+                    assert math.isclose(r[k, i, j], habit.corr(outcome), abs_tol=1e-9)
+                    assert n[k, i, j] == int((habit.notna() & outcome.notna()).sum())
+
+    def test_constant_series_stays_undefined(self) -> None:
+        """FFT rounding does not turn a constant column into a correlation."""
+        x = np.full((60, 1), 2000.0)
+        y = np.arange(60.0).reshape(-1, 1)
+
+        r, _ = lagged_pearson(x, y, 5)
+
+        assert np.isnan(r).all()
+
+
+class TestBuildLaggedCorrelations:
+    """Tests for lagged correlations built from fetched rows."""
+
+    def test_lag_is_measured_in_calendar_days(self) -> None:
+        """Unlogged days keep their place, so a 2-day effect peaks at lag 2."""
+        start = date(2024, 1, 1)
+        sleep = [6, 8, 5, 9, 7, 6, 8, 5, 7, 9, 6, 8, 7, 5, 9, 6, 7, 8, 5, 9]
+        routines = [
+            {"date": (start + timedelta(days=i)).isoformat(), "sleep_duration_hours": s}
+            for i, s in enumerate(sleep)
+            if i != 10
+        ]
+        productivity = [
+            {
+                "date": (start + timedelta(days=i + 2)).isoformat(),
+                "focus_hours": s / 2,
+            }
+            for i, s in enumerate(sleep)
+            if i != 10
+        ]
+
+        result = build_lagged_correlations(routines, productivity, max_lag=4)
+
+        sleep_row = ROUTINE_METRICS.index("sleep_duration_hours")
+        focus = PRODUCTIVITY_METRICS.index("focus_hours")
+        by_lag = [result.coefficients[k][sleep_row][focus] for k in result.lags]
+        assert by_lag[2] == 1.0
+        assert all(abs(c) < 1.0 for k, c in enumerate(by_lag) if k != 2)
+        assert result.total_days == 22
+
+    def test_empty_range(self) -> None:
+        """No data yields empty counts for every lag."""
+        result = build_lagged_correlations([], [], max_lag=3)
+
+        assert result.lags == [0, 1, 2, 3]
+        assert all(c == 0 for lag in result.sample_counts for row in lag for c in row)
@@ -0,0 +1,471 @@
+"""
+Tests for batched CSV import.
+"""
+
+import io
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pandas as pd
+import pytest
+from postgrest import ReturnMethod
+from postgrest.exceptions import APIError
+
+from app.core.import_jobs import ImportJobStore
+from app.services.csv_import import (
+    CONFLICT_COLUMNS,
+    MAX_IMPORT_ERRORS,
+    CSVImporter,
+    OnConflict,
+    import_tables,
+    run_import_job,
+)
+from tests.conftest import TEST_USER_ID
+
+
+# What a column missing from a bulk upsert record is set to.
+COLUMN_DEFAULT = "<default>"
+
+
+class InsertQuery:
+    """Bulk insert that fails as a whole when any record is rejected."""
+
+    def __init__(self, client: "RecordingClient", table: str):
+        self.client = client
+        self.table = table
+        self.records: list[dict[str, Any]] = []
+        self.upsert_mode: str | None = None
+
+    def insert(self, records: list[dict[str, Any]], **kwargs: Any) -> "InsertQuery":
+        self.records = records
+        self.client.insert_kwargs = kwargs
+        return self
+
+    def upsert(self, records: list[dict[str, Any]], **kwargs: Any) -> "InsertQuery":
+        self.upsert_mode = "skip" if kwargs["ignore_duplicates"] else "update"
+        return self.insert(records, **kwargs)
+
+    def execute(self) -> SimpleNamespace:
+        self.client.requests.append((self.table, len(self.records)))
+        stored = self.client.rows[self.table]
+        existing = {r["date"]: i for i, r in enumerate(stored)}
+        bad = [r for r in self.records if r["date"] in self.client.rejected_dates]
+        if self.upsert_mode is None:
+            bad += [r for r in self.records if r["date"] in existing]
+        if bad:
+            raise APIError({"message": f"duplicate key for {bad[0]['date']}", "code": "23505"})
+        # Like PostgREST, a bulk request sets every column any record has.
+        columns = dict.fromkeys(key for record in self.records for key in record)
+        inserted = []
+        for record in self.records:
+            if record["date"] not in existing:
+                existing[record["date"]] = len(stored)
+                stored.append(record)
+                inserted.append(record)
+            elif self.upsert_mode == "update":
+                merged = {column: record.get(column, COLUMN_DEFAULT) for column in columns}
+                stored[existing[record["date"]]] |= merged
+        returned = self.client.insert_kwargs["returning"] == ReturnMethod.representation
+        return SimpleNamespace(data=inserted if returned else [])
+
+
+class RecordingClient:
+    """PostgREST stand-in that stores inserted rows per table."""
+
+    def __init__(self, rejected_dates: set[str] | None = None):
+        self.rejected_dates = rejected_dates or set()
+        self.rows: dict[str, list[dict[str, Any]]] = {
+            "morning_routines": [],
+            "productivity_entries": [],
+        }
+        self.requests: list[tuple[str, int]] = []
+        self.insert_kwargs: dict[str, Any] = {}
+
+    def table(self, name: str) -> InsertQuery:
+        return InsertQuery(self, name)
+
+
+def _days(n: int) -> list[str]:
+    return [d.date().isoformat() for d in pd.date_range("2024-01-01", periods=n)]
+
+
+def _routines(n: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": _days(n),
+            "wake_time": "06:30",
+            "sleep_duration_hours": 7.5,
+            "morning_mood": 7,
+        }
+    )
+
+
+class TestImportTables:
+    """The CSV's columns pick the target tables."""
+
+    def test_routine_columns(self) -> None:
+        assert import_tables({"date", "wake_time", "sleep_duration_hours", "morning_mood"}) == (
+            "morning_routines",
+        )
+
+    def test_productivity_columns(self) -> None:
+        assert import_tables({"date", "productivity_score", "energy_level"}) == (
+            "productivity_entries",
+        )
+
+    def test_partial_columns_split(self) -> None:
+        assert import_tables({"date", "wake_time", "focus_hours"}) == (
+            "morning_routines",
+            "productivity_entries",
+        )
+
+    def test_both_signatures_split(self) -> None:
+        columns = {"date", "wake_time", "sleep_duration_hours", "morning_mood"}
+        columns |= {"productivity_score", "energy_level"}
+
+        assert len(import_tables(columns)) == 2
+
+
+class TestCSVImporter:
+    """Rows go out in bulk and failures are narrowed to single rows."""
+
+    def test_rows_sent_in_batches(self) -> None:
+        client = RecordingClient()
+        importer = CSVImporter(client, TEST_USER_ID, batch_size=4)
+
+        importer.import_frame(_routines(10))
+        result = importer.result()
+
+        assert client.requests == [
+            ("morning_routines", 4),
+            ("morning_routines", 4),
+            ("morning_routines", 2),
+        ]
+        assert result.success
+        assert result.imported_count == 10
+        assert result.batches_sent == 3
+        assert result.elapsed_seconds >= 0
+        assert all(r["user_id"] == TEST_USER_ID for r in client.rows["morning_routines"])
+        assert client.insert_kwargs["default_to_null"] is False
+
+    def test_failed_batch_is_split_to_the_bad_row(self) -> None:
+        client = RecordingClient(rejected_dates={"2024-01-06"})
+        importer = CSVImporter(client, TEST_USER_ID, batch_size=8)
+
+        importer.import_frame(_routines(8))
+        result = importer.result()
+
+        assert not result.success
+        assert result.imported_count == 7
+        assert result.failed_count == 1
+        assert result.errors[0].startswith("Row 6:")
+        assert "duplicate key for 2024-01-06" in result.errors[0]
+        assert len(client.rows["morning_routines"]) == 7
+        # 8 -> 4 + 4 -> (4 ok) 2 + 2 -> (2 ok) 1 + 1
+        assert result.batches_sent == 7
+
+    def test_nan_fields_are_dropped(self) -> None:
+        client = RecordingClient()
+        df = _routines(2)
+        df["exercise_minutes"] = [30, None]
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_frame(df)
+
+        first, second = client.rows["morning_routines"]
+        assert first["exercise_minutes"] == 30
+        assert "exercise_minutes" not in second
+
+    def test_mixed_csv_writes_both_tables(self) -> None:
+        client = RecordingClient()
+        df = _routines(3)
+        df.loc[1, ["wake_time", "sleep_duration_hours", "morning_mood"]] = None
+        df["productivity_score"] = [8, 7, None]
+        df["energy_level"] = [6, 5, None]
+        df["stress_level"] = [4, 3, None]
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_frame(df)
+
+        assert [r["date"] for r in client.rows["morning_routines"]] == _days(3)[::2]
+        assert [r["date"] for r in client.rows["productivity_entries"]] == _days(3)[:2]
+        assert "wake_time" not in client.rows["productivity_entries"][0]
+        assert importer.result().batches_sent == 2
+
+    def test_failure_in_either_table_fails_the_row_once(self) -> None:
+        client = RecordingClient(rejected_dates={"2024-01-02"})
+        df = _routines(3).assign(productivity_score=8, energy_level=6, stress_level=4)
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_frame(df)
+        result = importer.result()
+
+        assert result.failed_count == 1
+        assert result.imported_count == 2
+        assert len(result.errors) == 1
+
+    def test_invalid_rows_are_rejected_before_sending(self) -> None:
+        client = RecordingClient()
+        df = _routines(4)
+        df["morning_mood"] = [7, 11, 8, 9]
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_frame(df)
+        result = importer.result()
+
+        assert client.requests == [("morning_routines", 3)]
+        assert result.failed_count == 1
+        assert result.errors == ["Row 2: morning_mood must be between 1 and 10"]
+        assert "2024-01-02" not in importer.touched_dates
+
+    def test_unknown_columns_are_not_sent(self) -> None:
+        client = RecordingClient()
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_frame(_routines(1).assign(id="old-id", created_at="2024-01-01"))
+
+        assert set(client.rows["morning_routines"][0]) == {
+            "date",
+            "user_id",
+            "wake_time",
+            "sleep_duration_hours",
+            "morning_mood",
+        }
+
+    def test_errors_are_truncated(self) -> None:
+        days = _days(MAX_IMPORT_ERRORS + 5)
+        client = RecordingClient(rejected_dates=set(days))
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_frame(_routines(len(days)))
+        result = importer.result()
+
+        assert result.failed_count == len(days)
+        assert len(result.errors) == MAX_IMPORT_ERRORS + 1
+        assert result.errors[-1] == "... (more errors truncated)"
+
+    def test_touched_dates_include_failed_rows(self) -> None:
+        client = RecordingClient(rejected_dates={"2024-01-02"})
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_frame(_routines(3))
+
+        assert importer.touched_dates == set(_days(3))
+
+
+class TestOnConflict:
+    """Rows for days that already have an entry."""
+
+    @pytest.fixture
+    def client(self) -> RecordingClient:
+        client = RecordingClient()
+        CSVImporter(client, TEST_USER_ID).import_frame(_routines(2))
+        client.requests.clear()
+        return client
+
+    def _reimport(self, client: RecordingClient, on_conflict: OnConflict):
+        df = _routines(3)
+        df["morning_mood"] = 9
+        importer = CSVImporter(client, TEST_USER_ID, on_conflict=on_conflict)
+        importer.import_frame(df)
+        return importer.result()
+
+    def test_error_fails_existing_days(self, client: RecordingClient) -> None:
+        result = self._reimport(client, "error")
+
+        assert result.failed_count == 2
+        assert (result.imported_count, result.skipped_count) == (1, 0)
+        assert [r["morning_mood"] for r in client.rows["morning_routines"]] == [7, 7, 9]
+
+    def test_update_overwrites_in_one_request(self, client: RecordingClient) -> None:
+        result = self._reimport(client, "update")
+
+        assert result.success
+        assert (result.imported_count, result.skipped_count) == (3, 0)
+        assert client.requests == [("morning_routines", 3)]
+        assert client.insert_kwargs["on_conflict"] == CONFLICT_COLUMNS
+        assert client.insert_kwargs["ignore_duplicates"] is False
+        assert [r["morning_mood"] for r in client.rows["morning_routines"]] == [9, 9, 9]
+
+    def test_update_keeps_values_of_blank_cells(self, client: RecordingClient) -> None:
+        client.rows["morning_routines"][0]["exercise_minutes"] = 30
+        df = _routines(2)
+        df["exercise_minutes"] = [None, 45]
+
+        importer = CSVImporter(client, TEST_USER_ID, on_conflict="update")
+        importer.import_frame(df)
+
+        stored = client.rows["morning_routines"]
+        assert importer.result().imported_count == 2
+        assert [r.get("exercise_minutes") for r in stored] == [30, 45]
+        assert COLUMN_DEFAULT not in [value for r in stored for value in r.values()]
+
+    def test_skip_keeps_existing_rows(self, client: RecordingClient) -> None:
+        result = self._reimport(client, "skip")
+
+        assert result.success
+        assert (result.imported_count, result.skipped_count) == (1, 2)
+        assert client.requests == [("morning_routines", 3)]
+        assert client.insert_kwargs["ignore_duplicates"] is True
+        assert [r["morning_mood"] for r in client.rows["morning_routines"]] == [7, 7, 9]
+
+
+class DiscardingClient:
+    """PostgREST stand-in that accepts and forgets every insert."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def table(self, _name: str) -> "DiscardingClient":
+        return self
+
+    def insert(self, records: list[dict[str, Any]], **_kwargs: Any) -> "DiscardingClient":
+        self.rows += len(records)
+        return self
+
+    def execute(self) -> None:
+        return None
+
+
+def _routines_csv(n: int) -> str:
+    header = "date,wake_time,sleep_duration_hours,exercise_minutes,breakfast_quality,morning_mood\n"
+    return header + "".join(f"2024-01-01,06:30,7.5,{i % 90},good,7\n" for i in range(n))
+
+
+class TestStreamingImport:
+    """import_csv parses and writes the file one chunk at a time."""
+
+    def test_chunks_keep_row_numbers(self) -> None:
+        client = RecordingClient(rejected_dates={"2024-01-08"})
+        importer = CSVImporter(client, TEST_USER_ID, batch_size=2)
+
+        importer.import_csv(io.StringIO(_routines(10).to_csv(index=False)), chunk_rows=3)
+        result = importer.result()
+
+        assert result.imported_count == 9
+        assert result.errors[0].startswith("Row 8:")
+        assert len(client.rows["morning_routines"]) == 9
+
+    def test_unparseable_file_raises_before_writing(self) -> None:
+        client = RecordingClient()
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        with pytest.raises(ValueError):
+            importer.import_csv(io.StringIO(""))
+        assert client.requests == []
+
+    def test_parse_error_after_first_chunk_keeps_written_rows(self) -> None:
+        csv = _routines(4).to_csv(index=False) + '2024-01-05,"06:30\n'
+        client = RecordingClient()
+        importer = CSVImporter(client, TEST_USER_ID)
+
+        importer.import_csv(io.StringIO(csv), chunk_rows=2)
+        result = importer.result()
+
+        assert len(client.rows["morning_routines"]) == 4
+        assert not result.success
+        assert result.errors[-1].startswith("Failed to parse CSV after row 4:")
+
+    def test_peak_memory_does_not_grow_with_file_size(self, tmp_path: Path) -> None:
+        def peak_bytes(rows: int) -> int:
+            path = tmp_path / f"routines-{rows}.csv"
+            path.write_text(_routines_csv(rows))
+            client = DiscardingClient()
+            importer = CSVImporter(client, TEST_USER_ID)
+            tracemalloc.start()
+            try:
+                with path.open("rb") as source:
+                    importer.import_csv(source, chunk_rows=1000)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert client.rows == rows
+            return peak
+
+        small, large = peak_bytes(10_000), peak_bytes(40_000)
+
+        # Four times the rows; loading the whole file would need about four
+        # times the memory, streaming needs the same chunk-sized amount.
+        assert large < small * 1.5
+
+
+class TestRunImportJob:
+    """Background jobs import the stored upload and record progress."""
+
+    @pytest.fixture
+    def store(self, tmp_path: Path) -> ImportJobStore:
+        return ImportJobStore(tmp_path)
+
+    def _queue(self, store: ImportJobStore, csv: str):
+        job = store.create(TEST_USER_ID, "routines.csv", "error")
+        store.upload_path(job.id).write_text(csv)
+        return job
+
+    def test_success(self, store: ImportJobStore) -> None:
+        job = self._queue(store, _routines(5).to_csv(index=False))
+        client = RecordingClient(rejected_dates={"2024-01-03"})
+        finished: list[CSVImporter] = []
+
+        run_import_job(store, job, CSVImporter(client, TEST_USER_ID), on_success=finished.append)
+        stored = store.get(TEST_USER_ID, job.id)
+
+        assert stored.status == "succeeded"
+        assert stored.rows_parsed == 5
+        assert stored.imported_count == 4
+        assert stored.failed_count == 1
+        assert stored.result.errors[0].startswith("Row 3:")
+        assert stored.started_at <= stored.finished_at
+        assert len(finished) == 1
+        assert not store.upload_path(job.id).exists()
+
+    def test_failed_refresh_keeps_the_job_succeeded(self, store: ImportJobStore) -> None:
+        job = self._queue(store, _routines(3).to_csv(index=False))
+
+        def refresh(_importer: CSVImporter) -> None:
+            raise RuntimeError("cache unavailable")
+
+        run_import_job(store, job, CSVImporter(RecordingClient(), TEST_USER_ID), on_success=refresh)
+        stored = store.get(TEST_USER_ID, job.id)
+
+        assert stored.status == "succeeded"
+        assert stored.imported_count == 3
+        assert stored.result.success
+        assert stored.error is None
+        assert "cache unavailable" in stored.warning
+
+    def test_progress_is_saved_after_each_chunk(
+        self, store: ImportJobStore, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        job = self._queue(store, _routines(5).to_csv(index=False))
+        saved: list[tuple[str, int]] = []
+        save = store.save
+
+        def record(user_id: str, job) -> None:
+            saved.append((job.status, job.rows_parsed))
+            save(user_id, job)
+
+        monkeypatch.setattr(store, "save", record)
+
+        run_import_job(store, job, CSVImporter(RecordingClient(), TEST_USER_ID), chunk_rows=2)
+
+        assert saved == [
+            ("running", 0),
+            ("running", 2),
+            ("running", 4),
+            ("running", 5),
+            ("succeeded", 5),
+        ]
+
+    def test_unparseable_upload_fails_the_job(self, store: ImportJobStore) -> None:
+        job = self._queue(store, "")
+
+        run_import_job(store, job, CSVImporter(RecordingClient(), TEST_USER_ID))
+        stored = store.get(TEST_USER_ID, job.id)
+
+        assert stored.status == "failed"
+        assert stored.error.startswith("Failed to parse CSV")
+        assert stored.warning is None
+        assert stored.result is None
+        assert not store.upload_path(job.id).exists()
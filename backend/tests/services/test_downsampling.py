@@ -0,0 +1,137 @@
+"""
+Tests for chart series downsampling.
+"""
+
+from datetime import date, timedelta
+
+from app.services.analytics_service import (
+    build_chart_data,
+    build_chart_rows,
+    chart_cache_kind,
+    chart_series,
+)
+from app.services.downsampling import (
+    bucket_chart_rows,
+    downsample_chart_rows,
+    lttb_chart_rows,
+    lttb_indices,
+)
+
+
+def _daily_rows(scores: list[float | None], start: date = date(2024, 1, 1)) -> list[dict]:
+    return [
+        {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "productivity_score": score,
+            "exercise_minutes": 10 * (i % 3),
+        }
+        for i, score in enumerate(scores)
+    ]
+
+
+class TestBucketing:
+    """Unit tests for week and month buckets."""
+
+    def test_week_buckets_start_on_monday(self) -> None:
+        """2024-01-01 is a Monday, so ten days span two weeks."""
+        points = bucket_chart_rows(_daily_rows([6] * 7 + [8] * 3), "week")
+
+        assert [p["date"] for p in points] == ["2024-01-01", "2024-01-08"]
+        assert [p["productivity_score"] for p in points] == [6, 8]
+
+    def test_month_buckets_average_present_values_only(self) -> None:
+        """Missing values are ignored rather than counted as zero."""
+        rows = _daily_rows([4, None, 8], start=date(2024, 1, 30))
+        points = bucket_chart_rows(rows, "month")
+
+        assert [p["date"] for p in points] == ["2024-01-01", "2024-02-01"]
+        assert points[0]["productivity_score"] == 4
+        assert points[1]["productivity_score"] == 8
+        assert points[0]["energy_level"] is None
+
+    def test_integer_metrics_stay_integers(self) -> None:
+        """Minute counts are rounded to match the ChartDataPoint schema."""
+        points = bucket_chart_rows(_daily_rows([5, 5]), "week")
+
+        assert points[0]["exercise_minutes"] == 5
+        assert isinstance(points[0]["exercise_minutes"], int)
+
+
+class TestLTTB:
+    """Unit tests for largest-triangle-three-buckets."""
+
+    def test_keeps_endpoints_and_caps_points(self) -> None:
+        """The first and last days are always kept and the cap is respected."""
+        xs = list(range(1000))
+        kept = lttb_indices(xs, [float(x % 7) for x in xs], 50)
+
+        assert len(kept) == 50
+        assert kept[0] == 0
+        assert kept[-1] == 999
+        assert kept == sorted(kept)
+
+    def test_preserves_isolated_peak(self) -> None:
+        """A single spike in a flat series survives downsampling."""
+        scores = [5.0] * 365
+        scores[200] = 10.0
+        points = lttb_chart_rows(_daily_rows(scores), 30)
+
+        assert max(p["productivity_score"] for p in points) == 10.0
+
+    def test_short_series_unchanged(self) -> None:
+        """Series within the cap are returned as-is."""
+        rows = _daily_rows([1, 2, 3])
+
+        assert lttb_chart_rows(rows, 10) == rows
+
+    def test_missing_scores_do_not_break_selection(self) -> None:
+        """Days without a score are treated as average days."""
+        points = lttb_chart_rows(_daily_rows([None, 3, None, 9, None] * 40), 10)
+
+        assert len(points) == 10
+
+
+class TestChartResolution:
+    """Resolution handling at the chart-data level."""
+
+    def test_day_resolution_is_identity(self) -> None:
+        """The default resolution returns the merged daily rows."""
+        rows = _daily_rows([1, 2])
+
+        assert downsample_chart_rows(rows) == rows
+
+    def test_build_chart_data_merges_then_downsamples(self) -> None:
+        """Routine and productivity rows are merged per day before bucketing."""
+        routines = [{"date": "2024-01-02", "morning_mood": 6}]
+        productivity = [
+            {"date": "2024-01-01", "productivity_score": 7, "energy_level": 5},
+            {"date": "2024-01-02", "productivity_score": 9, "energy_level": 7},
+        ]
+
+        points = build_chart_data(routines, productivity, "week")
+
+        assert len(points) == 1
+        assert points[0].productivity_score == 8
+        assert points[0].morning_mood == 6
+
+    def test_cache_kinds_differ_per_resolution(self) -> None:
+        """Each resolution (and LTTB cap) is cached separately."""
+        kinds = {
+            chart_cache_kind("day", 120),
+            chart_cache_kind("week", 120),
+            chart_cache_kind("lttb", 120),
+            chart_cache_kind("lttb", 60),
+        }
+
+        assert len(kinds) == 4
+
+    def test_chart_series_is_columnar_with_gaps(self) -> None:
+        """The columnar format has one array per field and None for gaps."""
+        routines = [{"date": "2024-01-02", "morning_mood": 6}]
+        productivity = [{"date": "2024-01-01", "productivity_score": 7, "energy_level": 5}]
+
+        series = chart_series(build_chart_rows(routines, productivity))
+
+        assert series.dates == ["2024-01-01", "2024-01-02"]
+        assert series.productivity_score == [7, None]
+        assert series.morning_mood == [None, 6]
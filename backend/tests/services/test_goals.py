@@ -0,0 +1,116 @@
+"""
+Tests for the batch goal evaluator.
+"""
+
+from collections.abc import Callable
+from datetime import date
+
+import numpy as np
+
+from app.services.goals import clock_hours, evaluate_goals, run_lengths
+from app.services.user_service import AsyncUserService
+from tests.conftest import TEST_USER_ID, RecordingSupabaseClient
+
+
+START = date(2024, 1, 1)
+END = date(2024, 1, 5)
+
+
+def _goal(goal_type: str, target: float, goal_id: str = "goal-1") -> dict:
+    return {"id": goal_id, "goal_type": goal_type, "target_value": target, "is_active": True}
+
+
+def _routines(sleep: list[float | None]) -> list[dict]:
+    return [
+        {"date": f"2024-01-{i + 1:02d}", "sleep_duration_hours": hours, "wake_time": "06:30"}
+        for i, hours in enumerate(sleep)
+        if hours is not None
+    ]
+
+
+class TestEvaluateGoals:
+    """Unit tests for evaluate_goals."""
+
+    def test_at_least_goal(self) -> None:
+        """Sleep goals hit when the logged hours reach the target."""
+        report = evaluate_goals(
+            [_goal("sleep_duration", 8)], _routines([8, 7.5, 8.2, 9, 8]), [], START, END
+        )
+
+        progress = report.goals[0]
+        assert progress.daily == [True, False, True, True, True]
+        assert progress.days_hit == 4
+        assert progress.hit_rate == 0.8
+        assert progress.current_run == 3
+        assert progress.longest_run == 3
+
+    def test_at_most_goal(self) -> None:
+        """Stress goals hit when the level stays at or under the target."""
+        productivity = [
+            {"date": "2024-01-01", "stress_level": 3},
+            {"date": "2024-01-02", "stress_level": 6},
+        ]
+
+        report = evaluate_goals([_goal("stress_level_max", 4)], [], productivity, START, END)
+
+        progress = report.goals[0]
+        assert progress.direction == "at_most"
+        assert progress.daily == [True, False, None, None, None]
+        assert progress.days_logged == 2
+        assert progress.current_run == 0
+
+    def test_unlogged_last_day_keeps_current_run(self) -> None:
+        """A run ending the day before ``end_date`` still counts as current."""
+        report = evaluate_goals(
+            [_goal("sleep_duration", 8)], _routines([None, 8, 8, 9, None]), [], START, END
+        )
+
+        assert report.goals[0].current_run == 3
+
+    def test_all_goals_share_one_layout(self) -> None:
+        """Several goals, including on the same column, are scored together."""
+        goals = [
+            _goal("sleep_duration", 8, "a"),
+            _goal("sleep_duration", 9, "b"),
+            _goal("wake_time", 7, "c"),
+        ]
+
+        report = evaluate_goals(goals, _routines([8, 8, 9, 9, 9]), [], START, END)
+
+        assert [g.days_hit for g in report.goals] == [5, 3, 5]
+        assert [g.goal_id for g in report.goals] == ["a", "b", "c"]
+
+    def test_no_goals(self) -> None:
+        report = evaluate_goals([], _routines([8]), [], START, END)
+
+        assert report.goals == []
+        assert report.days == 5
+
+
+class TestHelpers:
+    """Unit tests for the evaluator helpers."""
+
+    def test_clock_hours(self) -> None:
+        assert clock_hours("06:30") == 6.5
+        assert clock_hours("07:15:00") == 7.25
+
+    def test_run_lengths(self) -> None:
+        hits = np.array([[True], [True], [False], [True]])
+
+        assert run_lengths(hits)[:, 0].tolist() == [1, 2, 0, 1]
+
+
+class TestGoalProgressService:
+    """The service fetches goals and both tables once."""
+
+    async def test_one_fetch_per_table(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient]
+    ) -> None:
+        row = {**_goal("sleep_duration", 8), "date": "2024-01-05", "sleep_duration_hours": 8.5}
+        client = recording_supabase(data=[row])
+        service = AsyncUserService(client, TEST_USER_ID)
+
+        report = await service.get_goal_progress(START, END)
+
+        assert sorted(client.tables) == ["morning_routines", "productivity_entries", "user_goals"]
+        assert report.goals[0].days_hit == 1
@@ -0,0 +1,72 @@
+"""
+Tests for the calendar heatmap arrays.
+"""
+
+from collections.abc import Callable
+
+from app.core.analytics_cache import AnalyticsCache, InMemoryAnalyticsCacheBackend
+from app.services.analytics_service import AsyncAnalyticsService
+from app.services.heatmap import build_heatmap, year_bounds
+from tests.conftest import TEST_USER_ID, RecordingSupabaseClient
+
+
+class TestBuildHeatmap:
+    """Unit tests for laying rows out on the calendar."""
+
+    def test_leap_year_has_366_days(self) -> None:
+        assert build_heatmap(2024).days == 366
+        assert len(build_heatmap(2023).logged) == 365
+
+    def test_rows_land_on_day_of_year(self) -> None:
+        """Each table contributes its metrics; either marks the day logged."""
+        routines = [{"date": "2024-03-01", "morning_mood": 6}]
+        productivity = [
+            {"date": "2024-03-01", "productivity_score": 8, "energy_level": 7},
+            {"date": "2024-12-31", "productivity_score": 4, "energy_level": None},
+        ]
+
+        heatmap = build_heatmap(2024, routines, productivity)
+
+        march_first = 31 + 29
+        assert heatmap.logged[march_first] == 1
+        assert heatmap.productivity_score[march_first] == 8
+        assert heatmap.energy_level[march_first] == 7
+        assert heatmap.morning_mood[march_first] == 6
+        assert heatmap.productivity_score[-1] == 4
+        assert heatmap.energy_level[-1] == 0
+        assert sum(heatmap.logged) == 2
+
+    def test_rows_outside_year_are_ignored(self) -> None:
+        heatmap = build_heatmap(2024, [{"date": "2023-12-31", "productivity_score": 5}])
+
+        assert sum(heatmap.logged) == 0
+
+
+class TestHeatmapService:
+    """The service fetches once per year and caches the arrays."""
+
+    async def test_rollup_uses_one_query_and_caches(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient]
+    ) -> None:
+        client = recording_supabase(data=[{"date": "2024-01-02", "productivity_score": 9}])
+        cache = AnalyticsCache(InMemoryAnalyticsCacheBackend(), ttl_seconds=60)
+        service = AsyncAnalyticsService(client, TEST_USER_ID, chart_source="rollup", cache=cache)
+
+        first = await service.get_heatmap(2024)
+        assert client.queries == 1
+        second = await service.get_heatmap(2024)
+
+        assert second == first
+        assert client.queries == 1
+        assert first.productivity_score[1] == 9
+        assert cache.get(TEST_USER_ID, "heatmap", *year_bounds(2024)) is not None
+
+    async def test_tables_source_queries_both_tables(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient]
+    ) -> None:
+        client = recording_supabase()
+        service = AsyncAnalyticsService(client, TEST_USER_ID)
+
+        await service.get_heatmap(2023)
+
+        assert client.queries == 2
@@ -0,0 +1,135 @@
+"""
+Tests for column-wise import validation.
+"""
+
+import pandas as pd
+
+from app.models.routine import WAKE_TIME_PATTERN
+from app.services.import_validation import IMPORT_RULES, ColumnRule, validate_frame
+
+
+ROUTINES = IMPORT_RULES["morning_routines"]
+PRODUCTIVITY = IMPORT_RULES["productivity_entries"]
+
+
+def _all_rows(df: pd.DataFrame) -> pd.Series:
+    return pd.Series(True, index=df.index)
+
+
+def _routines(**columns: list) -> pd.DataFrame:
+    n = len(next(iter(columns.values()))) if columns else 1
+    base = {
+        "date": ["2024-01-01"] * n,
+        "wake_time": ["06:30"] * n,
+        "sleep_duration_hours": [7.5] * n,
+        "morning_mood": [7] * n,
+    }
+    return pd.DataFrame(base | columns)
+
+
+def _reasons(df: pd.DataFrame) -> dict:
+    return validate_frame(df, {"morning_routines": _all_rows(df)})[1]
+
+
+class TestRulesFromModels:
+    """Rules mirror the pydantic field metadata."""
+
+    def test_bounds_and_required(self) -> None:
+        assert ROUTINES["morning_mood"] == ColumnRule(
+            column="morning_mood", kind="int", required=True, ge=1, le=10
+        )
+        assert ROUTINES["sleep_duration_hours"].kind == "float"
+        assert ROUTINES["exercise_minutes"].required is False
+
+    def test_literal_choices(self) -> None:
+        assert ROUTINES["breakfast_quality"].choices == ("poor", "fair", "good", "excellent")
+
+    def test_pattern(self) -> None:
+        assert ROUTINES["wake_time"].pattern == WAKE_TIME_PATTERN
+
+    def test_optional_fields(self) -> None:
+        assert PRODUCTIVITY["notes"] == ColumnRule(column="notes", kind="str")
+        assert PRODUCTIVITY["date"].kind == "date"
+
+    def test_describe_bounds(self) -> None:
+        assert ROUTINES["morning_mood"].describe_bounds() == "must be between 1 and 10"
+        assert ROUTINES["water_intake_ml"].describe_bounds() == "must be at least 0"
+
+
+class TestValidateFrame:
+    """Invalid rows are rejected with column-level reasons."""
+
+    def test_valid_rows_pass(self) -> None:
+        df = _routines(exercise_minutes=[30, 0])
+
+        valid, reasons = validate_frame(df, {"morning_routines": _all_rows(df)})
+
+        assert reasons == {}
+        assert len(valid) == 2
+
+    def test_out_of_bounds(self) -> None:
+        reasons = _reasons(_routines(morning_mood=[7, 11, 0]))
+
+        assert reasons == {
+            1: "morning_mood must be between 1 and 10",
+            2: "morning_mood must be between 1 and 10",
+        }
+
+    def test_literal(self) -> None:
+        reasons = _reasons(_routines(breakfast_quality=["good", "amazing"]))
+
+        assert reasons == {1: "breakfast_quality must be one of poor, fair, good, excellent"}
+
+    def test_pattern(self) -> None:
+        reasons = _reasons(_routines(wake_time=["06:30", "6.30", "25:00", "06:30:00"]))
+
+        assert set(reasons) == {1, 2}
+        assert reasons[1] == "wake_time has an invalid format"
+
+    def test_types(self) -> None:
+        reasons = _reasons(
+            _routines(
+                exercise_minutes=["30", "lots", "2.5"], date=["2024-01-01", "x", "2024-01-03"]
+            )
+        )
+
+        assert reasons == {
+            1: "date must be a YYYY-MM-DD date; exercise_minutes must be a number",
+            2: "exercise_minutes must be a whole number",
+        }
+
+    def test_required(self) -> None:
+        reasons = _reasons(_routines(morning_mood=[7, None]).drop(columns="wake_time"))
+
+        assert reasons == {
+            0: "wake_time is required",
+            1: "wake_time is required; morning_mood is required",
+        }
+
+    def test_required_only_for_target_rows(self) -> None:
+        df = pd.DataFrame({"date": ["2024-01-01", "2024-01-02"], "wake_time": ["06:30", None]})
+        targets = {"morning_routines": pd.Series([True, False])}
+
+        valid, reasons = validate_frame(df, targets)
+
+        assert set(reasons) == {0}
+        assert list(valid.index) == [1]
+
+    def test_shared_columns_reported_once(self) -> None:
+        df = pd.DataFrame({"date": [None]})
+        targets = {"morning_routines": _all_rows(df), "productivity_entries": _all_rows(df)}
+
+        reasons = validate_frame(df, targets)[1]
+
+        assert reasons[0].count("date is required") == 1
+
+    def test_values_are_converted(self) -> None:
+        df = _routines(exercise_minutes=[30.0, None], date=["2024-01-05", "2024-1-6"])
+
+        valid, _ = validate_frame(df, {"morning_routines": _all_rows(df)})
+        records = valid.to_dict("records")
+
+        assert records[0]["exercise_minutes"] == 30
+        assert isinstance(records[0]["exercise_minutes"], int)
+        assert records[1]["exercise_minutes"] is None
+        assert [r["date"] for r in records] == ["2024-01-05", "2024-01-06"]
@@ -0,0 +1,142 @@
+"""
+Tests for the prefix-sum metric index and multi-window trends.
+"""
+
+import random
+from collections.abc import Callable
+from datetime import date, timedelta
+
+from app.core.analytics_cache import AnalyticsCache, InMemoryAnalyticsCacheBackend
+from app.services.analytics_service import AsyncAnalyticsService, build_summary
+from app.services.metric_index import MetricPrefixIndex, index_window, mean_of_hundredths
+from tests.conftest import TEST_USER_ID, RecordingSupabaseClient
+
+
+AS_OF = date(2024, 6, 30)
+
+
+def _history(days: int, seed: int = 7) -> tuple[list[dict], list[dict]]:
+    """Random routines and productivity rows with gaps, ending on AS_OF."""
+    rng = random.Random(seed)
+    routines, productivity = [], []
+    for i in range(days):
+        day = (AS_OF - timedelta(days=days - 1 - i)).isoformat()
+        if rng.random() < 0.8:
+            routines.append(
+                {
+                    "date": day,
+                    "sleep_duration_hours": rng.choice([5.5, 6.17, 6.83, 7.08, 7.25, 8.33]),
+                    "exercise_minutes": rng.choice([0, 20, 45]),
+                    "morning_mood": rng.randint(1, 10),
+                }
+            )
+        if rng.random() < 0.7:
+            productivity.append(
+                {
+                    "date": day,
+                    "productivity_score": rng.randint(1, 10),
+                    "energy_level": rng.randint(1, 10),
+                }
+            )
+    return routines, productivity
+
+
+def _merged(routines: list[dict], productivity: list[dict]) -> list[dict]:
+    by_date: dict[str, dict] = {}
+    for row in routines + productivity:
+        by_date.setdefault(row["date"], {}).update(row)
+    return [by_date[d] for d in sorted(by_date)]
+
+
+class TestMetricPrefixIndex:
+    """Unit tests for range lookups on the index."""
+
+    def test_summary_matches_full_aggregation(self) -> None:
+        """Any range inside the window gives the same summary as build_summary."""
+        routines, productivity = _history(400)
+        index = MetricPrefixIndex.build(_merged(routines, productivity), *index_window(AS_OF))
+        rng = random.Random(3)
+
+        for _ in range(50):
+            start = AS_OF - timedelta(days=rng.randint(0, 399))
+            end = start + timedelta(days=rng.randint(0, (AS_OF - start).days))
+            lo, hi = start.isoformat(), end.isoformat()
+            expected = build_summary(
+                [r for r in routines if lo <= r["date"] <= hi],
+                [p for p in productivity if lo <= p["date"] <= hi],
+            )
+
+            assert index.summary(start, end) == expected
+
+    def test_sums_are_exact(self) -> None:
+        """Long ranges of two-decimal values average exactly, rounded half up."""
+        rows = [
+            {"date": (AS_OF - timedelta(days=i)).isoformat(), "sleep_duration_hours": 7.07}
+            for i in range(365)
+        ]
+        index = MetricPrefixIndex.build(rows, *index_window(AS_OF))
+
+        assert index.summary(AS_OF - timedelta(days=364), AS_OF).avg_sleep == 7.07
+        assert mean_of_hundredths(1415, 2) == 7.08
+
+    def test_empty_range_summary(self) -> None:
+        """A range without entries matches the empty summary."""
+        index = MetricPrefixIndex.build([], *index_window(AS_OF))
+
+        assert index.summary(AS_OF - timedelta(days=6), AS_OF) == build_summary([], [])
+
+    def test_covers_only_the_window(self) -> None:
+        """Ranges that start before the window are not covered."""
+        start, end = index_window(AS_OF)
+        index = MetricPrefixIndex.build([], start, end)
+
+        assert index.covers(start, end)
+        assert not index.covers(start - timedelta(days=1), end)
+
+    def test_round_trips_through_cache_form(self) -> None:
+        """The cached dict answers the same queries."""
+        routines, productivity = _history(60)
+        index = MetricPrefixIndex.build(_merged(routines, productivity), *index_window(AS_OF))
+        restored = MetricPrefixIndex.from_dict(index.to_dict())
+
+        start = AS_OF - timedelta(days=29)
+        assert restored.summary(start, AS_OF) == index.summary(start, AS_OF)
+
+    def test_window_trends(self) -> None:
+        """Each window compares its average with the window just before it."""
+        rows = [
+            {
+                "date": (AS_OF - timedelta(days=i)).isoformat(),
+                "productivity_score": 8 if i < 7 else 5,
+            }
+            for i in range(60)
+        ]
+        index = MetricPrefixIndex.build(rows, *index_window(AS_OF))
+
+        trends = {(t.metric, t.window_days): t for t in index.window_trends(AS_OF, windows=(7, 30))}
+
+        week = trends[("productivity_score", 7)]
+        assert (week.current_avg, week.previous_avg, week.direction) == (8, 5, "up")
+        assert trends[("productivity_score", 30)].previous_count == 30
+        assert trends[("energy_level", 7)].current_avg is None
+        assert trends[("energy_level", 7)].direction == "stable"
+
+
+class TestIndexedService:
+    """The service builds the index once and answers ranges from it."""
+
+    async def test_index_summary_source_reuses_cached_index(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient]
+    ) -> None:
+        """Summaries for different ranges after the first issue no queries."""
+        client = recording_supabase()
+        cache = AnalyticsCache(InMemoryAnalyticsCacheBackend(), ttl_seconds=60)
+        service = AsyncAnalyticsService(client, TEST_USER_ID, summary_source="index", cache=cache)
+        today = date.today()
+
+        await service.get_summary(today - timedelta(days=6), today)
+        queries = client.queries
+        await service.get_summary(today - timedelta(days=29), today)
+        await service.get_trends()
+
+        assert client.queries == queries
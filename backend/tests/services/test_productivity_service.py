@@ -8,7 +8,7 @@ from typing import Any
 import pytest
 
 from app.models import ProductivityCreate, ProductivityUpdate
-from app.services.productivity_service import ProductivityService
+from app.services.productivity_service import AsyncProductivityService, ProductivityService
 from tests.conftest import TEST_USER_ID, MockSupabaseClient
 
 
@@ -159,3 +159,50 @@ class TestProductivityService:
         service = ProductivityService(mock_client, TEST_USER_ID)
 
         assert service.user_id == TEST_USER_ID
+
+
+class TestAsyncProductivityService:
+    """Unit tests for AsyncProductivityService."""
+
+    @pytest.fixture
+    def service_with_data(self, sample_productivity: dict[str, Any]) -> AsyncProductivityService:
+        """Create async service with mock data."""
+        return AsyncProductivityService(
+            MockSupabaseClient(data=[sample_productivity], count=1), TEST_USER_ID
+        )
+
+    @pytest.fixture
+    def service_empty(self) -> AsyncProductivityService:
+        """Create async service with empty data."""
+        return AsyncProductivityService(MockSupabaseClient(data=[], count=0), TEST_USER_ID)
+
+    async def test_list_returns_paginated_response(
+        self, service_with_data: AsyncProductivityService
+    ) -> None:
+        """Test list awaits the query and paginates the result."""
+        result = await service_with_data.list()
+
+        assert result.total == 1
+        assert len(result.data) == 1
+
+    async def test_update_returns_none_for_missing(
+        self, service_empty: AsyncProductivityService
+    ) -> None:
+        """Test update returns None for a missing entry."""
+        result = await service_empty.update("nonexistent-id", ProductivityUpdate(energy_level=5))
+
+        assert result is None
+
+    async def test_create_productivity(self, service_empty: AsyncProductivityService) -> None:
+        """Test creating an entry through the async service."""
+        create_data = ProductivityCreate(
+            date=date.today(),
+            productivity_score=8,
+            energy_level=7,
+            stress_level=3,
+        )
+
+        result = await service_empty.create(create_data)
+
+        assert result["user_id"] == TEST_USER_ID
+        assert result["productivity_score"] == 8
@@ -8,7 +8,7 @@ from typing import Any
 import pytest
 
 from app.models import MorningRoutineCreate, MorningRoutineUpdate
-from app.services.routine_service import RoutineService
+from app.services.routine_service import AsyncRoutineService, RoutineService
 from tests.conftest import TEST_USER_ID, MockSupabaseClient
 
 
@@ -155,3 +155,51 @@ class TestRoutineService:
         service = RoutineService(mock_client, TEST_USER_ID)
 
         assert service.user_id == TEST_USER_ID
+
+
+class TestAsyncRoutineService:
+    """Unit tests for AsyncRoutineService."""
+
+    @pytest.fixture
+    def service_with_data(self, sample_routine: dict[str, Any]) -> AsyncRoutineService:
+        """Create async service with mock data."""
+        return AsyncRoutineService(MockSupabaseClient(data=[sample_routine], count=1), TEST_USER_ID)
+
+    @pytest.fixture
+    def service_empty(self) -> AsyncRoutineService:
+        """Create async service with empty data."""
+        return AsyncRoutineService(MockSupabaseClient(data=[], count=0), TEST_USER_ID)
+
+    async def test_list_returns_paginated_response(
+        self, service_with_data: AsyncRoutineService
+    ) -> None:
+        """Test list awaits the query and paginates the result."""
+        result = await service_with_data.list(page=1, page_size=10)
+
+        assert result.total == 1
+        assert result.total_pages == 1
+        assert len(result.data) == 1
+
+    async def test_get_returns_none_for_missing(self, service_empty: AsyncRoutineService) -> None:
+        """Test get returns None for a missing routine."""
+        assert await service_empty.get("nonexistent-id") is None
+
+    async def test_create_routine(self, service_empty: AsyncRoutineService) -> None:
+        """Test creating a routine through the async service."""
+        create_data = MorningRoutineCreate(
+            date=date.today(),
+            wake_time="07:00",
+            sleep_duration_hours=8.0,
+            morning_mood=8,
+        )
+
+        result = await service_empty.create(create_data)
+
+        assert result["user_id"] == TEST_USER_ID
+        assert result["date"] == date.today().isoformat()
+
+    async def test_delete_returns_false_for_missing(
+        self, service_empty: AsyncRoutineService
+    ) -> None:
+        """Test delete returns False for a missing routine."""
+        assert await service_empty.delete("nonexistent-id") is False
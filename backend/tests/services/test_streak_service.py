@@ -0,0 +1,178 @@
+"""
+Tests for the activity bitmap and streak service.
+"""
+
+import random
+from collections.abc import Callable
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+
+from app.core.activity_store import ActivityStore
+from app.core.analytics_cache import InMemoryAnalyticsCacheBackend, UserGenerations
+from app.models import MorningRoutineCreate
+from app.services import AsyncRoutineService, AsyncStreakService
+from app.services.streak_service import ActivityBitmap, streak_stats
+from tests.conftest import TEST_USER_ID, MockSupabaseClient, RecordingSupabaseClient
+
+
+D0 = date(2024, 1, 1)
+
+
+def _days(*offsets: int) -> list[str]:
+    return [(D0 + timedelta(days=o)).isoformat() for o in offsets]
+
+
+def _naive_longest(days: set[date]) -> int:
+    best = 0
+    for day in days:
+        if day - timedelta(days=1) not in days:
+            length = 1
+            while day + timedelta(days=length) in days:
+                length += 1
+            best = max(best, length)
+    return best
+
+
+@pytest.fixture
+def store() -> ActivityStore:
+    return ActivityStore(InMemoryAnalyticsCacheBackend(), ttl_seconds=60)
+
+
+class TestActivityBitmap:
+    """Unit tests for bitmap bookkeeping."""
+
+    def test_runs_and_gaps(self) -> None:
+        """Streaks and gaps are derived from runs of logged days."""
+        bitmap = ActivityBitmap.from_dates(
+            {"morning_routines": _days(0, 1, 2, 6), "productivity_entries": _days(3, 10, 11)}
+        )
+
+        summary = bitmap.summarize()
+
+        assert summary["longest_streak"] == 4
+        assert summary["longest_streak_start"] == "2024-01-01"
+        assert summary["days_logged"] == 7
+        assert summary["gap_count"] == 2
+        assert summary["longest_gap"] == 3
+
+    def test_delete_keeps_day_logged_in_other_table(self) -> None:
+        """A day stays logged while either table has an entry."""
+        bitmap = ActivityBitmap.from_dates(
+            {"morning_routines": _days(0, 1), "productivity_entries": _days(1)}
+        )
+
+        bitmap.mark("morning_routines", D0 + timedelta(days=1), logged=False)
+        assert bitmap.summarize()["longest_streak"] == 2
+
+        bitmap.mark("productivity_entries", D0 + timedelta(days=1), logged=False)
+        assert bitmap.summarize()["longest_streak"] == 1
+
+    def test_earlier_day_reanchors(self) -> None:
+        """Logging a day before the origin shifts the bitmap."""
+        bitmap = ActivityBitmap.from_dates({"morning_routines": _days(5, 6)})
+
+        bitmap.mark("productivity_entries", D0 + timedelta(days=4), logged=True)
+
+        assert bitmap.origin == D0 + timedelta(days=4)
+        assert bitmap.summarize()["longest_streak"] == 3
+
+    def test_matches_naive_scan(self) -> None:
+        """Random histories agree with a day-by-day scan."""
+        rng = random.Random(5)
+        logged = {D0 + timedelta(days=i) for i in range(500) if rng.random() < 0.75}
+        bitmap = ActivityBitmap.from_dates({"morning_routines": [d.isoformat() for d in logged]})
+
+        summary = ActivityBitmap.from_dict(bitmap.to_dict()).summarize()
+
+        assert summary["longest_streak"] == _naive_longest(logged)
+        assert summary["days_logged"] == len(logged)
+
+
+class TestStreakStats:
+    """Current streak allows for today not being logged yet."""
+
+    def test_current_streak_through_yesterday(self) -> None:
+        summary = ActivityBitmap.from_dates({"morning_routines": _days(0, 1, 2)}).summarize()
+
+        assert streak_stats(summary, D0 + timedelta(days=2)).current_streak == 3
+        assert streak_stats(summary, D0 + timedelta(days=3)).current_streak == 3
+        assert streak_stats(summary, D0 + timedelta(days=4)).current_streak == 0
+
+    def test_empty(self) -> None:
+        stats = streak_stats(ActivityBitmap().summarize(), D0)
+
+        assert (stats.current_streak, stats.longest_streak, stats.days_logged) == (0, 0, 0)
+
+
+class TestStreakService:
+    """The service rebuilds once and is patched by writes."""
+
+    async def test_reads_after_rebuild_issue_no_queries(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient], store: ActivityStore
+    ) -> None:
+        client = recording_supabase(data=[{"date": d} for d in _days(0, 1)])
+        service = AsyncStreakService(client, TEST_USER_ID, store)
+
+        first = await service.get_streaks(today=D0 + timedelta(days=1))
+        queries = client.queries
+        second = await service.get_streaks(today=D0 + timedelta(days=1))
+
+        assert first == second
+        assert first.current_streak == 2
+        assert client.queries == queries
+
+    async def test_create_patches_bitmap(
+        self,
+        store: ActivityStore,
+        sample_routine: dict[str, Any],
+        recording_supabase: Callable[..., RecordingSupabaseClient],
+    ) -> None:
+        """Creating a routine extends the streak without a rebuild."""
+        client = recording_supabase(data=[{"date": d} for d in _days(0, 1)])
+        streaks = AsyncStreakService(client, TEST_USER_ID, store)
+        await streaks.get_streaks(today=D0)
+
+        payload = {
+            k: v for k, v in sample_routine.items() if k in MorningRoutineCreate.model_fields
+        }
+        routines = AsyncRoutineService(MockSupabaseClient(), TEST_USER_ID, activity=store)
+        await routines.create(MorningRoutineCreate(**{**payload, "date": D0 + timedelta(days=2)}))
+
+        queries = client.queries
+        stats = await streaks.get_streaks(today=D0 + timedelta(days=2))
+        assert stats.current_streak == 3
+        assert client.queries == queries
+
+    async def test_rebuild_racing_a_write_is_not_stored(self, store: ActivityStore) -> None:
+        """A bitmap built before a concurrent write is discarded."""
+        version = store.version(TEST_USER_ID)
+        store.discard(TEST_USER_ID)
+
+        store.set(TEST_USER_ID, ActivityBitmap().to_dict(), version=version)
+
+        assert store.get(TEST_USER_ID) is None
+
+    def test_versions_are_dropped_with_the_bitmaps(self, store: ActivityStore) -> None:
+        """Per-user versions do not outlive the users' bitmaps."""
+        for i in range(10 * UserGenerations.MIN_SWEEP):
+            store.discard(f"user-{i}")
+
+        assert len(store._versions) < 2 * UserGenerations.MIN_SWEEP
+
+    async def test_other_data_version_rebuilds(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient], store: ActivityStore
+    ) -> None:
+        """A bitmap recorded under an older data version is rebuilt."""
+        client = recording_supabase(data=[{"date": d} for d in _days(0, 1)])
+        await AsyncStreakService(client, TEST_USER_ID, store, data_version="v1").get_streaks()
+        queries = client.queries
+
+        service = AsyncStreakService(client, TEST_USER_ID, store, data_version="v2")
+        await service.get_streaks()
+        rebuilt = client.queries
+        await service.get_streaks()
+
+        assert rebuilt > queries
+        assert client.queries == rebuilt
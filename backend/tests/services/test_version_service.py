@@ -0,0 +1,54 @@
+"""
+Tests for the data version probes behind conditional GETs.
+"""
+
+from collections.abc import Callable
+from datetime import date
+
+from app.services import AsyncVersionService
+from tests.conftest import TEST_USER_ID, MockSupabaseClient, RecordingSupabaseClient
+
+
+JAN = (date(2024, 1, 1), date(2024, 1, 31))
+
+
+async def _version(rows: list[dict], count: int, date_range=JAN) -> str:
+    client = MockSupabaseClient(data=rows, count=count)
+    return await AsyncVersionService(client, TEST_USER_ID).get_version(
+        ("morning_routines",), *date_range
+    )
+
+
+class TestVersionService:
+    """The fingerprint changes with every kind of write."""
+
+    async def test_same_data_same_version(self) -> None:
+        rows = [{"updated_at": "2024-01-02T08:00:00Z"}]
+
+        assert await _version(rows, 3) == await _version(rows, 3)
+
+    async def test_update_changes_version(self) -> None:
+        before = await _version([{"updated_at": "2024-01-02T08:00:00Z"}], 3)
+        after = await _version([{"updated_at": "2024-01-05T09:00:00Z"}], 3)
+
+        assert before != after
+
+    async def test_delete_changes_version(self) -> None:
+        rows = [{"updated_at": "2024-01-02T08:00:00Z"}]
+
+        assert await _version(rows, 3) != await _version(rows, 2)
+
+    async def test_range_is_part_of_version(self) -> None:
+        rows = [{"updated_at": "2024-01-02T08:00:00Z"}]
+        february = (date(2024, 2, 1), date(2024, 2, 29))
+
+        assert await _version(rows, 1) != await _version(rows, 1, february)
+
+    async def test_one_probe_per_table(
+        self, recording_supabase: Callable[..., RecordingSupabaseClient]
+    ) -> None:
+        client = recording_supabase()
+
+        await AsyncVersionService(client, TEST_USER_ID).get_version()
+
+        assert client.queries == 2
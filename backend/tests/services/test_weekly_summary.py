@@ -0,0 +1,211 @@
+"""
+Tests for the weekly summary batch job.
+"""
+
+import io
+import json
+import uuid
+from datetime import date
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+import pytest
+from postgrest import SyncPostgrestClient
+
+from app.services.analytics_service import SUMMARY_ROUTINE_COLUMNS
+from app.services.weekly_summary import (
+    USER_PAGE_SIZE,
+    JsonLinesSink,
+    SummarySink,
+    WeeklySummaryJob,
+    previous_week,
+)
+
+
+TODAY = date(2024, 1, 10)  # a Wednesday; the previous week is 1-7 January
+
+
+class FakeQuery:
+    """Query builder that applies the filters the job uses to in-memory rows."""
+
+    def __init__(self, rows: list[dict[str, Any]], log: list[str], table: str):
+        self.rows = rows
+        self.log = log
+        self.table = table
+        self.window: tuple[int, int] | None = None
+
+    def select(self, *_args: Any) -> "FakeQuery":
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [r for r in self.rows if r.get(column) == value]
+        return self
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [r for r in self.rows if r[column] > value]
+        return self
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [r for r in self.rows if r[column] >= value]
+        return self
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        self.rows = [r for r in self.rows if r[column] <= value]
+        return self
+
+    def in_(self, column: str, values: list[Any]) -> "FakeQuery":
+        self.rows = [r for r in self.rows if r[column] in set(values)]
+        return self
+
+    def order(self, column: str) -> "FakeQuery":
+        # Successive calls refine the order, as in PostgREST.
+        self.rows = sorted(self.rows, key=lambda r: r[column])
+        return self
+
+    def limit(self, count: int) -> "FakeQuery":
+        self.window = (0, count - 1)
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self.window = (start, end)
+        return self
+
+    def execute(self) -> Any:
+        self.log.append(self.table)
+        rows = sorted(self.rows, key=lambda r: (r.get("user_id"), r.get("date", "")))
+        if self.window is not None:
+            rows = rows[self.window[0] : self.window[1] + 1]
+        return type("Response", (), {"data": rows})()
+
+
+class FakeClient:
+    """Service client over in-memory tables that records every request."""
+
+    def __init__(self, tables: dict[str, list[dict[str, Any]]]):
+        self.tables = tables
+        self.log: list[str] = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.tables.get(name, []), self.log, name)
+
+
+class ListSink(SummarySink):
+    """Sink that keeps every batch in memory."""
+
+    def __init__(self):
+        self.batches: list[list[dict[str, Any]]] = []
+        self.closed = False
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        self.batches.append(records)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _tables(users: int) -> dict[str, list[dict[str, Any]]]:
+    ids = [f"user-{i:03d}" for i in range(users)]
+    settings = [{"user_id": u, "weekly_summary_email": i % 3 != 0} for i, u in enumerate(ids)]
+    routines = [
+        {
+            "user_id": u,
+            "date": f"2024-01-{d:02d}",
+            "sleep_duration_hours": 7.0,
+            "exercise_minutes": 30,
+            "morning_mood": 6,
+        }
+        for u in ids
+        for d in range(1, 9)  # 8 January falls outside the week
+    ]
+    productivity = [
+        {"user_id": u, "date": f"2024-01-{d:02d}", "productivity_score": d, "energy_level": 5}
+        for u in ids
+        for d in range(1, 8)
+    ]
+    return {
+        "user_settings": settings,
+        "morning_routines": routines,
+        "productivity_entries": productivity,
+    }
+
+
+class TestWeeklySummaryJob:
+    """Paging, partitioning and sink delivery."""
+
+    def test_previous_week_is_monday_to_sunday(self) -> None:
+        assert previous_week(TODAY) == (date(2024, 1, 1), date(2024, 1, 7))
+        assert previous_week(date(2024, 1, 8)) == (date(2024, 1, 1), date(2024, 1, 7))
+
+    def test_pages_users_and_rows(self) -> None:
+        """Every opted-in user is summarized once, across user and row pages."""
+        client = FakeClient(_tables(10))
+        sink = ListSink()
+        job = WeeklySummaryJob(client, sink, user_page_size=3, row_page_size=5, task_batch_size=2)
+
+        stats = job.run(TODAY, workers=0)
+
+        records = [r for batch in sink.batches for r in batch]
+        opted_in = [f"user-{i:03d}" for i in range(10) if i % 3 != 0]
+        assert sorted(r["user_id"] for r in records) == opted_in
+        assert stats.users == 6
+        assert stats.user_pages == 2
+        assert stats.rows == 6 * 14
+        assert all(len(batch) <= 2 for batch in sink.batches)
+        assert sink.closed
+
+        summary = records[0]["summary"]
+        assert summary["total_entries"] == 7
+        assert summary["best_day"] == "2024-01-07"
+        assert records[0]["week_start"] == "2024-01-01"
+
+    def test_sink_closed_when_run_fails(self) -> None:
+        """A failing query still closes the sink."""
+        client = FakeClient(_tables(4))
+        sink = ListSink()
+
+        with (
+            patch.object(client, "table", side_effect=RuntimeError("connection lost")),
+            pytest.raises(RuntimeError),
+        ):
+            WeeklySummaryJob(client, sink).run(TODAY, workers=0)
+
+        assert sink.closed
+
+    def test_row_query_url_fits_gateway_limits(self) -> None:
+        """A full page of user ids keeps the GET URL under 8 KB."""
+        client = SyncPostgrestClient("https://abcdefghijklmnopqrst.supabase.co/rest/v1")
+        job = WeeklySummaryJob(client, ListSink())
+        user_ids = [str(uuid.uuid4()) for _ in range(USER_PAGE_SIZE)]
+
+        request = job._rows_query(
+            "morning_routines", SUMMARY_ROUTINE_COLUMNS, user_ids, *previous_week(TODAY), offset=0
+        ).request
+        url = httpx.URL(str(request.path), params=request.params)
+
+        assert len(str(url)) < 8 * 1024
+
+    def test_process_pool_matches_in_process(self) -> None:
+        """Aggregating in worker processes gives the same records."""
+        inline, pooled = ListSink(), ListSink()
+        WeeklySummaryJob(FakeClient(_tables(8)), inline, user_page_size=4).run(TODAY, workers=0)
+        WeeklySummaryJob(FakeClient(_tables(8)), pooled, user_page_size=4).run(
+            TODAY, workers=2, max_pending=1
+        )
+
+        def flatten(sink: ListSink) -> list[dict[str, Any]]:
+            return sorted((r for b in sink.batches for r in b), key=lambda r: r["user_id"])
+
+        assert flatten(pooled) == flatten(inline)
+
+    def test_json_lines_sink(self) -> None:
+        stream = io.StringIO()
+        sink = JsonLinesSink(stream)
+
+        sink.write([{"user_id": "a"}, {"user_id": "b"}])
+        sink.close()
+
+        assert [json.loads(line)["user_id"] for line in stream.getvalue().splitlines()] == [
+            "a",
+            "b",
+        ]
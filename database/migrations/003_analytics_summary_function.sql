@@ -0,0 +1,84 @@
+-- Migration: Server-side analytics summary
+--
+-- Issue:  GET /api/analytics/summary fetched every routine and productivity
+--         row in the requested range just to average them in the API.
+-- Fix:    analytics_summary(start_date, end_date) aggregates in Postgres and
+--         returns a single row. The API calls it via PostgREST RPC when
+--         ANALYTICS_SUMMARY_SOURCE=database.
+--
+-- How to apply:
+--   Run this migration in your Supabase SQL Editor (Dashboard -> SQL Editor -> New Query).
+--   It is safe to run multiple times (CREATE OR REPLACE is idempotent).
+
+-- Returns the AnalyticsSummary fields for the calling user in one row, so the
+-- API transfers a single row instead of every row in the range. Mirrors
+-- build_summary() in backend/app/services/analytics_service.py:
+--   * averages rounded to 2 decimals (0 when the range is empty)
+--   * best/worst day by productivity_score, earliest date on ties
+--   * trend compares the first and second half (by date) of the entries,
+--     with the extra entry in the second half when the count is odd
+-- Runs as the caller (SECURITY INVOKER), so RLS still applies; the explicit
+-- user_id filter lets the (user_id, date) indexes serve the range scan.
+CREATE OR REPLACE FUNCTION analytics_summary(start_date DATE, end_date DATE)
+RETURNS TABLE (
+    avg_productivity NUMERIC,
+    avg_sleep NUMERIC,
+    avg_exercise NUMERIC,
+    avg_mood NUMERIC,
+    avg_energy NUMERIC,
+    total_entries INTEGER,
+    best_day DATE,
+    worst_day DATE,
+    productivity_trend TEXT
+) AS $$
+    WITH routine_totals AS (
+        SELECT
+            AVG(r.sleep_duration_hours) AS avg_sleep,
+            AVG(r.exercise_minutes) AS avg_exercise,
+            AVG(r.morning_mood) AS avg_mood
+        FROM public.morning_routines r
+        WHERE r.user_id = (SELECT auth.uid())
+          AND r.date BETWEEN start_date AND end_date
+    ),
+    entries AS (
+        SELECT
+            p.date,
+            p.productivity_score,
+            p.energy_level,
+            ROW_NUMBER() OVER (ORDER BY p.date) AS position,
+            COUNT(*) OVER () AS entry_count
+        FROM public.productivity_entries p
+        WHERE p.user_id = (SELECT auth.uid())
+          AND p.date BETWEEN start_date AND end_date
+    ),
+    productivity_totals AS (
+        SELECT
+            COUNT(*) AS entry_count,
+            AVG(e.productivity_score) AS avg_productivity,
+            AVG(e.energy_level) AS avg_energy,
+            AVG(e.productivity_score) FILTER (WHERE e.position <= e.entry_count / 2) AS first_half_avg,
+            AVG(e.productivity_score) FILTER (WHERE e.position > e.entry_count / 2) AS second_half_avg,
+            (ARRAY_AGG(e.date ORDER BY e.productivity_score DESC, e.date))[1] AS best_day,
+            (ARRAY_AGG(e.date ORDER BY e.productivity_score, e.date))[1] AS worst_day
+        FROM entries e
+    )
+    SELECT
+        ROUND(COALESCE(p.avg_productivity, 0), 2),
+        ROUND(COALESCE(r.avg_sleep, 0), 2),
+        ROUND(COALESCE(r.avg_exercise, 0), 2),
+        ROUND(COALESCE(r.avg_mood, 0), 2),
+        ROUND(COALESCE(p.avg_energy, 0), 2),
+        p.entry_count::INTEGER,
+        p.best_day,
+        p.worst_day,
+        CASE
+            WHEN p.entry_count < 4 THEN 'stable'
+            WHEN p.second_half_avg > p.first_half_avg * 1.1 THEN 'up'
+            WHEN p.second_half_avg < p.first_half_avg * 0.9 THEN 'down'
+            ELSE 'stable'
+        END
+    FROM productivity_totals p
+    CROSS JOIN routine_totals r;
+$$ LANGUAGE sql STABLE SET search_path = '';
+
+GRANT EXECUTE ON FUNCTION analytics_summary(DATE, DATE) TO authenticated;
@@ -150,6 +150,27 @@ CREATE TABLE IF NOT EXISTS productivity_entries (
     UNIQUE(user_id, date)
 );
 
+-- ============================================
+-- USER DAILY METRICS (ROLLUP)
+-- ============================================
+-- One row per user per day with the chart-relevant routine and productivity
+-- values pre-joined. Maintained by triggers on the source tables; the API
+-- only reads it.
+CREATE TABLE IF NOT EXISTS user_daily_metrics (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    productivity_score INTEGER,
+    energy_level INTEGER,
+    morning_mood INTEGER,
+    sleep_duration_hours DECIMAL(4,2),
+    exercise_minutes INTEGER,
+    meditation_minutes INTEGER,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    -- Also serves the (user_id, date) range scans
+    PRIMARY KEY (user_id, date)
+);
+
 -- ============================================
 -- INDEXES
 -- ============================================
@@ -243,6 +264,238 @@ CREATE TRIGGER on_auth_user_created
     FOR EACH ROW
     EXECUTE FUNCTION handle_new_user();
 
+-- ============================================
+-- ANALYTICS FUNCTIONS
+-- ============================================
+
+-- Returns the AnalyticsSummary fields for the calling user in one row, so the
+-- API transfers a single row instead of every row in the range. Mirrors
+-- build_summary() in backend/app/services/analytics_service.py:
+--   * averages rounded to 2 decimals (0 when the range is empty)
+--   * best/worst day by productivity_score, earliest date on ties
+--   * trend compares the first and second half (by date) of the entries,
+--     with the extra entry in the second half when the count is odd
+-- Runs as the caller (SECURITY INVOKER), so RLS still applies; the explicit
+-- user_id filter lets the (user_id, date) indexes serve the range scan.
+CREATE OR REPLACE FUNCTION analytics_summary(start_date DATE, end_date DATE)
+RETURNS TABLE (
+    avg_productivity NUMERIC,
+    avg_sleep NUMERIC,
+    avg_exercise NUMERIC,
+    avg_mood NUMERIC,
+    avg_energy NUMERIC,
+    total_entries INTEGER,
+    best_day DATE,
+    worst_day DATE,
+    productivity_trend TEXT
+) AS $$
+    WITH routine_totals AS (
+        SELECT
+            AVG(r.sleep_duration_hours) AS avg_sleep,
+            AVG(r.exercise_minutes) AS avg_exercise,
+            AVG(r.morning_mood) AS avg_mood
+        FROM public.morning_routines r
+        WHERE r.user_id = (SELECT auth.uid())
+          AND r.date BETWEEN start_date AND end_date
+    ),
+    entries AS (
+        SELECT
+            p.date,
+            p.productivity_score,
+            p.energy_level,
+            ROW_NUMBER() OVER (ORDER BY p.date) AS position,
+            COUNT(*) OVER () AS entry_count
+        FROM public.productivity_entries p
+        WHERE p.user_id = (SELECT auth.uid())
+          AND p.date BETWEEN start_date AND end_date
+    ),
+    productivity_totals AS (
+        SELECT
+            COUNT(*) AS entry_count,
+            AVG(e.productivity_score) AS avg_productivity,
+            AVG(e.energy_level) AS avg_energy,
+            AVG(e.productivity_score) FILTER (WHERE e.position <= e.entry_count / 2) AS first_half_avg,
+            AVG(e.productivity_score) FILTER (WHERE e.position > e.entry_count / 2) AS second_half_avg,
+            (ARRAY_AGG(e.date ORDER BY e.productivity_score DESC, e.date))[1] AS best_day,
+            (ARRAY_AGG(e.date ORDER BY e.productivity_score, e.date))[1] AS worst_day
+        FROM entries e
+    )
+    SELECT
+        ROUND(COALESCE(p.avg_productivity, 0), 2),
+        ROUND(COALESCE(r.avg_sleep, 0), 2),
+        ROUND(COALESCE(r.avg_exercise, 0), 2),
+        ROUND(COALESCE(r.avg_mood, 0), 2),
+        ROUND(COALESCE(p.avg_energy, 0), 2),
+        p.entry_count::INTEGER,
+        p.best_day,
+        p.worst_day,
+        CASE
+            WHEN p.entry_count < 4 THEN 'stable'
+            WHEN p.second_half_avg > p.first_half_avg * 1.1 THEN 'up'
+            WHEN p.second_half_avg < p.first_half_avg * 0.9 THEN 'down'
+            ELSE 'stable'
+        END
+    FROM productivity_totals p
+    CROSS JOIN routine_totals r;
+$$ LANGUAGE sql STABLE SET search_path = '';
+
+-- ============================================
+-- DAILY METRICS ROLLUP MAINTENANCE
+-- ============================================
+
+-- Recomputes the rollup rows for the given (user_id, date) pairs from the
+-- source tables: pairs that still have a routine or productivity entry are
+-- upserted, the rest are removed. Internal helper; not callable over RPC.
+CREATE OR REPLACE FUNCTION refresh_user_daily_metrics(user_ids UUID[], dates DATE[])
+RETURNS VOID AS $$
+    INSERT INTO public.user_daily_metrics (
+        user_id, date, productivity_score, energy_level, morning_mood,
+        sleep_duration_hours, exercise_minutes, meditation_minutes
+    )
+    SELECT
+        k.user_id, k.date, p.productivity_score, p.energy_level, r.morning_mood,
+        r.sleep_duration_hours, r.exercise_minutes, r.meditation_minutes
+    FROM (SELECT DISTINCT * FROM unnest(user_ids, dates) AS u(user_id, date)) k
+    LEFT JOIN public.morning_routines r ON r.user_id = k.user_id AND r.date = k.date
+    LEFT JOIN public.productivity_entries p ON p.user_id = k.user_id AND p.date = k.date
+    WHERE r.id IS NOT NULL OR p.id IS NOT NULL
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        productivity_score = EXCLUDED.productivity_score,
+        energy_level = EXCLUDED.energy_level,
+        morning_mood = EXCLUDED.morning_mood,
+        sleep_duration_hours = EXCLUDED.sleep_duration_hours,
+        exercise_minutes = EXCLUDED.exercise_minutes,
+        meditation_minutes = EXCLUDED.meditation_minutes,
+        updated_at = NOW();
+
+    DELETE FROM public.user_daily_metrics m
+    USING unnest(user_ids, dates) AS k(user_id, date)
+    WHERE m.user_id = k.user_id
+      AND m.date = k.date
+      AND NOT EXISTS (
+          SELECT 1 FROM public.morning_routines r
+          WHERE r.user_id = k.user_id AND r.date = k.date
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM public.productivity_entries p
+          WHERE p.user_id = k.user_id AND p.date = k.date
+      );
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = '';
+
+-- Statement-level trigger function shared by morning_routines and
+-- productivity_entries. Reads the transition tables, so a multi-row insert
+-- (e.g. a CSV import batch) refreshes its days in one set-based pass rather
+-- than once per row. Bulk loads can skip it entirely with
+--   SET LOCAL app.defer_daily_metrics = 'on';
+-- and call rebuild_user_daily_metrics() for the loaded range afterwards.
+CREATE OR REPLACE FUNCTION sync_user_daily_metrics()
+RETURNS TRIGGER AS $$
+DECLARE
+    user_ids UUID[];
+    dates DATE[];
+BEGIN
+    IF current_setting('app.defer_daily_metrics', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(n.user_id), array_agg(n.date) INTO user_ids, dates
+        FROM new_rows n;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(o.user_id), array_agg(o.date) INTO user_ids, dates
+        FROM old_rows o;
+    ELSE
+        -- An update can move a row to another day: refresh both days.
+        SELECT array_agg(k.user_id), array_agg(k.date) INTO user_ids, dates
+        FROM (
+            SELECT n.user_id, n.date FROM new_rows n
+            UNION
+            SELECT o.user_id, o.date FROM old_rows o
+        ) k;
+    END IF;
+
+    IF user_ids IS NOT NULL THEN
+        PERFORM public.refresh_user_daily_metrics(user_ids, dates);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = '';
+
+-- Rebuilds the caller's rollup for a date range with a single INSERT.
+-- Used after bulk loads that deferred trigger maintenance.
+CREATE OR REPLACE FUNCTION rebuild_user_daily_metrics(start_date DATE, end_date DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    uid UUID := (SELECT auth.uid());
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM public.user_daily_metrics m
+    WHERE m.user_id = uid AND m.date BETWEEN start_date AND end_date;
+
+    INSERT INTO public.user_daily_metrics (
+        user_id, date, productivity_score, energy_level, morning_mood,
+        sleep_duration_hours, exercise_minutes, meditation_minutes
+    )
+    SELECT
+        uid, COALESCE(r.date, p.date), p.productivity_score, p.energy_level, r.morning_mood,
+        r.sleep_duration_hours, r.exercise_minutes, r.meditation_minutes
+    FROM (
+        SELECT * FROM public.morning_routines
+        WHERE user_id = uid AND date BETWEEN start_date AND end_date
+    ) r
+    FULL OUTER JOIN (
+        SELECT * FROM public.productivity_entries
+        WHERE user_id = uid AND date BETWEEN start_date AND end_date
+    ) p ON p.date = r.date;
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = '';
+
+-- Transition tables require one trigger per event.
+DROP TRIGGER IF EXISTS morning_routines_daily_metrics_insert ON morning_routines;
+CREATE TRIGGER morning_routines_daily_metrics_insert
+    AFTER INSERT ON morning_routines
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sync_user_daily_metrics();
+
+DROP TRIGGER IF EXISTS morning_routines_daily_metrics_update ON morning_routines;
+CREATE TRIGGER morning_routines_daily_metrics_update
+    AFTER UPDATE ON morning_routines
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sync_user_daily_metrics();
+
+DROP TRIGGER IF EXISTS morning_routines_daily_metrics_delete ON morning_routines;
+CREATE TRIGGER morning_routines_daily_metrics_delete
+    AFTER DELETE ON morning_routines
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sync_user_daily_metrics();
+
+DROP TRIGGER IF EXISTS productivity_entries_daily_metrics_insert ON productivity_entries;
+CREATE TRIGGER productivity_entries_daily_metrics_insert
+    AFTER INSERT ON productivity_entries
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sync_user_daily_metrics();
+
+DROP TRIGGER IF EXISTS productivity_entries_daily_metrics_update ON productivity_entries;
+CREATE TRIGGER productivity_entries_daily_metrics_update
+    AFTER UPDATE ON productivity_entries
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sync_user_daily_metrics();
+
+DROP TRIGGER IF EXISTS productivity_entries_daily_metrics_delete ON productivity_entries;
+CREATE TRIGGER productivity_entries_daily_metrics_delete
+    AFTER DELETE ON productivity_entries
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sync_user_daily_metrics();
+
 -- ============================================
 -- ROW LEVEL SECURITY (RLS)
 -- ============================================
@@ -253,6 +506,7 @@ ALTER TABLE user_settings ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_goals ENABLE ROW LEVEL SECURITY;
 ALTER TABLE morning_routines ENABLE ROW LEVEL SECURITY;
 ALTER TABLE productivity_entries ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_daily_metrics ENABLE ROW LEVEL SECURITY;
 
 -- User Profiles Policies
 CREATE POLICY "Users can view own profile"
@@ -323,6 +577,11 @@ CREATE POLICY "Users can delete own productivity"
     ON productivity_entries FOR DELETE
     USING ((select auth.uid()) = user_id);
 
+-- User Daily Metrics Policies (read-only; rows are written by triggers)
+CREATE POLICY "Users can view own daily metrics"
+    ON user_daily_metrics FOR SELECT
+    USING ((select auth.uid()) = user_id);
+
 -- ============================================
 -- GRANTS
 -- ============================================
@@ -331,3 +590,7 @@ GRANT ALL ON user_settings TO authenticated;
 GRANT ALL ON user_goals TO authenticated;
 GRANT ALL ON morning_routines TO authenticated;
 GRANT ALL ON productivity_entries TO authenticated;
+GRANT EXECUTE ON FUNCTION analytics_summary(DATE, DATE) TO authenticated;
+GRANT SELECT ON user_daily_metrics TO authenticated;
+REVOKE EXECUTE ON FUNCTION refresh_user_daily_metrics(UUID[], DATE[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION rebuild_user_daily_metrics(DATE, DATE) TO authenticated;